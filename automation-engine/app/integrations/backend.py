@@ -1,9 +1,176 @@
+import atexit
+import os
+import threading
+import time
 import requests
 import uuid
 from datetime import datetime
 
+from app.integrations.event_spool import EventSpool, EVENT_SPOOL_PATH
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process sends
+    fcntl = None
+
 BACKEND_URL = "http://127.0.0.1:3000/api/events"
 
+# Spooled events kept while the backend is down; the oldest are dropped beyond this
+EVENT_SPOOL_MAX_EVENTS = int(os.getenv("EVENT_SPOOL_MAX_EVENTS", "100000"))
+# Seconds the process waits at exit for spooled events to be sent
+EVENT_FLUSH_TIMEOUT = float(os.getenv("EVENT_FLUSH_TIMEOUT", "5"))
+# Events read from the spool per round
+EVENT_SEND_BATCH = 50
+# Retry delay while the backend is unreachable: doubles from 1s up to this
+EVENT_MAX_BACKOFF = 60
+# Seconds between spool checks when idle (picks up events from other processes)
+EVENT_IDLE_POLL = 1.0
+
+
+class EventEmitter:
+    """
+    Writes events to a local SQLite spool and sends them from a background
+    thread over one pooled requests.Session.
+
+    emit() only appends to the spool, so callers never wait on the network.
+    One sender per machine (elected with a lock file) posts spooled events in
+    append order, which keeps the events of an account in order. While the
+    backend is down or failing (5xx) the sender backs off exponentially and the
+    events stay on disk, so they are sent after a restart too. An event the
+    backend already stored (409 for its event_id) counts as delivered. The
+    sender starts on the first event, again after a fork.
+    """
+
+    def __init__(self, url: str = BACKEND_URL, spool_path: str = EVENT_SPOOL_PATH, timeout: float = 5):
+        self.url = url
+        self.spool_path = spool_path
+        self.timeout = timeout
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        self._spool = None
+        self._session = None
+        self._sender_lock_file = None
+        self._backoff = 0
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._spool is None:
+                self._spool = EventSpool(self.spool_path)
+            self._session = requests.Session()
+            self._sender_lock_file = None
+            threading.Thread(target=self._run, name="event-emitter", daemon=True).start()
+            self._pid = os.getpid()
+
+    def emit(self, data: dict):
+        self._ensure_started()
+        try:
+            self._spool.append(data)
+        except Exception as e:
+            print(f"Failed to spool event: {e}")
+            return
+        self._wake.set()
+
+    def _is_sender(self) -> bool:
+        """Hold the spool's lock file so only one process sends."""
+        if fcntl is None or self._sender_lock_file is not None:
+            return True
+        lock_file = open(self.spool_path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._sender_lock_file = lock_file
+        return True
+
+    def _send(self, data: dict) -> bool:
+        """Post one spooled event; False if it should be retried later."""
+        try:
+            response = self._session.post(self.url, json=data, timeout=self.timeout)
+        except Exception as e:
+            print(f"Failed to emit event: {e}")
+            return False
+
+        if response.status_code == 409:
+            # Stored by an earlier attempt whose response was lost
+            return True
+        if response.status_code >= 500:
+            print(f"Failed to emit event: backend returned {response.status_code}")
+            return False
+        if response.status_code >= 400:
+            # Retrying cannot fix a rejected event
+            print(f"Backend rejected {data.get('event_type')} event: {response.status_code} {response.text[:200]}")
+        return True
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                if not self._is_sender():
+                    self._wake.wait(EVENT_IDLE_POLL)
+                    continue
+
+                dropped = self._spool.trim(EVENT_SPOOL_MAX_EVENTS)
+                if dropped:
+                    self.dropped += dropped
+                    print(f"Event spool full, dropped {dropped} oldest events")
+
+                batch = self._spool.peek(EVENT_SEND_BATCH)
+            except Exception as e:
+                print(f"Event spool error: {e}")
+                time.sleep(EVENT_IDLE_POLL)
+                continue
+
+            if not batch:
+                self._wake.wait(EVENT_IDLE_POLL)
+                continue
+
+            sent_through = None
+            for seq, data in batch:
+                if not self._send(data):
+                    break
+                sent_through = seq
+            if sent_through is not None:
+                try:
+                    self._spool.delete_through(sent_through)
+                except Exception as e:
+                    # The events stay spooled and are sent again
+                    print(f"Event spool error: {e}")
+
+            if sent_through == batch[-1][0]:
+                self._backoff = 0
+            else:
+                self._backoff = min(max(self._backoff * 2, 1), EVENT_MAX_BACKOFF)
+                time.sleep(self._backoff)
+
+    def flush(self, timeout: float = EVENT_FLUSH_TIMEOUT) -> bool:
+        """
+        Wait until the spool is empty.
+
+        Returns False if the timeout ran out first or the backend is unreachable;
+        the events stay spooled for the next run.
+        """
+        if self._pid != os.getpid():
+            return True
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        while self._spool.count():
+            if self._backoff or time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+
+_emitter = EventEmitter()
+atexit.register(_emitter.flush)
+
+
 def emit_event(account_id: str, event_type: str, payload: dict):
     data = {
         "event_id": f"evt_{uuid.uuid4()}",
@@ -15,7 +182,8 @@ def emit_event(account_id: str, event_type: str, payload: dict):
         "payload": payload
     }
 
-    try:
-        requests.post(BACKEND_URL, json=data, timeout=5)
-    except Exception as e:
-        print(f"Failed to emit event: {e}")
+    _emitter.emit(data)
+
+
+def flush_events(timeout: float = EVENT_FLUSH_TIMEOUT) -> bool:
+    return _emitter.flush(timeout)
@@ -0,0 +1,64 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Tuple
+
+# automation-engine/.event_spool/events.sqlite3 unless EVENT_SPOOL_PATH is set
+EVENT_SPOOL_PATH = os.getenv(
+    "EVENT_SPOOL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".event_spool", "events.sqlite3")
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL
+)
+"""
+
+
+class EventSpool:
+    """
+    Append-only event queue in a SQLite file (WAL mode), shared by every
+    process on the machine. Events are read back in append order (seq) and
+    deleted once they are sent, so unsent events survive restarts.
+    """
+
+    def __init__(self, path: str = EVENT_SPOOL_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process (connections do not survive a fork)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def append(self, data: dict):
+        self._connect().execute("INSERT INTO events (data) VALUES (?)", (json.dumps(data),))
+
+    def peek(self, limit: int) -> List[Tuple[int, dict]]:
+        """Oldest `limit` events as (seq, data)."""
+        rows = self._connect().execute("SELECT seq, data FROM events ORDER BY seq LIMIT ?", (limit,))
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def delete_through(self, seq: int):
+        self._connect().execute("DELETE FROM events WHERE seq <= ?", (seq,))
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def trim(self, max_events: int) -> int:
+        """Drop the oldest events beyond `max_events`; returns how many were dropped."""
+        cursor = self._connect().execute(
+            "DELETE FROM events WHERE seq <= (SELECT MAX(seq) FROM events) - ?", (max_events,)
+        )
+        return cursor.rowcount
@@ -0,0 +1,72 @@
+"""
+Local stand-in for the backend events API, for the event emitter tests.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _EventsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the backend
+
+    def do_POST(self):
+        event = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.attempts.append(event['event_id'])
+            status = server.statuses.pop(0) if server.statuses else server.default_status
+            if status == 201:
+                server.events.append(event)
+        body = json.dumps({'status': status}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeBackend:
+    """
+    Events API on 127.0.0.1 answering with `statuses` in order, then `default_status`.
+
+    events holds the stored (201) events, attempts the event_id of every POST.
+    """
+
+    def __init__(self, default_status=201):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _EventsHandler)
+        self.server.lock = threading.Lock()
+        self.server.connections = set()
+        self.server.attempts = []
+        self.server.events = []
+        self.server.statuses = []
+        self.server.default_status = default_status
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/api/events'
+
+    def respond(self, *statuses, default=None):
+        with self.server.lock:
+            self.server.statuses.extend(statuses)
+            if default is not None:
+                self.server.default_status = default
+
+    @property
+    def events(self):
+        with self.server.lock:
+            return list(self.server.events)
+
+    @property
+    def attempts(self):
+        with self.server.lock:
+            return list(self.server.attempts)
+
+    @property
+    def connections(self):
+        return self.server.connections
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,205 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from app.integrations import backend
+from app.integrations.backend import EventEmitter
+from app.integrations.event_spool import EventSpool
+from app.tests.helpers import FakeBackend
+
+# Nothing listens here: the backend is down
+DOWN_URL = 'http://127.0.0.1:9/api/events'
+
+_spool_root = None
+
+
+def setUpModule():
+    # Sender threads run until the process exits, so their spools outlive each test
+    global _spool_root
+    _spool_root = tempfile.TemporaryDirectory()
+
+
+def tearDownModule():
+    _spool_root.cleanup()
+
+
+def make_event(index, event_type='comment_posted'):
+    return {
+        'event_id': f'evt_{index}',
+        'account_id': 'acc_1',
+        'event_type': event_type,
+        'severity': 'info',
+        'source': 'automation_worker',
+        'occurred_at': '2026-01-01T00:00:00Z',
+        'payload': {'index': index},
+    }
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class EventEmitterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeBackend()
+        self.addCleanup(self.backend.close)
+        self.spool_path = os.path.join(tempfile.mkdtemp(dir=_spool_root.name), 'events.sqlite3')
+        for name, value in [('EVENT_IDLE_POLL', 0.01), ('EVENT_MAX_BACKOFF', 0.05)]:
+            patcher = mock.patch.object(backend, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('builtins.print')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def emitter(self, url=None):
+        return EventEmitter(url=url or self.backend.url, spool_path=self.spool_path, timeout=1)
+
+    def sent_ids(self):
+        return [event['event_id'] for event in self.backend.events]
+
+
+class EventEmitterTests(EventEmitterTestCase):
+
+    def test_emit_does_not_wait_for_the_backend(self):
+        emitter = self.emitter(DOWN_URL)
+
+        started = time.monotonic()
+        for index in range(20):
+            emitter.emit(make_event(index))
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(EventSpool(self.spool_path).count(), 20)
+
+    def test_events_are_sent_in_order_over_one_connection(self):
+        emitter = self.emitter()
+        for index in range(20):
+            emitter.emit(make_event(index))
+
+        self.assertTrue(emitter.flush(timeout=5))
+
+        self.assertEqual(self.sent_ids(), [f'evt_{index}' for index in range(20)])
+        self.assertEqual(len(self.backend.connections), 1)
+        self.assertEqual(EventSpool(self.spool_path).count(), 0)
+
+    def test_flush_gives_up_while_the_backend_is_down(self):
+        emitter = self.emitter(DOWN_URL)
+        emitter.emit(make_event(1))
+
+        started = time.monotonic()
+        self.assertFalse(emitter.flush(timeout=2))
+
+        self.assertLess(time.monotonic() - started, 2.5)
+        self.assertEqual(EventSpool(self.spool_path).count(), 1)
+
+    def test_flush_without_events_returns_at_once(self):
+        self.assertTrue(self.emitter().flush(timeout=0))
+
+    def test_one_sender_per_spool(self):
+        first, second = self.emitter(), self.emitter()
+        for index in range(10):
+            (first if index % 2 else second).emit(make_event(index))
+
+        self.assertTrue(wait_for(lambda: len(self.backend.events) == 10))
+        time.sleep(0.05)
+
+        self.assertEqual(sorted(self.backend.attempts), sorted(f'evt_{index}' for index in range(10)))
+
+
+class EventDeliveryTests(EventEmitterTestCase):
+    """How the sender handles each backend answer."""
+
+    def test_server_errors_are_retried_until_the_event_is_stored(self):
+        self.backend.respond(*[503] * 8)
+        emitter = self.emitter()
+        emitter.emit(make_event(1))
+        emitter.emit(make_event(2))
+
+        self.assertTrue(wait_for(lambda: len(self.backend.events) == 2))
+
+        self.assertEqual(self.sent_ids(), ['evt_1', 'evt_2'])
+        self.assertEqual(self.backend.attempts, ['evt_1'] * 9 + ['evt_2'])
+        self.assertTrue(wait_for(lambda: emitter._backoff == 0))
+
+    def test_sender_backs_off_while_the_backend_fails(self):
+        self.backend.respond(default=500)
+        emitter = self.emitter()
+        emitter.emit(make_event(1))
+
+        self.assertTrue(wait_for(lambda: emitter._backoff == backend.EVENT_MAX_BACKOFF))
+        self.assertEqual(EventSpool(self.spool_path).count(), 1)
+
+        self.backend.respond(default=201)
+        self.assertTrue(wait_for(lambda: self.sent_ids() == ['evt_1']))
+        self.assertTrue(wait_for(lambda: emitter._backoff == 0))
+
+    def test_duplicate_event_counts_as_delivered(self):
+        self.backend.respond(409)
+        emitter = self.emitter()
+        emitter.emit(make_event(1))
+        emitter.emit(make_event(2))
+
+        self.assertTrue(emitter.flush(timeout=5))
+
+        self.assertEqual(self.backend.attempts, ['evt_1', 'evt_2'])
+        self.assertEqual(self.sent_ids(), ['evt_2'])
+
+    def test_rejected_event_is_dropped(self):
+        self.backend.respond(400)
+        emitter = self.emitter()
+        emitter.emit(make_event(1))
+        emitter.emit(make_event(2))
+
+        self.assertTrue(emitter.flush(timeout=5))
+
+        self.assertEqual(self.backend.attempts, ['evt_1', 'evt_2'])
+        self.assertEqual(self.sent_ids(), ['evt_2'])
+
+    def test_unreachable_backend_keeps_events_until_it_is_back(self):
+        emitter = self.emitter(DOWN_URL)
+        for index in range(3):
+            emitter.emit(make_event(index))
+        self.assertFalse(emitter.flush(timeout=0.5))
+
+        emitter.url = self.backend.url
+
+        self.assertTrue(wait_for(lambda: len(self.backend.events) == 3))
+        self.assertEqual(self.sent_ids(), ['evt_0', 'evt_1', 'evt_2'])
+
+
+class SpoolDrainTests(EventEmitterTestCase):
+    """Events left in the spool (e.g. by a process that exited) are sent by the next sender."""
+
+    def test_leftover_events_are_drained_in_order(self):
+        count = backend.EVENT_SEND_BATCH * 2 + 7
+        spool = EventSpool(self.spool_path)
+        for index in range(count):
+            spool.append(make_event(index))
+
+        emitter = self.emitter()
+        emitter.emit(make_event(count))
+
+        self.assertTrue(emitter.flush(timeout=10))
+        self.assertEqual(self.sent_ids(), [f'evt_{index}' for index in range(count + 1)])
+        self.assertEqual(spool.count(), 0)
+
+    def test_full_spool_drops_the_oldest_events(self):
+        spool = EventSpool(self.spool_path)
+        for index in range(10):
+            spool.append(make_event(index))
+
+        with mock.patch.object(backend, 'EVENT_SPOOL_MAX_EVENTS', 4):
+            emitter = self.emitter()
+            emitter.emit(make_event(10))
+            self.assertTrue(emitter.flush(timeout=5))
+
+        self.assertEqual(self.sent_ids(), [f'evt_{index}' for index in range(7, 11)])
+        self.assertEqual(emitter.dropped, 7)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from app.integrations.event_spool import EventSpool
+
+
+class EventSpoolTests(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'spool', 'events.sqlite3')
+        self.spool = EventSpool(self.path)
+
+    def test_events_are_read_back_in_append_order(self):
+        for index in range(5):
+            self.spool.append({'event_id': index})
+
+        events = self.spool.peek(3)
+
+        self.assertEqual([data for _, data in events], [{'event_id': 0}, {'event_id': 1}, {'event_id': 2}])
+        self.assertEqual(self.spool.count(), 5)
+
+    def test_delete_through_removes_sent_events(self):
+        for index in range(5):
+            self.spool.append({'event_id': index})
+        seq, _ = self.spool.peek(2)[-1]
+
+        self.spool.delete_through(seq)
+
+        self.assertEqual([data['event_id'] for _, data in self.spool.peek(10)], [2, 3, 4])
+
+    def test_events_survive_a_restart(self):
+        self.spool.append({'event_id': 'kept'})
+
+        reopened = EventSpool(self.path)
+
+        self.assertEqual([data for _, data in reopened.peek(10)], [{'event_id': 'kept'}])
+
+    def test_trim_drops_the_oldest_events(self):
+        for index in range(10):
+            self.spool.append({'event_id': index})
+
+        self.assertEqual(self.spool.trim(3), 7)
+
+        self.assertEqual([data['event_id'] for _, data in self.spool.peek(10)], [7, 8, 9])
+        self.assertEqual(self.spool.trim(3), 0)
+
+    def test_concurrent_appends_are_all_kept(self):
+        def append_many(thread_index):
+            for index in range(50):
+                self.spool.append({'thread': thread_index, 'index': index})
+
+        threads = [threading.Thread(target=append_many, args=(thread_index,)) for thread_index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        events = [data for _, data in self.spool.peek(1000)]
+        self.assertEqual(len(events), 200)
+        for thread_index in range(4):
+            # Each writer's events keep their order
+            own = [event['index'] for event in events if event['thread'] == thread_index]
+            self.assertEqual(own, list(range(50)))
@@ -6,6 +6,9 @@ from django.urls import reverse, path
 from django.shortcuts import redirect
 from django.contrib import messages
 from .models import SocialAccount
+from .services.cookie_service import CookieService
+from .services.cookie_pool import CookiePool
+from .tasks import validate_cookies
 from .platforms.instagram import InstagramBot
 from .platforms.linkedin import LinkedInBot
 import threading
@@ -19,6 +22,8 @@ active_login_account = None
 def mark_logged_out(modeladmin, request, queryset):
     """Manually mark accounts as logged out"""
     count = queryset.update(logged_in=False)
+    if CookiePool.is_enabled():
+        CookiePool.invalidate(queryset.values_list("platform", flat=True))
     modeladmin.message_user(request, f"Marked {count} account(s) as logged out")
 
 
@@ -26,7 +31,13 @@ def mark_logged_out(modeladmin, request, queryset):
 def release_cookie_action(modeladmin, request, queryset):
     """Manually release cookies by marking them as not in use"""
     # Update all selected cookies to not in use
+    platform_codes = set(queryset.filter(logged_in=True).values_list("platform", flat=True))
+    if CookiePool.is_enabled():
+        CookiePool.forget_leases(queryset)
     updated = queryset.update(in_use=False, last_used_at=timezone.now())
+    # Wake jobs parked while waiting for a cookie on these platforms
+    for platform_code in platform_codes:
+        CookieService.notify_cookie_available(platform_code)
     modeladmin.message_user(
         request, 
         f"Released {updated} cookie(s) - marked as available", 
@@ -34,6 +45,20 @@ def release_cookie_action(modeladmin, request, queryset):
     )
 
 
+@admin.action(description="✅ Validate Cookies (bulk)")
+def validate_cookies_action(modeladmin, request, queryset):
+    """Queue validation of the selected idle logged-in cookies; results are recorded by the worker"""
+    # Cookies in use are skipped: a probe would open a second session on a job's cookie
+    account_ids = list(queryset.filter(logged_in=True, in_use=False).values_list("id", flat=True))
+    skipped = queryset.count() - len(account_ids)
+    if account_ids:
+        validate_cookies.delay(account_ids)
+    message = f"Queued validation of {len(account_ids)} cookie(s)"
+    if skipped:
+        message += f", {skipped} skipped (logged out or in use)"
+    modeladmin.message_user(request, message, messages.SUCCESS if account_ids else messages.WARNING)
+
+
 @admin.register(SocialAccount)
 class SocialAccountAdmin(admin.ModelAdmin):
     list_display = [
@@ -49,7 +74,7 @@ class SocialAccountAdmin(admin.ModelAdmin):
     list_filter = ["platform", "logged_in", "in_use", "created_at"]
     search_fields = ["username"]
     readonly_fields = ["logged_in", "last_login", "in_use", "last_used_at", "consecutive_failures", "failure_reason", "created_at", "updated_at"]
-    actions = [mark_logged_out, release_cookie_action]
+    actions = [mark_logged_out, release_cookie_action, validate_cookies_action]
 
     fieldsets = (
         ("Account Information", {"fields": ("platform", "username", "password")}),
@@ -12,6 +12,12 @@ class BotsConfig(AppConfig):
         """
         import sys
         import os
+        from django.db.models.signals import post_save
+        from bots.models import SocialAccount
+        from bots.services.cookie_pool import resync_pool_on_save
+        
+        # Logins and edits change accounts outside the pool; reload it on next use
+        post_save.connect(resync_pool_on_save, sender=SocialAccount, dispatch_uid="cookie_pool_resync")
         
         # Only initialize for runserver/production, skip for management commands
         is_management_command = len(sys.argv) > 1 and sys.argv[1] not in ['runserver', 'test']
@@ -12,6 +12,7 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from bots.services.cookie_service import CookieService
+from bots.services.validation_cache import ValidationCache
 from bots.services.logger import (
     traced,
     add_span_attributes,
@@ -258,6 +259,7 @@ def health_check(request):
     """
     return JsonResponse({
         'status': 'healthy',
-        'service': 'cookie-provider-webhook'
+        'service': 'cookie-provider-webhook',
+        'validation_cache': ValidationCache.stats(),
     })
 
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.9 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bots', '0006_socialaccount_last_validated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socialaccount',
+            name='lease_token',
+            field=models.UUIDField(blank=True, editable=False, help_text='Token of the allocation lease that last claimed this cookie', null=True),
+        ),
+    ]
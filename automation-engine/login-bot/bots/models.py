@@ -32,6 +32,9 @@ class SocialAccount(models.Model):
     last_validated_at = models.DateTimeField(
         null=True, blank=True, help_text="Last time this cookie was validated before allocation"
     )
+    lease_token = models.UUIDField(
+        null=True, blank=True, editable=False, help_text="Token of the allocation lease that last claimed this cookie"
+    )
     consecutive_failures = models.IntegerField(
         default=0, help_text="Number of consecutive failures for this cookie"
     )
@@ -63,14 +66,15 @@ class SocialAccount(models.Model):
         self.cookies_updated_at = timezone.now()
         self.save(update_fields=["cookies", "cookies_updated_at"])
 
-    def mark_logged_out(self, reason=None):
+    def mark_logged_out(self, reason=None, commit=True):
         """Mark account as logged out"""
         self.logged_in = False
         if reason:
             self.failure_reason = reason
-        self.save(update_fields=["logged_in", "failure_reason"])
+        if commit:
+            self.save(update_fields=["logged_in", "failure_reason"])
     
-    def increment_failures(self, reason=None):
+    def increment_failures(self, reason=None, commit=True):
         """Increment consecutive failures and potentially ban the account"""
         self.consecutive_failures += 1
         if reason:
@@ -78,16 +82,18 @@ class SocialAccount(models.Model):
         
         # Ban after 3 consecutive failures
         if self.consecutive_failures >= 3:
-            self.mark_logged_out(reason=f"Banned after 3 failures: {reason}")
+            self.mark_logged_out(reason=f"Banned after 3 failures: {reason}", commit=commit)
         
-        self.save(update_fields=["consecutive_failures", "failure_reason"])
+        if commit:
+            self.save(update_fields=["consecutive_failures", "failure_reason"])
     
-    def reset_failures(self):
+    def reset_failures(self, commit=True):
         """Reset consecutive failures counter on successful use"""
         if self.consecutive_failures > 0:
             self.consecutive_failures = 0
             self.failure_reason = None
-            self.save(update_fields=["consecutive_failures", "failure_reason"])
+            if commit:
+                self.save(update_fields=["consecutive_failures", "failure_reason"])
 
     def __str__(self):
         return f"[{self.get_platform_display()}] {self.username}"
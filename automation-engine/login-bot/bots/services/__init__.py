@@ -4,6 +4,11 @@ Service layer for business logic.
 Import services explicitly where needed to avoid side-effect imports:
     from bots.services.cookie_service import CookieService
     from bots.services.cookie_validator import CookieValidator
+    from bots.services.cookie_waitlist import CookieWaitlist
+    from bots.services.cookie_pool import CookiePool
+    from bots.services.validation_cache import ValidationCache
+    from bots.services.cookie_prober import CookieProber
+    from bots.services.async_validator import AsyncCookieValidator
 """
 
-__all__ = ['CookieService', 'CookieValidator']
+__all__ = ['CookieService', 'CookieValidator', 'CookieWaitlist', 'CookiePool', 'ValidationCache', 'CookieProber', 'AsyncCookieValidator']
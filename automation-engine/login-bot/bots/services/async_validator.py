@@ -0,0 +1,205 @@
+"""
+Async Cookie Validator: Validates many cookies concurrently.
+
+Used for bulk validation (background prober, admin "Validate Cookies" action)
+where CookieValidator's one-request-at-a-time calls and blocking backoff
+sleeps would make a run take minutes.
+
+- An asyncio semaphore bounds how many validations are in flight
+- Backoff waits are asyncio sleeps, so a retrying cookie holds no thread
+- HTTP calls run on a thread pool sized to the concurrency, through one
+  requests.Session per sticky proxy session (cookie-{cookie_id}), or a single
+  shared Session without a proxy, so connections are reused across requests
+- Results keep CookieValidator's (is_valid, failure_reason, comment_count)
+  contract, including its failure reasons and the validation cache
+"""
+import asyncio
+import contextvars
+import functools
+import http.cookiejar
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bots.services import json_codec
+from bots.services.cookie_validator import CookieValidator
+from bots.services.validation_cache import ValidationCache
+from bots.services.logger import (
+    traced_method,
+    add_span_attributes,
+    add_span_event,
+    log_info,
+    log_warning,
+)
+
+
+@dataclass
+class ValidationRequest:
+    """One cookie to validate."""
+    cookie_id: int
+    cookies: str
+    csrf_token: str
+    platform: str
+    post_url: Optional[str] = None
+
+
+class AsyncCookieValidator:
+    """
+    Concurrent validation engine for a batch of cookies.
+
+    Use validate_many() from synchronous code (Celery tasks, admin actions).
+    """
+
+    DEFAULT_CONCURRENCY = 50
+    RETRY_DELAYS = [2, 4, 8]  # Same backoff as CookieValidator
+
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY):
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='cookie-validate')
+        self._sessions: Dict[str, requests.Session] = {}
+
+    @classmethod
+    @traced_method("async_validator.validate_many")
+    def validate_many(
+        cls,
+        batch: Iterable[ValidationRequest],
+        concurrency: int = DEFAULT_CONCURRENCY
+    ) -> Dict[int, Tuple[bool, str, int]]:
+        """
+        Validate a batch of cookies concurrently.
+
+        Args:
+            batch: Cookies to validate
+            concurrency: Maximum validations in flight
+
+        Returns:
+            Dictionary of cookie_id -> (is_valid, failure_reason, comment_count)
+        """
+        batch = list(batch)
+        if not batch:
+            return {}
+
+        add_span_attributes(validation_batch_size=len(batch), validation_concurrency=concurrency)
+        return asyncio.run(cls(concurrency)._run(batch))
+
+    async def _run(self, batch) -> Dict[int, Tuple[bool, str, int]]:
+        try:
+            results = await asyncio.gather(*(self._validate(request) for request in batch))
+        finally:
+            self._executor.shutdown(wait=False)
+            for session in self._sessions.values():
+                session.close()
+
+        valid_count = sum(1 for is_valid, _, _ in results if is_valid)
+        add_span_event("bulk_validation_finished", {"cookies": len(batch), "valid": valid_count})
+        log_info(
+            "Bulk cookie validation finished",
+            cookies=len(batch),
+            valid=valid_count,
+            invalid=len(batch) - valid_count,
+            sessions=len(self._sessions)
+        )
+        return {request.cookie_id: result for request, result in zip(batch, results)}
+
+    def _session_for(self, proxies: Optional[dict], cookie_id: int) -> requests.Session:
+        """Reusable Session for the cookie's sticky proxy session (shared when no proxy is set)."""
+        key = f"cookie-{cookie_id}" if proxies else "direct"
+        session = self._sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            if proxies:
+                session.proxies.update(proxies)
+            # Each request carries its own Cookie header; never let one account's
+            # Set-Cookie responses leak into another account's requests
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency if not proxies else 1)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._sessions[key] = session
+        return session
+
+    async def _in_thread(self, fn, *args, **kwargs):
+        # Carry the current trace context into the worker thread
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    async def _validate(self, request: ValidationRequest) -> Tuple[bool, str, int]:
+        async with self._semaphore:
+            try:
+                if request.platform.lower() == 'instagram':
+                    return await self._validate_instagram(request)
+                # Other platforms reuse the sync validator, off the event loop so a
+                # blocking call (or its backoff sleeps) never stalls other validations
+                return await self._in_thread(
+                    CookieValidator.validate,
+                    cookies=request.cookies,
+                    csrf_token=request.csrf_token,
+                    platform=request.platform,
+                    cookie_id=request.cookie_id,
+                    post_url=request.post_url
+                )
+            except Exception as e:
+                return CookieValidator.failure_from_exception(e, request.cookie_id)
+
+    async def _validate_instagram(self, request: ValidationRequest) -> Tuple[bool, str, int]:
+        cookie_id = request.cookie_id
+        shortcode = CookieValidator._extract_shortcode_from_url(request.post_url) if request.post_url else None
+        if not shortcode:
+            return (False, "invalid_shortcode", 0)
+
+        cached_comment_count = ValidationCache.get(cookie_id, shortcode)
+        if cached_comment_count is not None:
+            return (True, "", cached_comment_count)
+
+        proxies = CookieValidator._get_proxies(cookie_id)
+        session = self._session_for(proxies, cookie_id)
+        headers = CookieValidator._instagram_headers(request.cookies, request.csrf_token)
+        params = CookieValidator._media_info_params(shortcode)
+
+        for attempt in range(len(self.RETRY_DELAYS) + 1):
+            if attempt > 0:
+                await asyncio.sleep(self.RETRY_DELAYS[attempt - 1])
+
+            try:
+                response = await self._in_thread(
+                    session.get,
+                    CookieValidator.INSTAGRAM_GRAPHQL_URL,
+                    params=params,
+                    headers=headers,
+                    timeout=CookieValidator.VALIDATION_TIMEOUT
+                )
+                response.raise_for_status()
+                data = json_codec.loads(response.content)
+                comment_count = CookieValidator._parse_media_info(data)
+            except requests.exceptions.HTTPError as e:
+                # HTTP errors are final, same as CookieValidator
+                return CookieValidator.failure_from_exception(e, cookie_id)
+            except requests.exceptions.RequestException as e:
+                if attempt == len(self.RETRY_DELAYS):
+                    return CookieValidator.failure_from_exception(e, cookie_id)
+                log_warning(
+                    f"Validation attempt {attempt + 1} failed with network error",
+                    cookie_id=cookie_id,
+                    error=str(e),
+                    attempt=attempt + 1
+                )
+                continue
+
+            if comment_count is not None:
+                CookieValidator.remember_media_id(shortcode, data)
+                ValidationCache.store(cookie_id, shortcode, comment_count)
+                return (True, "", comment_count)
+
+            log_warning(
+                "Instagram GraphQL validation: unexpected response structure, will retry",
+                cookie_id=cookie_id,
+                shortcode=shortcode,
+                attempt=attempt + 1
+            )
+
+        return (False, "max_retries_exceeded", 0)
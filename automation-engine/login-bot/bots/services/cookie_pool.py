@@ -0,0 +1,514 @@
+"""
+Cookie Pool: Redis-backed hot pool of available cookies with DB write-behind.
+
+When COOKIE_POOL_ENABLED is set, allocation and release no longer touch
+Postgres on the hot path:
+- The LRU order of available cookies lives in a Redis sorted set per platform
+  (score = last_used_at epoch, 0 for never used), so allocation is one atomic pop
+- Lease state changes (leased, validated, invalidated, released) are appended to
+  a write-behind list and applied to SocialAccount in batches by
+  flush_cookie_pool_writes (Celery beat)
+
+Redis layout:
+    cookie_pool:{platform_code}:available   ZSET  account id -> last_used_at epoch
+    cookie_pool:{platform_code}:leased      SET   account ids currently allocated
+    cookie_pool:{platform_code}:loaded      STR   present while the pool is in sync with Postgres
+    cookie_pool:account:{id}                HASH  username, platform, cookies, timestamps, failures, lease_token
+    cookie_pool:writeback                   LIST  JSON state changes waiting to be flushed
+
+The pool is (re)loaded from Postgres whenever the loaded marker is missing:
+on first use, every COOKIE_POOL_RESYNC_INTERVAL seconds, and after account
+changes made outside the pool (logins, admin actions).
+"""
+import json
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from typing import Optional, Iterable, Set
+
+from django.conf import settings
+from django.db import transaction
+
+from bots.models import SocialAccount
+from bots.services.redis_client import get_redis
+from bots.services.logger import (
+    add_span_event,
+    log_info,
+    log_warning,
+    log_error,
+    log_debug,
+)
+
+
+# Accounts are banned (logged out) at this many consecutive failures, see SocialAccount.increment_failures
+BAN_THRESHOLD = 3
+
+# Pop the least recently used cookie and record the lease atomically
+_LEASE_SCRIPT = """
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then
+    return nil
+end
+local account_id = popped[1]
+redis.call('SADD', KEYS[2], account_id)
+redis.call('HSET', ARGV[2] .. account_id, 'lease_token', ARGV[3])
+redis.call('RPUSH', KEYS[3], cjson.encode({id = tonumber(account_id), op = 'leased', at = tonumber(ARGV[1])}))
+return account_id
+"""
+
+# Stamp a successful validation, only if this lease is still held (compare-and-set on the token)
+_VALIDATED_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 0 or redis.call('HGET', KEYS[2], 'lease_token') ~= ARGV[4] then
+    return 0
+end
+redis.call('HSET', KEYS[2], 'last_validated_at', ARGV[2])
+redis.call('RPUSH', KEYS[3], ARGV[3])
+return 1
+"""
+
+# End a lease: success / failure (returned to the pool unless banned) or invalid (dropped)
+# Failures clear last_validated_at so the cookie is re-validated before its next lease
+# ARGV[6] is the lease token to match ('' matches any lease of the cookie)
+# Returns the new consecutive failure count, or -1 if the lease was not held
+_RETURN_SCRIPT = """
+if ARGV[6] ~= '' and redis.call('HGET', KEYS[3], 'lease_token') ~= ARGV[6] then
+    return -1
+end
+if redis.call('SREM', KEYS[1], ARGV[1]) == 0 then
+    return -1
+end
+local failures = 0
+if ARGV[3] == 'success' then
+    redis.call('HSET', KEYS[3], 'consecutive_failures', 0)
+else
+    failures = redis.call('HINCRBY', KEYS[3], 'consecutive_failures', 1)
+    redis.call('HSET', KEYS[3], 'last_validated_at', '')
+end
+if ARGV[3] ~= 'invalid' then
+    redis.call('HSET', KEYS[3], 'last_used_at', ARGV[2])
+    if failures < tonumber(ARGV[5]) then
+        redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+    end
+end
+redis.call('RPUSH', KEYS[4], ARGV[4])
+return failures
+"""
+
+
+# Swap a reloaded available set in. Runs atomically with lease/release, so
+# cookies leased since the database snapshot are left out, and cookies returned
+# to the pool since then are kept (if still eligible).
+# KEYS: staging zset, available zset, leased set, eligible set, loaded marker
+# ARGV: loaded marker value, marker TTL
+_SWAP_AVAILABLE_SCRIPT = """
+local current = redis.call('ZRANGE', KEYS[2], 0, -1, 'WITHSCORES')
+for i = 1, #current, 2 do
+    if redis.call('SISMEMBER', KEYS[4], current[i]) == 1 then
+        redis.call('ZADD', KEYS[1], 'NX', current[i + 1], current[i])
+    end
+end
+for _, account_id in ipairs(redis.call('SMEMBERS', KEYS[3])) do
+    redis.call('ZREM', KEYS[1], account_id)
+end
+local available = redis.call('ZCARD', KEYS[1])
+if available > 0 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+else
+    redis.call('DEL', KEYS[1], KEYS[2])
+end
+redis.call('DEL', KEYS[4])
+redis.call('SET', KEYS[5], ARGV[1], 'EX', ARGV[2])
+return available
+"""
+
+
+def _to_epoch(value: Optional[datetime]) -> str:
+    return str(value.timestamp()) if value else ''
+
+
+def _from_epoch(value) -> Optional[datetime]:
+    if value in (None, ''):
+        return None
+    return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+
+
+class CookiePool:
+    """
+    Redis hot pool of available cookies, one per platform code.
+
+    Lease methods mirror CookieService's two-phase lease (claim, then commit
+    or roll back after validation) but only touch Redis. Postgres catches up
+    through flush_writes().
+    """
+
+    KEY_PREFIX = 'cookie_pool'
+    WRITEBACK_KEY = f'{KEY_PREFIX}:writeback'
+
+    # Fields flush_writes() may change on SocialAccount
+    FLUSH_FIELDS = [
+        'in_use',
+        'last_used_at',
+        'last_validated_at',
+        'logged_in',
+        'consecutive_failures',
+        'failure_reason',
+    ]
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return settings.COOKIE_POOL_ENABLED
+
+    @classmethod
+    def _available_key(cls, platform_code: str) -> str:
+        return f'{cls.KEY_PREFIX}:{platform_code}:available'
+
+    @classmethod
+    def _leased_key(cls, platform_code: str) -> str:
+        return f'{cls.KEY_PREFIX}:{platform_code}:leased'
+
+    @classmethod
+    def _loaded_key(cls, platform_code: str) -> str:
+        return f'{cls.KEY_PREFIX}:{platform_code}:loaded'
+
+    @classmethod
+    def _account_key(cls, account_id: int) -> str:
+        return f'{cls.KEY_PREFIX}:account:{account_id}'
+
+    @classmethod
+    def ensure_loaded(cls, platform_code: str) -> None:
+        """
+        Load the platform's available cookies from Postgres if the pool is not in sync.
+
+        Pending write-behind changes are flushed first, and the new available
+        set is swapped in by a script that drops every cookie leased through
+        the pool at that moment, so a reload cannot hand out a cookie twice
+        even while lease() runs concurrently. If the flush fails the reload is
+        skipped and the current pool keeps serving; the next call retries.
+        """
+        client = get_redis()
+        loaded_key = cls._loaded_key(platform_code)
+        if client.exists(loaded_key):
+            return
+
+        load_lock = client.lock(f'{cls.KEY_PREFIX}:{platform_code}:load_lock', timeout=30, blocking_timeout=30)
+        if not load_lock.acquire():
+            log_warning("Cookie pool reload still running elsewhere, using the current pool", platform_code=platform_code)
+            return
+
+        try:
+            if client.exists(loaded_key):
+                return
+
+            if not cls._drain_writes():
+                return
+
+            accounts = SocialAccount.objects.filter(
+                platform=platform_code,
+                logged_in=True,
+            )
+
+            available_key = cls._available_key(platform_code)
+            staging_key = f'{available_key}:staging'
+            eligible_key = f'{available_key}:eligible'
+            pipe = client.pipeline(transaction=True)
+            pipe.delete(staging_key, eligible_key)
+            for account in accounts:
+                pipe.hset(cls._account_key(account.id), mapping={
+                    'username': account.username,
+                    'platform': account.platform,
+                    'cookies': json.dumps(account.cookies or []),
+                    'last_used_at': _to_epoch(account.last_used_at),
+                    'last_validated_at': _to_epoch(account.last_validated_at),
+                    'consecutive_failures': account.consecutive_failures,
+                })
+                if account.consecutive_failures >= BAN_THRESHOLD:
+                    continue
+                pipe.sadd(eligible_key, account.id)
+                if account.in_use:
+                    continue
+                score = account.last_used_at.timestamp() if account.last_used_at else 0
+                pipe.zadd(staging_key, {account.id: score})
+            pipe.execute()
+
+            available_count = client.eval(
+                _SWAP_AVAILABLE_SCRIPT, 5,
+                staging_key,
+                available_key,
+                cls._leased_key(platform_code),
+                eligible_key,
+                loaded_key,
+                int(time.time()), settings.COOKIE_POOL_RESYNC_INTERVAL,
+            )
+            leased_count = client.scard(cls._leased_key(platform_code))
+        finally:
+            load_lock.release()
+
+        add_span_event("cookie_pool_loaded", {"platform_code": platform_code, "available": available_count})
+        log_info(
+            "Cookie pool loaded from database",
+            platform_code=platform_code,
+            available=available_count,
+            leased=leased_count
+        )
+
+    @classmethod
+    def _drain_writes(cls) -> bool:
+        """
+        Flush the write-behind list until it is empty (or only holds changes
+        queued during the drain). Never raises.
+
+        Returns:
+            False if a flush failed
+        """
+        batch_size = settings.COOKIE_POOL_FLUSH_BATCH_SIZE
+        try:
+            while cls.flush_writes(batch_size) >= batch_size:
+                pass
+        except Exception as e:
+            log_warning("Skipping cookie pool reload, write-behind flush failed", error=str(e))
+            return False
+        return True
+
+    @classmethod
+    def invalidate(cls, platform_codes: Iterable[str]) -> None:
+        """Force a reload from Postgres on next use (after changes made outside the pool)."""
+        keys = [cls._loaded_key(platform_code) for platform_code in set(platform_codes)]
+        if keys:
+            get_redis().delete(*keys)
+
+    @classmethod
+    def forget_leases(cls, accounts: Iterable[SocialAccount]) -> None:
+        """
+        Drop pool leases for accounts about to be released outside the pool (admin action).
+
+        Pending changes are flushed first so a queued 'leased' event cannot
+        flip in_use back on after the caller's own update.
+        """
+        cls.flush_writes()
+        client = get_redis()
+        platform_codes = set()
+        pipe = client.pipeline(transaction=True)
+        for account in accounts:
+            pipe.srem(cls._leased_key(account.platform), account.id)
+            platform_codes.add(account.platform)
+        pipe.execute()
+        cls.invalidate(platform_codes)
+
+    @classmethod
+    def leased_ids(cls, platform_code: str) -> Set[int]:
+        """Ids of the platform's cookies currently leased through the pool (in_use may not be flushed yet)."""
+        return {int(account_id) for account_id in get_redis().smembers(cls._leased_key(platform_code))}
+
+    @classmethod
+    def is_leased(cls, account: SocialAccount) -> bool:
+        """Whether the account is currently leased through the pool."""
+        return bool(get_redis().sismember(cls._leased_key(account.platform), account.id))
+
+    @classmethod
+    def has_available(cls, platform_code: str) -> bool:
+        """Whether the platform has a cookie ready to lease."""
+        cls.ensure_loaded(platform_code)
+        return get_redis().zcard(cls._available_key(platform_code)) > 0
+
+    @classmethod
+    def lease(cls, platform_code: str) -> Optional[SocialAccount]:
+        """
+        Lease the least recently used available cookie.
+
+        Returns:
+            Unsaved SocialAccount carrying the pool's copy of the account data,
+            or None if no cookie is available
+        """
+        cls.ensure_loaded(platform_code)
+        client = get_redis()
+        lease_token = str(uuid.uuid4())
+        account_id = client.eval(
+            _LEASE_SCRIPT, 3,
+            cls._available_key(platform_code),
+            cls._leased_key(platform_code),
+            cls.WRITEBACK_KEY,
+            time.time(), cls._account_key(''), lease_token,
+        )
+        if account_id is None:
+            return None
+
+        data = client.hgetall(cls._account_key(account_id))
+        return SocialAccount(
+            id=int(account_id),
+            platform=data.get('platform', platform_code),
+            username=data.get('username', ''),
+            cookies=json.loads(data.get('cookies') or '[]'),
+            logged_in=True,
+            in_use=True,
+            last_used_at=_from_epoch(data.get('last_used_at')),
+            last_validated_at=_from_epoch(data.get('last_validated_at')),
+            consecutive_failures=int(data.get('consecutive_failures') or 0),
+            lease_token=uuid.UUID(lease_token),
+        )
+
+    @classmethod
+    def commit_lease(cls, account: SocialAccount, revalidated: bool = True) -> bool:
+        """Stamp a successful validation on a pool lease (compare-and-set on the lease token)."""
+        if not revalidated:
+            client = get_redis()
+            return (
+                bool(client.sismember(cls._leased_key(account.platform), account.id))
+                and client.hget(cls._account_key(account.id), 'lease_token') == str(account.lease_token)
+            )
+
+        now = time.time()
+        event = json.dumps({'id': account.id, 'op': 'validated', 'at': now})
+        committed = get_redis().eval(
+            _VALIDATED_SCRIPT, 3,
+            cls._leased_key(account.platform),
+            cls._account_key(account.id),
+            cls.WRITEBACK_KEY,
+            account.id, now, event, str(account.lease_token),
+        )
+        if committed:
+            account.last_validated_at = _from_epoch(now)
+        return bool(committed)
+
+    @classmethod
+    def rollback_lease(cls, account: SocialAccount, failure_reason: str) -> bool:
+        """Drop a pool lease whose cookie failed validation (the account is logged out on flush)."""
+        reason = f"Pre-validation failed: {failure_reason}"
+        failures = cls._end_lease(account.id, account.platform, 'invalid', reason, lease_token=account.lease_token)
+        if failures < 0:
+            return False
+
+        account.logged_in = False
+        account.in_use = False
+        account.consecutive_failures = failures
+        account.failure_reason = reason
+        return True
+
+    @classmethod
+    def release(cls, cookie_id: int, success: bool, failure_reason: Optional[str] = None) -> Optional[SocialAccount]:
+        """
+        Return a pool lease to the available set and queue the DB update.
+
+        Returns:
+            Unsaved SocialAccount with the post-release state, or None if the
+            cookie is not leased through the pool (caller falls back to Postgres)
+        """
+        client = get_redis()
+        data = client.hgetall(cls._account_key(cookie_id))
+        if not data:
+            return None
+
+        platform_code = data['platform']
+        failures = cls._end_lease(cookie_id, platform_code, 'success' if success else 'failure', failure_reason)
+        if failures < 0:
+            return None
+
+        return SocialAccount(
+            id=cookie_id,
+            platform=platform_code,
+            username=data.get('username', ''),
+            logged_in=failures < BAN_THRESHOLD,
+            in_use=False,
+            consecutive_failures=failures,
+            failure_reason=failure_reason,
+        )
+
+    @classmethod
+    def _end_lease(
+        cls,
+        account_id: int,
+        platform_code: str,
+        mode: str,
+        reason: Optional[str],
+        lease_token: Optional[uuid.UUID] = None,
+    ) -> int:
+        now = time.time()
+        op = 'invalidated' if mode == 'invalid' else 'released'
+        event = json.dumps({
+            'id': account_id,
+            'op': op,
+            'at': now,
+            'success': mode == 'success',
+            'reason': reason,
+        })
+        return int(get_redis().eval(
+            _RETURN_SCRIPT, 4,
+            cls._leased_key(platform_code),
+            cls._available_key(platform_code),
+            cls._account_key(account_id),
+            cls.WRITEBACK_KEY,
+            account_id, now, mode, event, BAN_THRESHOLD, str(lease_token or ''),
+        ))
+
+    @classmethod
+    def _apply_event(cls, account: SocialAccount, event: dict) -> None:
+        """Replay one pool state change onto a SocialAccount without saving it."""
+        op = event['op']
+        at = _from_epoch(event.get('at'))
+
+        if op == 'leased':
+            account.in_use = True
+        elif op == 'validated':
+            account.last_validated_at = at
+        elif op == 'invalidated':
+            account.logged_in = False
+            account.in_use = False
+            account.last_validated_at = None
+            account.increment_failures(reason=event.get('reason'), commit=False)
+        elif op == 'released':
+            account.in_use = False
+            account.last_used_at = at
+            if event.get('success'):
+                account.reset_failures(commit=False)
+            else:
+                account.last_validated_at = None
+                account.increment_failures(reason=event.get('reason'), commit=False)
+
+    @classmethod
+    def flush_writes(cls, batch_size: Optional[int] = None) -> int:
+        """
+        Apply queued pool state changes to SocialAccount in one bulk update.
+
+        Events are replayed in order per account, so several leases of the
+        same cookie between flushes collapse into a single row write.
+
+        Returns:
+            Number of state changes applied
+        """
+        batch_size = batch_size or settings.COOKIE_POOL_FLUSH_BATCH_SIZE
+        client = get_redis()
+        raw_events = client.lpop(cls.WRITEBACK_KEY, batch_size)
+        if not raw_events:
+            return 0
+
+        events = [json.loads(raw_event) for raw_event in raw_events]
+        try:
+            with transaction.atomic():
+                accounts = SocialAccount.objects.select_for_update().in_bulk({event['id'] for event in events})
+                for event in events:
+                    account = accounts.get(event['id'])
+                    if account is None:
+                        log_debug("Skipping pool event for deleted account", cookie_id=event['id'], op=event['op'])
+                        continue
+                    cls._apply_event(account, event)
+
+                SocialAccount.objects.bulk_update(list(accounts.values()), cls.FLUSH_FIELDS)
+        except Exception as e:
+            # Put the batch back in front so nothing is lost; next flush retries it
+            client.lpush(cls.WRITEBACK_KEY, *reversed(raw_events))
+            log_error("Cookie pool write-behind flush failed", error=e, events=len(events))
+            raise
+
+        add_span_event("cookie_pool_flushed", {"events": len(events), "accounts": len(accounts)})
+        log_debug("Cookie pool write-behind flushed", events=len(events), accounts=len(accounts))
+        return len(events)
+
+
+def resync_pool_on_save(sender, instance: SocialAccount, **kwargs) -> None:
+    """post_save receiver: an account saved outside the pool invalidates its platform's pool."""
+    if not CookiePool.is_enabled():
+        return
+    try:
+        CookiePool.invalidate([instance.platform])
+    except Exception as e:
+        # Pool resyncs on its own after COOKIE_POOL_RESYNC_INTERVAL
+        log_warning("Failed to invalidate cookie pool after account save", cookie_id=instance.id, error=str(e))
@@ -0,0 +1,234 @@
+"""
+Cookie Prober: Validates idle cookies in the background.
+
+Run periodically by the probe_idle_cookies beat task so that allocation finds
+cookies that were validated recently and can skip inline validation (see
+COOKIE_VALIDATION_FRESHNESS). Dead cookies are found here instead of on a
+job's critical path.
+
+Validations run concurrently through AsyncCookieValidator; all database
+writes happen on the calling thread. Cookies leased at probe time (in_use in
+Postgres, or leased through the Redis CookiePool whose in_use reaches Postgres
+late) are never probed or written to, so a probe cannot open a second session
+on a cookie a job is using.
+"""
+from datetime import timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from bots.models import SocialAccount
+from bots.services.cookie_pool import CookiePool
+from bots.services.cookie_service import CookieService
+from bots.services.async_validator import AsyncCookieValidator, ValidationRequest
+from bots.services.logger import (
+    traced_method,
+    add_span_attributes,
+    add_span_event,
+    log_info,
+    log_warning,
+)
+
+
+class CookieProber:
+    """
+    Background validation of idle (logged_in=True, in_use=False) cookies.
+
+    Probe results are recorded on the account:
+    - Valid: last_validated_at stamped, consecutive failures reset
+    - Invalid: consecutive failure recorded (banned at 3); an expired session
+      is logged out straight away
+    """
+
+    # Failure reasons that mean the session itself is gone, not a transient error
+    FATAL_FAILURES = {'session_expired'}
+
+    @classmethod
+    def _probe_post_url(cls, platform_code: str) -> Optional[str]:
+        # Instagram validation needs a post to look up; other platforms validate the session only
+        if platform_code == 'IG':
+            return settings.COOKIE_PROBE_POST_URL or None
+        return None
+
+    @classmethod
+    def get_due_accounts(cls, limit: int):
+        """
+        Idle logged-in accounts whose validation expires before the next probe run.
+
+        Args:
+            limit: Maximum number of accounts to return
+
+        Returns:
+            Queryset of SocialAccount, never-validated first, then oldest validation first
+        """
+        stale_before = timezone.now() - timedelta(
+            seconds=max(settings.COOKIE_VALIDATION_FRESHNESS - settings.COOKIE_PROBE_INTERVAL, 0)
+        )
+        accounts = (
+            SocialAccount.objects
+            .filter(logged_in=True, in_use=False)
+            .exclude(last_validated_at__gte=stale_before)
+        )
+
+        if not settings.COOKIE_PROBE_POST_URL:
+            accounts = accounts.exclude(platform='IG')
+
+        return cls._exclude_leased(accounts).order_by(F('last_validated_at').asc(nulls_first=True))[:limit]
+
+    @classmethod
+    def _exclude_leased(cls, accounts):
+        # Pool leases reach Postgres in_use late (write-behind), so skip them by id too
+        if not CookiePool.is_enabled():
+            return accounts
+        leased_ids = set()
+        for platform_code in CookieService.PLATFORM_MAP.values():
+            leased_ids |= CookiePool.leased_ids(platform_code)
+        return accounts.exclude(id__in=leased_ids)
+
+    @classmethod
+    @transaction.atomic
+    def record_result(cls, account_id: int, is_valid: bool, failure_reason: str) -> bool:
+        """
+        Store a probe result on the account.
+
+        The row is re-read under lock and skipped if it was logged out or
+        leased in the meantime, so a probe never resurrects a dead cookie or
+        logs out a cookie a job holds. The result is written with a queryset
+        update, which does not fire post_save: the caller invalidates the
+        cookie pool once for the whole batch (see validate_accounts).
+
+        Returns:
+            True if the result was recorded
+        """
+        account = (
+            SocialAccount.objects
+            .select_for_update()
+            .filter(id=account_id, logged_in=True, in_use=False)
+            .first()
+        )
+        if not account or (CookiePool.is_enabled() and CookiePool.is_leased(account)):
+            return False
+
+        if is_valid:
+            account.last_validated_at = timezone.now()
+            account.reset_failures(commit=False)
+        else:
+            reason = f"Probe failed: {failure_reason}"
+            account.increment_failures(reason=reason, commit=False)
+            if failure_reason in cls.FATAL_FAILURES:
+                account.mark_logged_out(reason=reason, commit=False)
+
+        SocialAccount.objects.filter(id=account_id).update(
+            last_validated_at=account.last_validated_at,
+            consecutive_failures=account.consecutive_failures,
+            failure_reason=account.failure_reason,
+            logged_in=account.logged_in,
+        )
+        return True
+
+    @classmethod
+    def validate_accounts(cls, accounts, concurrency: Optional[int] = None) -> Dict[str, int]:
+        """
+        Validate accounts concurrently and record each result.
+
+        Instagram accounts are skipped if COOKIE_PROBE_POST_URL is not set.
+
+        Args:
+            accounts: SocialAccount instances to validate
+            concurrency: Parallel validations (default COOKIE_PROBE_CONCURRENCY)
+
+        Returns:
+            Dictionary with probed/valid/invalid/skipped counts
+        """
+        concurrency = concurrency or settings.COOKIE_PROBE_CONCURRENCY
+        summary = {'probed': 0, 'valid': 0, 'invalid': 0, 'skipped': 0}
+
+        batch = {}
+        for account in accounts:
+            post_url = cls._probe_post_url(account.platform)
+            if account.platform == 'IG' and not post_url:
+                summary['skipped'] += 1
+                continue
+            cookies_string, csrf_token = CookieService.convert_cookies_to_string(account.cookies)
+            batch[account.id] = (account, ValidationRequest(
+                cookie_id=account.id,
+                cookies=cookies_string,
+                csrf_token=csrf_token,
+                platform=CookieService.get_platform_name(account.platform),
+                post_url=post_url
+            ))
+
+        if not batch:
+            return summary
+
+        add_span_event("cookie_probe_started", {"accounts": len(batch), "concurrency": concurrency})
+        results = AsyncCookieValidator.validate_many(
+            (request for _, request in batch.values()),
+            concurrency=concurrency
+        )
+
+        recorded_platforms = set()
+        for cookie_id, (is_valid, failure_reason, _) in results.items():
+            account = batch[cookie_id][0]
+            summary['probed'] += 1
+            summary['valid' if is_valid else 'invalid'] += 1
+            if not cls.record_result(cookie_id, is_valid, failure_reason):
+                continue
+            recorded_platforms.add(account.platform)
+            if not is_valid:
+                log_warning(
+                    "Cookie failed probe",
+                    cookie_id=cookie_id,
+                    username=account.username,
+                    platform=account.get_platform_display(),
+                    failure_reason=failure_reason
+                )
+
+        if recorded_platforms and CookiePool.is_enabled():
+            # One reload per platform picks up the whole batch of results
+            try:
+                CookiePool.invalidate(recorded_platforms)
+            except Exception as e:
+                # Pool resyncs on its own after COOKIE_POOL_RESYNC_INTERVAL
+                log_warning("Failed to invalidate cookie pool after probe", error=str(e))
+
+        add_span_attributes(**{f"probe_{key}": value for key, value in summary.items()})
+        return summary
+
+    @classmethod
+    @traced_method("cookie_prober.validate_account_ids")
+    def validate_account_ids(cls, account_ids) -> Dict[str, int]:
+        """
+        Validate the given cookies, skipping any that are logged out or leased.
+
+        Args:
+            account_ids: SocialAccount ids to validate
+
+        Returns:
+            Dictionary with probed/valid/invalid/skipped counts
+        """
+        accounts = SocialAccount.objects.filter(id__in=account_ids, logged_in=True, in_use=False)
+        summary = cls.validate_accounts(cls._exclude_leased(accounts))
+        log_info("Cookie validation finished", requested=len(account_ids), **summary)
+        return summary
+
+    @classmethod
+    @traced_method("cookie_prober.probe_idle_cookies")
+    def probe_idle_cookies(cls, limit: Optional[int] = None, concurrency: Optional[int] = None) -> Dict[str, int]:
+        """
+        Validate idle cookies that are due, with at most `concurrency` validations in flight.
+
+        Args:
+            limit: Maximum accounts to probe (default COOKIE_PROBE_BATCH_SIZE)
+            concurrency: Parallel validations (default COOKIE_PROBE_CONCURRENCY)
+
+        Returns:
+            Dictionary with probed/valid/invalid/skipped counts
+        """
+        limit = limit or settings.COOKIE_PROBE_BATCH_SIZE
+        summary = cls.validate_accounts(cls.get_due_accounts(limit), concurrency=concurrency)
+        log_info("Idle cookie probe finished", **summary)
+        return summary
@@ -1,7 +1,12 @@
 """
 Cookie Service: Handles cookie allocation and release logic.
 Implements LRU (Least Recently Used) selection strategy with pre-allocation validation.
+With COOKIE_POOL_ENABLED, leases are served from the Redis CookiePool and
+written back to Postgres in batches.
 """
+import uuid
+
+from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
@@ -17,6 +22,9 @@ from bots.services.logger import (
     log_debug
 )
 from bots.services.cookie_validator import CookieValidator
+from bots.services.cookie_waitlist import CookieWaitlist
+from bots.services.cookie_pool import CookiePool
+from bots.services.validation_cache import ValidationCache
 
 
 class CookieService:
@@ -26,7 +34,7 @@ class CookieService:
     This service ensures:
     - Only logged-in accounts are provided
     - LRU (Least Recently Used) strategy for cookie selection
-    - Thread-safe cookie allocation using database transactions
+    - Thread-safe cookie allocation using short row-lock leases
     - Proper tracking of cookie usage status
     """
     
@@ -80,19 +88,184 @@ class CookieService:
         return cls.PLATFORM_MAP.get(platform_name.lower())
     
     @classmethod
-    @traced_method("cookie_service.allocate_cookie")
+    def get_platform_name(cls, platform_code: str) -> Optional[str]:
+        """
+        Convert platform code back to platform name.
+        
+        Args:
+            platform_code: Platform code (IG, LI, TW)
+            
+        Returns:
+            Platform name (instagram, linkedin, twitter) or None if invalid
+        """
+        for name, code in cls.PLATFORM_MAP.items():
+            if code == platform_code:
+                return name
+        return None
+    
+    @classmethod
+    def notify_cookie_available(cls, platform_code: str) -> None:
+        """
+        Wake the oldest job parked for this platform once the current transaction commits.
+        
+        Args:
+            platform_code: Platform code (IG, LI, TW) of the cookie that became available
+        """
+        platform = cls.get_platform_name(platform_code)
+        if platform:
+            transaction.on_commit(lambda: CookieWaitlist.wake_next(platform))
+    
+    @classmethod
+    def has_available_cookie(cls, platform_code: str) -> bool:
+        """
+        Check whether a cookie is free to allocate right now.
+        
+        Args:
+            platform_code: Platform code (IG, LI, TW)
+            
+        Returns:
+            True if at least one logged-in cookie is not in use
+        """
+        if CookiePool.is_enabled():
+            return CookiePool.has_available(platform_code)
+        return SocialAccount.objects.filter(
+            platform=platform_code,
+            logged_in=True,
+            in_use=False,
+        ).exists()
+    
+    @classmethod
+    def is_recently_validated(cls, account: SocialAccount) -> bool:
+        """
+        Whether the cookie was validated within COOKIE_VALIDATION_FRESHNESS seconds.
+        
+        Args:
+            account: Leased SocialAccount
+            
+        Returns:
+            True if inline validation can be skipped
+        """
+        if not settings.COOKIE_VALIDATION_FRESHNESS or not account.last_validated_at:
+            return False
+        age = (timezone.now() - account.last_validated_at).total_seconds()
+        return age < settings.COOKIE_VALIDATION_FRESHNESS
+    
+    @classmethod
     @transaction.atomic
+    def _claim_account(cls, platform_code: str) -> Optional[SocialAccount]:
+        """
+        Phase 1 of allocation: lease the least recently used cookie.
+        
+        Runs in its own short transaction so the row lock is held only for the
+        SELECT ... FOR UPDATE and the in_use flip. Rows already locked by another
+        allocator are skipped instead of waited on, so concurrent allocators each
+        claim a different cookie. Each claim writes a new lease_token, which
+        commit and rollback match on.
+        
+        Args:
+            platform_code: Platform code (IG, LI, TW)
+            
+        Returns:
+            Leased SocialAccount (in_use=True) or None if nothing is available
+        """
+        # Order by last_used_at (NULL first for never-used cookies, then oldest first)
+        account = (
+            SocialAccount.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                platform=platform_code,
+                logged_in=True,
+                in_use=False,
+            )
+            .order_by('last_used_at')  # NULL values come first, then oldest
+            .first()
+        )
+        
+        if account:
+            account.in_use = True
+            account.lease_token = uuid.uuid4()
+            account.save(update_fields=['in_use', 'lease_token'])
+        
+        return account
+    
+    @classmethod
+    def _commit_lease(cls, account: SocialAccount, revalidated: bool = True) -> bool:
+        """
+        Phase 3 (success): confirm the lease after validation passed.
+        
+        Compare-and-set on in_use=True and this claim's lease_token, so a lease
+        that was released in the meantime (e.g. admin "Release Cookie" action)
+        is not resurrected, even if another allocator has claimed the cookie since.
+        
+        Args:
+            account: Leased SocialAccount
+            revalidated: False if validation was skipped (fresh cookie); the
+                existing last_validated_at is kept so freshness is not extended
+        
+        Returns:
+            True if the lease was still held and is now committed
+        """
+        leased = SocialAccount.objects.filter(id=account.id, in_use=True, lease_token=account.lease_token)
+        if not revalidated:
+            return leased.exists()
+        
+        validated_at = timezone.now()
+        updated = leased.update(last_validated_at=validated_at)
+        if updated:
+            account.last_validated_at = validated_at
+        return bool(updated)
+    
+    @classmethod
+    @transaction.atomic
+    def _rollback_lease(cls, account: SocialAccount, failure_reason: str) -> bool:
+        """
+        Phase 3 (failure): give the lease back and record the validation failure.
+        
+        The row is re-read under lock and only touched if it is still leased by
+        this claim (same lease_token), so a concurrent release, or another
+        allocator's lease of the same cookie, is never overwritten.
+        
+        Returns:
+            True if the lease was still held and has been rolled back
+        """
+        current = (
+            SocialAccount.objects
+            .select_for_update()
+            .filter(id=account.id, in_use=True, lease_token=account.lease_token)
+            .first()
+        )
+        if not current:
+            return False
+        
+        # Cookie validation failed - mark as logged out immediately
+        current.logged_in = False
+        current.in_use = False
+        current.increment_failures(reason=f"Pre-validation failed: {failure_reason}")
+        current.save(update_fields=['logged_in', 'in_use'])
+        
+        account.logged_in = current.logged_in
+        account.in_use = current.in_use
+        account.consecutive_failures = current.consecutive_failures
+        account.failure_reason = current.failure_reason
+        return True
+    
+    @classmethod
+    @traced_method("cookie_service.allocate_cookie", batch=True)
     def allocate_cookie(cls, platform: str, post_url: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Allocate a cookie for the given platform using LRU strategy.
         
-        This method:
-        1. Finds available cookies (logged_in=True, in_use=False)
-        2. Selects the least recently used one
-        3. Marks it as in_use
-        4. Validates cookie using post_url
-        5. Updates last_used_at timestamp
-        6. Returns cookie data
+        Allocation is a two-phase lease so no transaction is open while the
+        validator talks to the network:
+        1. Claim: in a short transaction, lock the least recently used available
+           cookie (logged_in=True, in_use=False) and mark it in_use
+        2. Validate: check the cookie session against post_url, outside any transaction
+           (skipped if the cookie was validated within COOKIE_VALIDATION_FRESHNESS)
+        3. Commit or roll back: compare-and-set on in_use=True, either stamping
+           last_validated_at or releasing the cookie and recording the failure
+        
+        With COOKIE_POOL_ENABLED, claim/commit/rollback run against the Redis
+        CookiePool instead and the DB row is updated by the write-behind flush.
         
         Args:
             platform: Platform name (instagram, linkedin, twitter)
@@ -113,19 +286,11 @@ class CookieService:
         add_span_attributes(platform=platform, platform_code=platform_code)
         add_span_event("cookie_allocation_started", {"platform": platform})
         
-        # Select available accounts using select_for_update to prevent race conditions
-        # Order by last_used_at (NULL first for never-used cookies, then oldest first)
-        account = (
-            SocialAccount.objects
-            .select_for_update()
-            .filter(
-                platform=platform_code,
-                logged_in=True,
-                in_use=False,
-            )
-            .order_by('last_used_at')  # NULL values come first, then oldest
-            .first()
-        )
+        use_pool = CookiePool.is_enabled()
+        add_span_attributes(cookie_pool=use_pool)
+        
+        # Phase 1: claim the cookie (short DB transaction, or one atomic pop from the pool)
+        account = CookiePool.lease(platform_code) if use_pool else cls._claim_account(platform_code)
         
         if not account:
             log_warning(
@@ -136,10 +301,6 @@ class CookieService:
             add_span_event("cookie_allocation_failed", {"reason": "no_available_cookies"})
             return None
         
-        # Mark as in use
-        account.in_use = True
-        account.save(update_fields=['in_use'])
-        
         # Convert cookies array to string format and extract csrf_token
         cookies_string, csrf_token = cls.convert_cookies_to_string(account.cookies)
         
@@ -152,28 +313,45 @@ class CookieService:
             last_validated_at=account.last_validated_at.isoformat() if account.last_validated_at else "never"
         )
         
-        # 🆕 VALIDATE COOKIE SESSION BEFORE RETURNING
+        # Phase 2: VALIDATE COOKIE SESSION BEFORE RETURNING (no transaction open)
         # This prevents wasting Lambda execution on invalid/expired/rate-limited cookies
-        add_span_event("cookie_validation_starting", {
-            "cookie_id": account.id,
-            "platform": platform,
-            "username": account.username
-        })
-        
-        is_valid, failure_reason, comment_count = CookieValidator.validate(
-            cookies=cookies_string,
-            csrf_token=csrf_token,
-            platform=platform,
-            cookie_id=account.id,  # For sticky proxy session
-            post_url=post_url  # For Instagram post-specific validation
-        )
+        revalidated = not cls.is_recently_validated(account)
+        if not revalidated:
+            # Background prober (or a previous allocation) checked this cookie inside the freshness window
+            is_valid, failure_reason = True, ""
+            comment_count = CookieValidator.cached_comment_count(post_url)
+            add_span_event("cookie_validation_skipped", {
+                "cookie_id": account.id,
+                "last_validated_at": account.last_validated_at.isoformat()
+            })
+        else:
+            add_span_event("cookie_validation_starting", {
+                "cookie_id": account.id,
+                "platform": platform,
+                "username": account.username
+            })
+            
+            is_valid, failure_reason, comment_count = CookieValidator.validate(
+                cookies=cookies_string,
+                csrf_token=csrf_token,
+                platform=platform,
+                cookie_id=account.id,  # For sticky proxy session
+                post_url=post_url  # For Instagram post-specific validation
+            )
         
         if not is_valid:
-            # Cookie validation failed - mark as logged out immediately
-            account.logged_in = False
-            account.in_use = False
-            account.increment_failures(reason=f"Pre-validation failed: {failure_reason}")
-            account.save(update_fields=['logged_in', 'in_use'])
+            # Phase 3: roll back the lease and record the failure
+            rollback = CookiePool.rollback_lease if use_pool else cls._rollback_lease
+            if not rollback(account, failure_reason):
+                log_warning(
+                    "Cookie lease lost during validation, failure not recorded",
+                    cookie_id=account.id,
+                    username=account.username,
+                    platform=platform,
+                    failure_reason=failure_reason
+                )
+                add_span_event("cookie_lease_lost", {"cookie_id": account.id, "phase": "rollback"})
+                return None
             
             add_span_attributes(
                 validation_failed=True,
@@ -201,11 +379,19 @@ class CookieService:
             # Return None to trigger retry loop in tasks.py
             return None
         
-        # Cookie is valid! Update validation timestamp
-        account.last_validated_at = timezone.now()
-        account.save(update_fields=['last_validated_at'])
+        # Phase 3: cookie is valid, commit the lease and stamp the validation time
+        commit = CookiePool.commit_lease if use_pool else cls._commit_lease
+        if not commit(account, revalidated=revalidated):
+            log_warning(
+                "Cookie lease lost during validation, not allocating",
+                cookie_id=account.id,
+                username=account.username,
+                platform=platform
+            )
+            add_span_event("cookie_lease_lost", {"cookie_id": account.id, "phase": "commit"})
+            return None
         
-        add_span_attributes(validation_success=True, comment_count=comment_count)
+        add_span_attributes(validation_success=True, validation_skipped=not revalidated, comment_count=comment_count)
         add_span_event("cookie_validated_successfully", {
             "cookie_id": account.id,
             "username": account.username,
@@ -236,15 +422,19 @@ class CookieService:
             'cookies': cookies_string,
             'csrf_token': csrf_token,
             'comment_count': comment_count,  # 🆕 Extracted during validation (Instagram only)
+            'media_id': CookieValidator.cached_media_id(post_url),  # Lets Lambda skip its media lookup
         }
     
     @classmethod
     @traced_method("cookie_service.release_cookie")
-    @transaction.atomic
     def release_cookie(cls, cookie_id: int, success: bool = True, failure_reason: str = None) -> bool:
         """
         Release a cookie by setting in_use to False and tracking success/failure.
         
+        With COOKIE_POOL_ENABLED, cookies leased from the pool are returned to it
+        directly; anything else (e.g. leased before the pool was enabled) falls
+        back to the database path.
+        
         Args:
             cookie_id: ID of the SocialAccount
             success: Whether the cookie was used successfully
@@ -263,6 +453,45 @@ class CookieService:
             "success": success
         })
         
+        if not success:
+            # A cookie that just failed must be re-validated before its next allocation
+            ValidationCache.invalidate_cookie(cookie_id)
+        
+        if CookiePool.is_enabled():
+            account = CookiePool.release(cookie_id, success, failure_reason)
+            if account:
+                add_span_attributes(cookie_pool=True, consecutive_failures=account.consecutive_failures)
+                cls._log_release(account, success, failure_reason)
+                add_span_event("cookie_released", {"cookie_id": cookie_id})
+                if account.logged_in:
+                    cls.notify_cookie_available(account.platform)
+                return True
+        
+        return cls._release_in_db(cookie_id, success, failure_reason)
+    
+    @classmethod
+    def _log_release(cls, account: SocialAccount, success: bool, failure_reason: Optional[str]) -> None:
+        if success:
+            log_info(
+                "Cookie released successfully",
+                cookie_id=account.id,
+                username=account.username,
+                platform=account.get_platform_display()
+            )
+        else:
+            log_warning(
+                "Cookie released with failure",
+                cookie_id=account.id,
+                username=account.username,
+                platform=account.get_platform_display(),
+                consecutive_failures=account.consecutive_failures,
+                failure_reason=failure_reason or "unknown"
+            )
+    
+    @classmethod
+    @transaction.atomic
+    def _release_in_db(cls, cookie_id: int, success: bool, failure_reason: Optional[str]) -> bool:
+        """Release a cookie directly on its SocialAccount row (row-locked)."""
         try:
             account = SocialAccount.objects.select_for_update().get(id=cookie_id)
             account.in_use = False
@@ -284,8 +513,9 @@ class CookieService:
                     previous_failures=previous_failures
                 )
             else:
-                # Increment failure counter
+                # Increment failure counter; the cookie must be re-validated before its next allocation
                 account.increment_failures(reason=failure_reason)
+                account.last_validated_at = None
                 add_span_attributes(
                     consecutive_failures=account.consecutive_failures,
                     failure_reason=failure_reason or "unknown",
@@ -305,8 +535,11 @@ class CookieService:
                     failure_reason=failure_reason or "unknown"
                 )
             
-            account.save(update_fields=['in_use', 'last_used_at'])
+            account.save(update_fields=['in_use', 'last_used_at', 'last_validated_at'])
             add_span_event("cookie_released", {"cookie_id": cookie_id})
+            
+            if account.logged_in:
+                cls.notify_cookie_available(account.platform)
             return True
         except SocialAccount.DoesNotExist:
             log_error(
@@ -2,9 +2,12 @@
 Cookie Validator: Validates cookie sessions before allocation.
 Uses sticky proxy to ensure validation happens on same IP as scraping.
 """
+import json
 import os
 import requests
-from typing import Tuple
+from typing import Tuple, Optional
+from bots.services import json_codec
+from bots.services.validation_cache import ValidationCache
 from bots.services.logger import (
     traced_method,
     add_span_attributes,
@@ -26,6 +29,10 @@ class CookieValidator:
     - LinkedIn: GET /voyager/api/me
     - Twitter: GET /i/api/1.1/account/verify_credentials.json
     
+    Caching (Instagram):
+    - A cookie validated within VALIDATION_CACHE_COOKIE_TTL against a post looked up
+      within VALIDATION_CACHE_MEDIA_TTL is accepted without a network call
+    
     Sticky Proxy:
     - Uses cookie_id to create consistent proxy session
     - Format: {proxy_username}-cookie-{cookie_id}@{proxy_host}:{proxy_port}
@@ -81,18 +88,83 @@ class CookieValidator:
         shortcode_match = re.search(r'/(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)', post_url)
         return shortcode_match.group(1) if shortcode_match else None
     
+    @classmethod
+    def cached_comment_count(cls, post_url: str) -> int:
+        """
+        comment_count of a post from the validation cache, without a network call.
+        
+        Returns:
+            Cached comment_count, or 0 if unknown (Lambda does not require it)
+        """
+        shortcode = cls._extract_shortcode_from_url(post_url) if post_url else None
+        if not shortcode:
+            return 0
+        return ValidationCache.get_comment_count(shortcode) or 0
+    
+    @classmethod
+    def cached_media_id(cls, post_url: str) -> Optional[str]:
+        """
+        Media id (pk) of a post captured by an earlier validation, without a network call.
+        
+        Returns:
+            Media id, or None if unknown (Lambda then looks it up itself)
+        """
+        shortcode = cls._extract_shortcode_from_url(post_url) if post_url else None
+        if not shortcode:
+            return None
+        return ValidationCache.get_media_id(shortcode)
+    
+    @classmethod
+    def _instagram_headers(cls, cookies: str, csrf_token: str) -> dict:
+        """Request headers for the Instagram GraphQL media info endpoint."""
+        return {
+            'Cookie': cookies,
+            'X-CSRFToken': csrf_token,
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
+            'x-ig-app-id': '936619743392459',
+            'x-requested-with': 'XMLHttpRequest',
+        }
+    
+    @classmethod
+    def _media_info_params(cls, shortcode: str) -> dict:
+        """Query params for the GraphQL media info lookup of one post."""
+        return {
+            'variables': json.dumps({"shortcode": shortcode}),
+            'doc_id': cls.INSTAGRAM_MEDIA_INFO_DOC_ID
+        }
+    
+    @classmethod
+    def _parse_media_info(cls, data: dict) -> Optional[int]:
+        """
+        Extract comment_count from a GraphQL media info response.
+        
+        Returns:
+            comment_count, or None if the post is not in the response (unexpected structure)
+        """
+        items = data.get('data', {}).get('xdt_api__v1__media__shortcode__web_info', {}).get('items', [])
+        if items and len(items) > 0:
+            return items[0].get('comment_count', 0)
+        return None
+    
+    @classmethod
+    def remember_media_id(cls, shortcode: str, data: dict) -> None:
+        """Cache the media id (pk) from a GraphQL media info response for the Lambda payload."""
+        items = data.get('data', {}).get('xdt_api__v1__media__shortcode__web_info', {}).get('items', [])
+        media_id = items[0].get('pk') if items else None
+        if media_id:
+            ValidationCache.store_media_id(shortcode, str(media_id))
+    
     @classmethod
     def _validate_with_post_graphql(cls, post_url: str, headers: dict, proxies: dict, cookie_id: int) -> Tuple[bool, str, int]:
         """
         Validate cookie by accessing Instagram GraphQL media info endpoint.
-        Also extracts comment_count for Lambda to use.
+        Also extracts comment_count and caches the media id for Lambda to use.
         
         Implements retry logic with exponential backoff: 2s, 4s, 8s
         
         Returns:
             (is_valid, failure_reason, comment_count)
         """
-        import json as json_module
         import time
         
         shortcode = cls._extract_shortcode_from_url(post_url)
@@ -107,11 +179,7 @@ class CookieValidator:
         )
         
         # Use GraphQL media info endpoint (same as Lambda scraper)
-        variables = {"shortcode": shortcode}
-        params = {
-            'variables': json_module.dumps(variables),
-            'doc_id': cls.INSTAGRAM_MEDIA_INFO_DOC_ID
-        }
+        params = cls._media_info_params(shortcode)
         
         # Retry with exponential backoff: 2s, 4s, 8s
         retry_delays = [2, 4, 8]
@@ -143,14 +211,12 @@ class CookieValidator:
                 )
                 
                 response.raise_for_status()
-                data = response.json()
+                data = json_codec.loads(response.content)
                 
                 # Check if we can access the post and extract comment_count
-                items = data.get('data', {}).get('xdt_api__v1__media__shortcode__web_info', {}).get('items', [])
-                if items and len(items) > 0:
-                    media_item = items[0]
-                    comment_count = media_item.get('comment_count', 0)
-                    
+                comment_count = cls._parse_media_info(data)
+                if comment_count is not None:
+                    cls.remember_media_id(shortcode, data)
                     add_span_attributes(
                         validation_success=True,
                         http_status=response.status_code,
@@ -209,12 +275,13 @@ class CookieValidator:
         return (False, "max_retries_exceeded", 0)
     
     @classmethod
-    @traced_method("cookie_validator.validate_instagram")
+    @traced_method("cookie_validator.validate_instagram", batch=True)
     def validate_instagram(cls, cookies: str, csrf_token: str, cookie_id: int, post_url: str) -> Tuple[bool, str, int]:
         """
         Validate Instagram cookie session using GraphQL media info endpoint.
         
         Validation Strategy:
+        - Served from ValidationCache if this cookie and this post were both checked recently
         - Validates by accessing the specific post's media info via GraphQL
         - Natural (different post each time)
         - Validates exact permission needed
@@ -247,13 +314,22 @@ class CookieValidator:
             "cookie_id": cookie_id
         })
         
-        headers = {
-            'Cookie': cookies,
-            'X-CSRFToken': csrf_token,
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36',
-            'x-ig-app-id': '936619743392459',
-            'x-requested-with': 'XMLHttpRequest',
-        }
+        shortcode = cls._extract_shortcode_from_url(post_url) if post_url else None
+        if shortcode:
+            cached_comment_count = ValidationCache.get(cookie_id, shortcode)
+            if cached_comment_count is not None:
+                add_span_attributes(validation_success=True, validation_method="cache", comment_count=cached_comment_count)
+                add_span_event("validation_cache_hit", {"cookie_id": cookie_id, "shortcode": shortcode})
+                log_info(
+                    "Cookie validation served from cache",
+                    cookie_id=cookie_id,
+                    platform="instagram",
+                    shortcode=shortcode,
+                    comment_count=cached_comment_count
+                )
+                return (True, "", cached_comment_count)
+        
+        headers = cls._instagram_headers(cookies, csrf_token)
         
         # Get sticky proxy configuration
         proxies = cls._get_proxies(cookie_id)
@@ -267,9 +343,25 @@ class CookieValidator:
         
         try:
             # Validate using GraphQL endpoint with retry logic
-            return cls._validate_with_post_graphql(post_url, headers, proxies, cookie_id)
+            is_valid, failure_reason, comment_count = cls._validate_with_post_graphql(post_url, headers, proxies, cookie_id)
+            if is_valid:
+                ValidationCache.store(cookie_id, shortcode, comment_count)
+            return (is_valid, failure_reason, comment_count)
         
-        except requests.exceptions.HTTPError as e:
+        except Exception as e:
+            return cls.failure_from_exception(e, cookie_id)
+    
+    @classmethod
+    def failure_from_exception(cls, e: Exception, cookie_id: int) -> Tuple[bool, str, int]:
+        """
+        Map an exception raised while validating an Instagram cookie to a validation result.
+        
+        Shared by the synchronous validator and AsyncCookieValidator.
+        
+        Returns:
+            (False, failure_reason, 0)
+        """
+        if isinstance(e, requests.exceptions.HTTPError):
             status_code = e.response.status_code
             add_span_attributes(validation_success=False, http_status=status_code)
             
@@ -316,7 +408,7 @@ class CookieValidator:
                 )
                 return (False, f"http_error_{status_code}", 0)
         
-        except requests.exceptions.Timeout as e:
+        if isinstance(e, requests.exceptions.Timeout):
             # Request timeout
             add_span_attributes(validation_success=False, failure_reason="timeout")
             add_span_event("validation_failed", {"reason": "timeout"})
@@ -328,7 +420,7 @@ class CookieValidator:
             )
             return (False, "timeout", 0)
         
-        except requests.exceptions.RequestException as e:
+        if isinstance(e, requests.exceptions.RequestException):
             # Network error (connection refused, DNS failure, etc.)
             add_span_attributes(validation_success=False, failure_reason="network_error")
             add_span_event("validation_failed", {"reason": "network_error"})
@@ -340,7 +432,7 @@ class CookieValidator:
             )
             return (False, "network_error", 0)
         
-        except requests.exceptions.JSONDecodeError as e:
+        if isinstance(e, json.JSONDecodeError):
             # Invalid JSON response
             add_span_attributes(validation_success=False, failure_reason="invalid_json")
             add_span_event("validation_failed", {"reason": "invalid_json"})
@@ -352,18 +444,17 @@ class CookieValidator:
             )
             return (False, "invalid_json", 0)
         
-        except Exception as e:
-            # Unexpected error
-            add_span_attributes(validation_success=False, failure_reason="unexpected_error")
-            add_span_event("validation_failed", {"reason": "unexpected_error", "error_type": type(e).__name__})
-            log_error(
-                "Cookie validation failed: unexpected error",
-                error=e,
-                cookie_id=cookie_id,
-                platform="instagram",
-                error_type=type(e).__name__
-            )
-            return (False, "unexpected_error", 0)
+        # Unexpected error
+        add_span_attributes(validation_success=False, failure_reason="unexpected_error")
+        add_span_event("validation_failed", {"reason": "unexpected_error", "error_type": type(e).__name__})
+        log_error(
+            "Cookie validation failed: unexpected error",
+            error=e,
+            cookie_id=cookie_id,
+            platform="instagram",
+            error_type=type(e).__name__
+        )
+        return (False, "unexpected_error", 0)
     
     @classmethod
     @traced_method("cookie_validator.validate_linkedin")
@@ -0,0 +1,194 @@
+"""
+Cookie Waitlist: Parks jobs that could not get a cookie and wakes them on release.
+
+Instead of sleeping inside a worker until a cookie frees up, a starved job is
+parked in a per-platform Redis list and its worker slot is released. When a
+cookie is released, the oldest parked job is re-dispatched straight away.
+Every parked job also has a countdown fallback scheduled, so a missed wake-up
+only costs RETRY_DELAY instead of a stuck job.
+
+Redis layout (per platform):
+    cookie_waitlist:{platform}        LIST  wait tokens in FIFO order
+    cookie_waitlist:{platform}:jobs   HASH  wait token -> JSON {task, queue, kwargs}
+"""
+import json
+import uuid
+from typing import Optional, Dict, Any
+
+from celery import current_app
+
+from bots.services.redis_client import get_redis
+from bots.services.logger import (
+    add_span_event,
+    log_info,
+    log_error,
+    log_debug,
+)
+
+
+# Pop the oldest parked job and its payload atomically; returns {token, job}
+_POP_NEXT_SCRIPT = """
+local token = redis.call('LPOP', KEYS[1])
+if not token then
+    return nil
+end
+local job = redis.call('HGET', KEYS[2], token)
+redis.call('HDEL', KEYS[2], token)
+return {token, job}
+"""
+
+# Put a popped job back at the head of the line under its original token
+_REPARK_SCRIPT = """
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('LPUSH', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Remove a specific parked job; returns 1 if this caller removed it
+_CLAIM_SCRIPT = """
+local removed = redis.call('LREM', KEYS[1], 1, ARGV[1])
+if removed > 0 then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+end
+return removed
+"""
+
+
+class CookieWaitlist:
+    """
+    FIFO waitlist of jobs waiting for a cookie, one per platform.
+
+    A parked job can leave the waitlist exactly once, either by being woken
+    on a cookie release (wake_next) or by its countdown fallback claiming it
+    (claim). Whoever removes the token from the list owns the job.
+    """
+
+    KEY_PREFIX = 'cookie_waitlist'
+
+    @classmethod
+    def _keys(cls, platform: str) -> tuple[str, str]:
+        list_key = f"{cls.KEY_PREFIX}:{platform}"
+        return list_key, f"{list_key}:jobs"
+
+    @classmethod
+    def park(
+        cls,
+        platform: str,
+        task_name: str,
+        queue: str,
+        job_kwargs: Dict[str, Any],
+        front: bool = False
+    ) -> str:
+        """
+        Park a job until a cookie for its platform is released.
+
+        Args:
+            platform: Platform name (instagram, linkedin, twitter)
+            task_name: Celery task name to re-dispatch on wake-up
+            queue: Queue to re-dispatch the task on
+            job_kwargs: Task kwargs to re-dispatch with
+            front: Park at the head of the line (job was already waiting)
+
+        Returns:
+            Wait token identifying the parked job
+        """
+        token = uuid.uuid4().hex
+        list_key, jobs_key = cls._keys(platform)
+        entry = json.dumps({'task': task_name, 'queue': queue, 'kwargs': job_kwargs})
+
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.hset(jobs_key, token, entry)
+        if front:
+            pipe.lpush(list_key, token)
+        else:
+            pipe.rpush(list_key, token)
+        pipe.execute()
+
+        add_span_event("job_parked", {"platform": platform, "wait_token": token, "front": front})
+        return token
+
+    @classmethod
+    def claim(cls, platform: str, token: str) -> bool:
+        """
+        Take a parked job out of the waitlist on behalf of its countdown fallback.
+
+        Returns:
+            True if the job was still parked (caller owns it),
+            False if a cookie release already re-dispatched it
+        """
+        list_key, jobs_key = cls._keys(platform)
+        removed = get_redis().eval(_CLAIM_SCRIPT, 2, list_key, jobs_key, token)
+        return bool(removed)
+
+    @classmethod
+    def size(cls, platform: str) -> int:
+        """Number of jobs currently parked for a platform."""
+        list_key, _ = cls._keys(platform)
+        return get_redis().llen(list_key)
+
+    @classmethod
+    def wake_next(cls, platform: str) -> Optional[str]:
+        """
+        Re-dispatch the oldest parked job for a platform.
+
+        Called when a cookie becomes available. The job is dispatched with
+        woken=True so that, if a new job takes the freed cookie first, it is
+        parked again at the head of the line. Never raises. If the job cannot
+        be dispatched it is put back at the head of the waitlist under the same
+        token, so the next release or its countdown fallback still picks it up.
+
+        Returns:
+            Celery task id of the re-dispatched job, or None if nothing was parked
+        """
+        list_key, jobs_key = cls._keys(platform)
+        try:
+            popped = get_redis().eval(_POP_NEXT_SCRIPT, 2, list_key, jobs_key)
+        except Exception as e:
+            log_error("Failed to wake parked job", error=e, platform=platform)
+            return None
+        if not popped or not popped[1]:
+            log_debug("No parked jobs to wake", platform=platform)
+            return None
+
+        token, raw_entry = popped
+        try:
+            entry = json.loads(raw_entry)
+        except ValueError as e:
+            log_error("Dropping unreadable parked job", error=e, platform=platform, wait_token=token)
+            return None
+
+        try:
+            # woken: the job keeps its place at the head of the line if it loses the cookie again
+            result = current_app.send_task(
+                entry['task'],
+                kwargs={**entry['kwargs'], 'woken': True},
+                queue=entry['queue'],
+            )
+        except Exception as e:
+            log_error("Failed to wake parked job, putting it back", error=e, platform=platform, wait_token=token)
+            cls._repark(platform, token, raw_entry)
+            return None
+
+        add_span_event("parked_job_woken", {"platform": platform, "task_id": result.id})
+        log_info(
+            "Woke parked job after cookie release",
+            platform=platform,
+            job_id=entry['kwargs'].get('job_id'),
+            task_id=result.id
+        )
+        return result.id
+
+    @classmethod
+    def _repark(cls, platform: str, token: str, raw_entry: str) -> None:
+        """Put a job whose wake-up failed back at the head of the waitlist."""
+        list_key, jobs_key = cls._keys(platform)
+        try:
+            get_redis().eval(_REPARK_SCRIPT, 2, list_key, jobs_key, token, raw_entry)
+        except Exception as e:
+            log_error(
+                "Failed to put parked job back in waitlist",
+                error=e,
+                platform=platform,
+                wait_token=token,
+                job=raw_entry
+            )
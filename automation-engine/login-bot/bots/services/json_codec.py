@@ -0,0 +1,25 @@
+"""
+JSON Codec: Fast JSON decoding for hot service paths.
+Uses orjson when it is installed (decodes response bytes directly) and falls
+back to the stdlib json module otherwise.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode JSON from bytes or str.
+
+    Raises:
+        json.JSONDecodeError: Invalid JSON (orjson's error is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
@@ -36,7 +36,7 @@ Usage:
 
 import os
 import logging
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 from functools import wraps
 from typing import Optional, Dict, Any, Callable, TypeVar
 
@@ -61,6 +61,9 @@ from opentelemetry.sdk._logs.export import BatchLogRecordProcessor
 from opentelemetry.exporter.otlp.proto.http._log_exporter import OTLPLogExporter
 from opentelemetry._logs import SeverityNumber
 
+from bots.services.trace_sampling import sampled_span_processor
+from bots.services.span_batching import span_batch, add_span_attributes, add_span_event
+
 # Logger for this module
 logger = logging.getLogger(__name__)
 
@@ -74,6 +77,16 @@ logger_provider: Optional[Any] = None
 _telemetry_initialized = False
 
 
+def _span_event_level(name: str) -> int:
+    level = logging.getLevelName(name.upper())
+    # Unknown names (NONE, OFF) disable span event mirroring
+    return level if isinstance(level, int) else logging.CRITICAL + 1
+
+
+# Lowest log level that log_with_trace mirrors as a span event
+LOG_SPAN_EVENT_LEVEL = _span_event_level(os.getenv("LOG_SPAN_EVENT_LEVEL", "INFO"))
+
+
 def setup_telemetry(
     service_name: str = "login-bot",
     service_version: str = "0.1.0",
@@ -156,9 +169,10 @@ def setup_telemetry(
         headers=otlp_headers or {},
     )
     
-    # Set up tracer provider with batch span processor
-    tracer_provider = TracerProvider(resource=resource)
-    span_processor = BatchSpanProcessor(otlp_exporter)
+    # Set up tracer provider with batch span processor, behind tail sampling
+    # when TRACE_SAMPLE_RATIO < 1 (errors and validation failures are always kept)
+    span_processor, sampler = sampled_span_processor(BatchSpanProcessor(otlp_exporter))
+    tracer_provider = TracerProvider(resource=resource, sampler=sampler)
     tracer_provider.add_span_processor(span_processor)
     
     # Set global tracer provider
@@ -351,44 +365,6 @@ def get_current_trace_context() -> Dict[str, str]:
     return inject_trace_context({})
 
 
-def add_span_attributes(**attributes: Any) -> None:
-    """
-    Add attributes to the current active span.
-    
-    Args:
-        **attributes: Key-value pairs to add as span attributes
-    
-    Example:
-        add_span_attributes(
-            user_id=123,
-            platform="instagram",
-            cookie_id=456
-        )
-    """
-    span = trace.get_current_span()
-    if span and span.is_recording():
-        for key, value in attributes.items():
-            span.set_attribute(key, value)
-
-
-def add_span_event(name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
-    """
-    Add an event to the current active span.
-    
-    Events are useful for marking significant moments during span execution.
-    
-    Args:
-        name: Name of the event
-        attributes: Optional attributes for the event
-    
-    Example:
-        add_span_event("cookie_allocated", {"cookie_id": 123, "platform": "instagram"})
-    """
-    span = trace.get_current_span()
-    if span and span.is_recording():
-        span.add_event(name, attributes or {})
-
-
 def set_span_error(error: Exception) -> None:
     """
     Mark the current span as failed and record the exception.
@@ -409,6 +385,22 @@ def set_span_error(error: Exception) -> None:
         span.set_status(trace.Status(trace.StatusCode.ERROR, str(error)))
 
 
+class _StructuredMessage:
+    """Log message with attributes, formatted only when a handler emits the record."""
+    
+    __slots__ = ('message', 'attributes')
+    
+    def __init__(self, message: str, attributes: Dict[str, Any]):
+        self.message = message
+        self.attributes = attributes
+    
+    def __str__(self) -> str:
+        if not self.attributes:
+            return self.message
+        attr_str = " ".join(f"{k}={v}" for k, v in self.attributes.items())
+        return f"{self.message} | {attr_str}"
+
+
 def log_with_trace(
     level: int,
     message: str,
@@ -417,7 +409,11 @@ def log_with_trace(
     """
     Send a structured log with automatic trace correlation.
     Logs are sent to Better Stack and automatically linked to the current trace/span.
-    Also adds an event to the current span for better trace visibility.
+    Logs at LOG_SPAN_EVENT_LEVEL (default INFO) and above are also added as
+    events to the current span for trace visibility.
+    
+    Nothing is built for a level that is neither logged nor mirrored, and the
+    "message | key=value" text is only formatted when a handler emits the record.
     
     Args:
         level: Logging level (logging.INFO, logging.ERROR, etc.)
@@ -428,36 +424,38 @@ def log_with_trace(
         log_with_trace(logging.INFO, "Processing comment", comment_id=123, user="john")
         log_with_trace(logging.ERROR, "API failed", error_code=500, retry_count=3)
     """
-    # Get the standard logger
-    log = logging.getLogger(__name__)
+    log_enabled = logger.isEnabledFor(level)
+    mirror_to_span = level >= LOG_SPAN_EVENT_LEVEL
+    if not (log_enabled or mirror_to_span):
+        return
     
-    # Add span event for trace visibility
     span = trace.get_current_span()
-    if span and span.is_recording():
-        event_attrs = {"log.level": logging.getLevelName(level), "log.message": message}
+    recording = span.is_recording()
+    
+    # Add span event for trace visibility
+    if mirror_to_span and recording:
+        level_name = logging.getLevelName(level)
+        event_attrs = {"log.level": level_name, "log.message": message}
         event_attrs.update(attributes)
-        span.add_event(f"log.{logging.getLevelName(level).lower()}", event_attrs)
-        
-        # Add trace context to attributes for correlation
+        span.add_event(f"log.{level_name.lower()}", event_attrs)
+    
+    if not log_enabled:
+        return
+    
+    # Add trace context to attributes for correlation
+    if recording:
         span_context = span.get_span_context()
         if span_context.is_valid:
             attributes['trace_id'] = f"{span_context.trace_id:032x}"
             attributes['span_id'] = f"{span_context.span_id:016x}"
     
-    # Create structured log message
-    if attributes:
-        attr_str = " ".join(f"{k}={v}" for k, v in attributes.items())
-        full_message = f"{message} | {attr_str}"
-    else:
-        full_message = message
-    
-    # Send log
-    log.log(level, full_message, extra=attributes)
+    # Send log; "%s" defers formatting the structured message to the handler
+    logger.log(level, "%s", _StructuredMessage(message, attributes), extra=attributes)
 
 
 def log_info(message: str, **attributes: Any) -> None:
     """
-    Log an info message with trace correlation and span event.
+    Log an info message with trace correlation.
     
     Args:
         message: Log message
@@ -510,7 +508,7 @@ def log_warning(message: str, **attributes: Any) -> None:
 
 def log_debug(message: str, **attributes: Any) -> None:
     """
-    Log a debug message with trace correlation and span event.
+    Log a debug message with trace correlation.
     
     Args:
         message: Debug message
@@ -588,6 +586,7 @@ def traced(
 def traced_method(
     span_name: Optional[str] = None,
     attributes: Optional[Dict[str, Any]] = None,
+    batch: bool = False,
 ) -> Callable[[F], F]:
     """
     Decorator for class methods that automatically creates a span.
@@ -598,6 +597,8 @@ def traced_method(
     Args:
         span_name: Optional custom name for the span (defaults to ClassName.method_name)
         attributes: Optional dictionary of attributes to set on the span
+        batch: Run the method inside span_batch(), so its add_span_attributes /
+            add_span_event calls are applied to the span once, on return
     
     Returns:
         Decorated method
@@ -632,7 +633,8 @@ def traced_method(
                 span.set_attribute("code.class", class_name)
                 
                 try:
-                    result = func(self, *args, **kwargs)
+                    with span_batch() if batch else nullcontext():
+                        result = func(self, *args, **kwargs)
                     return result
                 except Exception as e:
                     # Record exception in span
@@ -696,6 +698,7 @@ __all__ = [
     "get_current_trace_context",
     "add_span_attributes",
     "add_span_event",
+    "span_batch",
     "set_span_error",
     "log_info",
     "log_error",
@@ -0,0 +1,24 @@
+"""
+Redis Client: Shared connection for services that keep hot state in Redis.
+Defaults to the Celery broker Redis unless REDIS_URL is set.
+"""
+from typing import Optional
+
+import redis
+from django.conf import settings
+
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """
+    Get the process-wide Redis client (created lazily, responses decoded to str).
+    
+    Returns:
+        Redis client backed by a connection pool
+    """
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
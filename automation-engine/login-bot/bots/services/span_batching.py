@@ -0,0 +1,114 @@
+"""
+Span Batching
+
+Shared by the Django/Celery telemetry (bots.services.logger) and the Lambda
+telemetry (lambda_telemetry), which both re-export span_batch,
+add_span_attributes and add_span_event. Inside span_batch() the attribute and
+event calls for the current span are collected in plain containers and applied
+to the span in one step when the block exits (see traced_method(batch=True)).
+
+This module only depends on the OpenTelemetry API (no Django, no SDK), so the
+Lambda ships it with the empty bots and bots.services package files (see
+Dockerfile).
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from opentelemetry import trace
+
+
+class SpanBatch:
+    """Attributes and events for one span, collected in plain containers and applied by apply()."""
+
+    __slots__ = ('span', 'attributes', 'events')
+
+    def __init__(self, span: trace.Span):
+        self.span = span
+        self.attributes: Dict[str, Any] = {}
+        self.events: List[Tuple[str, Dict[str, Any], int]] = []
+
+    def apply(self) -> None:
+        if self.attributes:
+            self.span.set_attributes(self.attributes)
+        for name, attributes, timestamp in self.events:
+            self.span.add_event(name, attributes, timestamp=timestamp)
+
+
+# Batch collecting add_span_attributes/add_span_event calls (see span_batch)
+_span_batch: ContextVar[Optional[SpanBatch]] = ContextVar("span_batch", default=None)
+
+
+@contextmanager
+def span_batch():
+    """
+    Collect add_span_attributes/add_span_event calls for the current span and
+    apply them in one step when the block exits.
+
+    Calls made while a child span is current go to that span directly. When the
+    current span is not recording, nothing is collected. Events keep the time
+    they were added. Not meant for blocks that hand the span to other threads
+    which outlive the block.
+
+    Example:
+        with span_batch():
+            for attempt in range(max_retries):
+                add_span_event(f"attempt_{attempt + 1}", {"attempt": attempt + 1})
+    """
+    span = trace.get_current_span()
+    if not span.is_recording():
+        yield
+        return
+
+    batch = SpanBatch(span)
+    token = _span_batch.set(batch)
+    try:
+        yield
+    finally:
+        _span_batch.reset(token)
+        batch.apply()
+
+
+def add_span_attributes(**attributes: Any) -> None:
+    """
+    Add attributes to the current active span.
+
+    Args:
+        **attributes: Key-value pairs to add as span attributes
+
+    Example:
+        add_span_attributes(
+            user_id=123,
+            platform="instagram",
+            cookie_id=456
+        )
+    """
+    span = trace.get_current_span()
+    batch = _span_batch.get()
+    if batch is not None and batch.span is span:
+        batch.attributes.update(attributes)
+    elif span.is_recording():
+        span.set_attributes(attributes)
+
+
+def add_span_event(name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Add an event to the current active span.
+
+    Events are useful for marking significant moments during span execution.
+
+    Args:
+        name: Name of the event
+        attributes: Optional attributes for the event
+
+    Example:
+        add_span_event("cookie_allocated", {"cookie_id": 123, "platform": "instagram"})
+    """
+    span = trace.get_current_span()
+    batch = _span_batch.get()
+    if batch is not None and batch.span is span:
+        batch.events.append((name, attributes or {}, time.time_ns()))
+    elif span.is_recording():
+        span.add_event(name, attributes or {})
@@ -0,0 +1,167 @@
+"""
+Tail-Based Trace Sampling
+
+Shared by the Django/Celery telemetry (bots.services.logger) and the Lambda
+telemetry (lambda_telemetry). Both wrap their exporting span processor in
+TailSamplingSpanProcessor when TRACE_SAMPLE_RATIO is below 1:
+    - every span is recorded (ALWAYS_ON sampler), so traceparent keeps the
+      sampled flag and the worker -> Lambda propagation is unchanged
+    - a trace is exported when its trace id falls in the ratio. The check is
+      the TraceIdRatioBased one, so the worker and the Lambda keep the same
+      traces
+    - otherwise its spans are held until the local root span ends and are
+      exported only if one of them failed (ERROR status) or has an event
+      from TRACE_KEEP_EVENTS (validation failures, Hiker fallback, exceptions)
+
+The error rule applies per process: a failed Lambda run keeps the Lambda's
+part of the trace even if the worker dropped its own.
+
+This module only depends on the OpenTelemetry SDK (no Django), so the Lambda
+ships it with the empty bots and bots.services package files (see Dockerfile).
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+from opentelemetry.sdk.trace.sampling import ALWAYS_ON, Sampler, TraceIdRatioBased
+from opentelemetry.trace import StatusCode
+
+logger = logging.getLogger(__name__)
+
+TRACE_SAMPLE_RATIO = float(os.getenv("TRACE_SAMPLE_RATIO", "1.0"))
+
+# Span event name prefixes that make a trace worth keeping
+TRACE_KEEP_EVENTS = tuple(
+    name.strip() for name in os.getenv(
+        "TRACE_KEEP_EVENTS",
+        "exception,validation_failed,cookie_validation_failed,hiker_api_fallback"
+    ).split(",") if name.strip()
+)
+
+# Bounds on the spans held for undecided traces
+MAX_PENDING_TRACES = 1024
+MAX_SPANS_PER_TRACE = 512
+# Decisions remembered for spans that end after their local root
+MAX_DECIDED_TRACES = 4096
+
+
+class _PendingTrace:
+    __slots__ = ('spans', 'keep')
+
+    def __init__(self):
+        self.spans: List[ReadableSpan] = []
+        self.keep = False
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Forwards the spans of sampled traces to another span processor.
+
+    Ratio-sampled traces are forwarded as their spans end. Other traces are
+    buffered and forwarded when their local root span ends, if they contain an
+    error or a keep event.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        ratio: float = TRACE_SAMPLE_RATIO,
+        keep_events: Tuple[str, ...] = TRACE_KEEP_EVENTS,
+    ):
+        self.delegate = delegate
+        self.ratio = ratio
+        self.keep_events = keep_events
+        self.dropped_traces = 0
+        self._bound = TraceIdRatioBased.get_bound_for_rate(ratio)
+        self._pending: "OrderedDict[int, _PendingTrace]" = OrderedDict()
+        self._decided: "OrderedDict[int, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ratio_keeps(self, trace_id: int) -> bool:
+        """Same decision as TraceIdRatioBased, so every service keeps the same traces."""
+        return trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self._bound
+
+    def is_interesting(self, span: ReadableSpan) -> bool:
+        if span.status.status_code is StatusCode.ERROR:
+            return True
+        return any(event.name.startswith(self.keep_events) for event in span.events)
+
+    def on_start(self, span, parent_context=None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        if self.ratio_keeps(trace_id):
+            self.delegate.on_end(span)
+            return
+
+        with self._lock:
+            decided = self._decided.get(trace_id)
+            if decided is None:
+                pending = self._hold(trace_id, span)
+                if span.parent is not None and not span.parent.is_remote:
+                    return
+                # Local root ended: decide the trace
+                del self._pending[trace_id]
+                decided = pending.keep
+                self._remember(trace_id, decided)
+                if not decided:
+                    self.dropped_traces += 1
+                spans = pending.spans
+            else:
+                spans = [span]
+
+        if decided:
+            for held in spans:
+                self.delegate.on_end(held)
+
+    def _hold(self, trace_id: int, span: ReadableSpan) -> _PendingTrace:
+        """Buffer a span of an undecided trace (caller holds the lock)."""
+        pending = self._pending.get(trace_id)
+        if pending is None:
+            if len(self._pending) >= MAX_PENDING_TRACES:
+                # A local root that never ended; drop its trace
+                self._pending.popitem(last=False)
+                self.dropped_traces += 1
+            pending = self._pending[trace_id] = _PendingTrace()
+        if len(pending.spans) < MAX_SPANS_PER_TRACE:
+            pending.spans.append(span)
+        pending.keep = pending.keep or self.is_interesting(span)
+        return pending
+
+    def _remember(self, trace_id: int, keep: bool) -> None:
+        self._decided[trace_id] = keep
+        if len(self._decided) > MAX_DECIDED_TRACES:
+            self._decided.popitem(last=False)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+
+def sampled_span_processor(
+    delegate: SpanProcessor,
+    ratio: Optional[float] = None,
+) -> Tuple[SpanProcessor, Optional[Sampler]]:
+    """
+    Wrap an exporting span processor for tail sampling.
+
+    Args:
+        delegate: Processor that exports kept spans
+        ratio: Fraction of traces kept regardless of outcome (default TRACE_SAMPLE_RATIO)
+
+    Returns:
+        (span processor, sampler for the TracerProvider). With a ratio of 1 or
+        more this is (delegate, None) and nothing changes.
+    """
+    ratio = TRACE_SAMPLE_RATIO if ratio is None else ratio
+    if ratio >= 1.0:
+        return delegate, None
+    logger.info(f"Tail sampling enabled: ratio={ratio}, keep events={','.join(TRACE_KEEP_EVENTS)}")
+    return TailSamplingSpanProcessor(delegate, ratio=ratio), ALWAYS_ON
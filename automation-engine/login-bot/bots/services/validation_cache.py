@@ -0,0 +1,173 @@
+"""
+Validation Cache: Short-lived cache of Instagram validation results.
+
+Allocation validates the cookie against the job's post before every Lambda
+run. When the same cookie was validated moments ago, and the same post was
+looked up moments ago (retries re-entering through trigger_job, bursts of
+jobs for one post), the GraphQL call can be skipped.
+
+Two independent entries are kept, each with its own TTL:
+    validation_cache:cookie:{cookie_id}     cookie passed validation recently
+    validation_cache:media:{shortcode}      comment_count of the post
+    validation_cache:media_id:{shortcode}   media id (pk) of the post, handed to the
+                                            Lambda so it can skip its own lookup
+    validation_cache:stats                  HASH of hit/miss counters
+
+A validation is served from cache only when both entries are fresh. A cookie
+released with success=False has its health entry dropped immediately.
+"""
+from typing import Optional, Dict
+
+from django.conf import settings
+
+from bots.services.redis_client import get_redis
+from bots.services.logger import (
+    add_span_attributes,
+    log_warning,
+)
+
+
+class ValidationCache:
+    """
+    Cookie health and per-post media info cache with hit/miss counters.
+
+    Cache errors never fail a validation: they are logged and treated as a miss.
+    """
+
+    KEY_PREFIX = 'validation_cache'
+    STATS_KEY = f'{KEY_PREFIX}:stats'
+    MEDIA_ID_TTL = 7 * 24 * 3600  # A shortcode's media id never changes
+
+    @classmethod
+    def _cookie_key(cls, cookie_id: int) -> str:
+        return f'{cls.KEY_PREFIX}:cookie:{cookie_id}'
+
+    @classmethod
+    def _media_key(cls, shortcode: str) -> str:
+        return f'{cls.KEY_PREFIX}:media:{shortcode}'
+
+    @classmethod
+    def _media_id_key(cls, shortcode: str) -> str:
+        return f'{cls.KEY_PREFIX}:media_id:{shortcode}'
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        return settings.VALIDATION_CACHE_COOKIE_TTL > 0 and settings.VALIDATION_CACHE_MEDIA_TTL > 0
+
+    @classmethod
+    def get(cls, cookie_id: int, shortcode: str) -> Optional[int]:
+        """
+        Look up a recent successful validation of this cookie against this post.
+
+        Args:
+            cookie_id: Cookie ID that is about to be validated
+            shortcode: Instagram post shortcode
+
+        Returns:
+            Cached comment_count if both the cookie health and the media info
+            entries are fresh, else None
+        """
+        if not cls.is_enabled():
+            return None
+
+        try:
+            client = get_redis()
+            cookie_healthy, comment_count = client.mget(cls._cookie_key(cookie_id), cls._media_key(shortcode))
+
+            pipe = client.pipeline(transaction=False)
+            pipe.hincrby(cls.STATS_KEY, 'cookie_hits' if cookie_healthy else 'cookie_misses', 1)
+            pipe.hincrby(cls.STATS_KEY, 'media_hits' if comment_count is not None else 'media_misses', 1)
+            pipe.execute()
+        except Exception as e:
+            log_warning("Validation cache lookup failed", cookie_id=cookie_id, shortcode=shortcode, error=str(e))
+            return None
+
+        add_span_attributes(
+            validation_cache_cookie_hit=bool(cookie_healthy),
+            validation_cache_media_hit=comment_count is not None
+        )
+        if cookie_healthy and comment_count is not None:
+            return int(comment_count)
+        return None
+
+    @classmethod
+    def get_comment_count(cls, shortcode: str) -> Optional[int]:
+        """Cached comment_count of a post, or None if not looked up recently."""
+        if not cls.is_enabled():
+            return None
+
+        try:
+            client = get_redis()
+            comment_count = client.get(cls._media_key(shortcode))
+            client.hincrby(cls.STATS_KEY, 'media_hits' if comment_count is not None else 'media_misses', 1)
+        except Exception as e:
+            log_warning("Validation cache lookup failed", shortcode=shortcode, error=str(e))
+            return None
+        return int(comment_count) if comment_count is not None else None
+
+    @classmethod
+    def store(cls, cookie_id: int, shortcode: str, comment_count: int) -> None:
+        """Record a successful validation (cookie health and the post's comment_count)."""
+        if not cls.is_enabled():
+            return
+
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.set(cls._cookie_key(cookie_id), 1, ex=settings.VALIDATION_CACHE_COOKIE_TTL)
+            pipe.set(cls._media_key(shortcode), comment_count, ex=settings.VALIDATION_CACHE_MEDIA_TTL)
+            pipe.execute()
+        except Exception as e:
+            log_warning("Validation cache store failed", cookie_id=cookie_id, shortcode=shortcode, error=str(e))
+
+    @classmethod
+    def store_media_id(cls, shortcode: str, media_id: str) -> None:
+        """Remember the media id (pk) of a post."""
+        try:
+            get_redis().set(cls._media_id_key(shortcode), media_id, ex=cls.MEDIA_ID_TTL)
+        except Exception as e:
+            log_warning("Validation cache store failed", shortcode=shortcode, error=str(e))
+
+    @classmethod
+    def get_media_id(cls, shortcode: str) -> Optional[str]:
+        """Media id (pk) of a post, or None if it was never looked up."""
+        try:
+            return get_redis().get(cls._media_id_key(shortcode))
+        except Exception as e:
+            log_warning("Validation cache lookup failed", shortcode=shortcode, error=str(e))
+            return None
+
+    @classmethod
+    def invalidate_cookie(cls, cookie_id: int) -> None:
+        """Drop the cookie health entry (cookie failed during use)."""
+        try:
+            get_redis().delete(cls._cookie_key(cookie_id))
+        except Exception as e:
+            log_warning("Validation cache invalidation failed", cookie_id=cookie_id, error=str(e))
+
+    @classmethod
+    def stats(cls) -> Dict[str, float]:
+        """
+        Hit/miss counters since the stats were last reset.
+
+        Returns:
+            Dictionary with cookie/media hits and misses and their hit ratios
+        """
+        try:
+            raw = get_redis().hgetall(cls.STATS_KEY)
+        except Exception as e:
+            log_warning("Validation cache stats unavailable", error=str(e))
+            return {}
+
+        stats = {}
+        for entry in ('cookie', 'media'):
+            hits = int(raw.get(f'{entry}_hits', 0))
+            misses = int(raw.get(f'{entry}_misses', 0))
+            stats[f'{entry}_hits'] = hits
+            stats[f'{entry}_misses'] = misses
+            stats[f'{entry}_hit_ratio'] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+        return stats
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        """Reset the hit/miss counters (e.g. after changing a TTL)."""
+        get_redis().delete(cls.STATS_KEY)
@@ -1,13 +1,19 @@
 """
 Celery tasks for cookie provider platform.
 Each platform has its own queue for better load distribution.
-Run workers with --concurrency=1 to ensure FIFO processing (one task at a time).
+Workers admit jobs in FIFO order. How many jobs of one platform run at the same
+time is set per queue by QUEUE_CONCURRENCY in project/celery.py (default 1);
+each running job holds a distinct cookie lease, so parallel jobs never share
+a cookie. Jobs that find no free cookie are parked in the CookieWaitlist
+instead of sleeping, so they never hold a worker slot while they wait.
 """
 import logging
-import time
 from celery import shared_task
 from django.conf import settings
 from bots.services.cookie_service import CookieService
+from bots.services.cookie_waitlist import CookieWaitlist
+from bots.services.cookie_pool import CookiePool
+from bots.services.cookie_prober import CookieProber
 from bots.services.logger import (
     traced,
     add_span_attributes, 
@@ -24,7 +30,7 @@ logger = logging.getLogger(__name__)
 trace_logger = TraceLogger(__name__)
 
 # Retry configuration
-RETRY_DELAY = 10  # Wait 60 seconds before retrying when no cookies available
+RETRY_DELAY = 10  # Fallback countdown (seconds) for parked jobs if no release wakes them first
 
 
 @shared_task(bind=True, queue='instagram_queue', name='bots.tasks.process_instagram_job')
@@ -39,8 +45,10 @@ def process_instagram_job(self, **kwargs):
             - callback_url: Callback URL from NestJS server
             - retry_count: Retry attempt number (optional, default: 0)
             - next_cursor: Cursor to resume from (optional)
+            - wait_token: Set when re-run as a parked job's countdown fallback (internal)
+            - woken: Set when re-dispatched by a cookie release (internal)
     """
-    return _process_platform_job('instagram', **kwargs)
+    return _process_platform_job(self, 'instagram', **kwargs)
 
 
 @shared_task(bind=True, queue='linkedin_queue', name='bots.tasks.process_linkedin_job')
@@ -51,7 +59,7 @@ def process_linkedin_job(self, **kwargs):
     Args:
         **kwargs: Job parameters (same as process_instagram_job)
     """
-    return _process_platform_job('linkedin', **kwargs)
+    return _process_platform_job(self, 'linkedin', **kwargs)
 
 
 @shared_task(bind=True, queue='twitter_queue', name='bots.tasks.process_twitter_job')
@@ -62,17 +70,20 @@ def process_twitter_job(self, **kwargs):
     Args:
         **kwargs: Job parameters (same as process_instagram_job)
     """
-    return _process_platform_job('twitter', **kwargs)
+    return _process_platform_job(self, 'twitter', **kwargs)
 
 
-def _process_platform_job(platform: str, **kwargs) -> dict:
+def _process_platform_job(task, platform: str, **kwargs) -> dict:
     """
     Common logic for processing platform jobs.
     
-    Simple FIFO queue: if no cookie available, sleep and retry.
-    Since worker runs with --concurrency=1, this blocks the entire queue.
+    If no cookie is available the job is parked in the CookieWaitlist and the
+    task returns immediately, freeing the worker for the next job. A parked job
+    is re-dispatched as soon as a cookie is released, or by its countdown
+    fallback after RETRY_DELAY seconds, whichever comes first.
     
     Args:
+        task: Bound Celery task (used to schedule the countdown fallback)
         platform: Platform name (instagram, linkedin, twitter)
         **kwargs: Job parameters including:
             - job_id: Job identifier
@@ -80,16 +91,38 @@ def _process_platform_job(platform: str, **kwargs) -> dict:
             - callback_url: Callback URL
             - retry_count: Retry attempt (optional, default: 0)
             - next_cursor: Resume cursor (optional)
+            - allocation_retries: Times this job has already been parked (internal)
+            - wait_token: Waitlist token of the countdown fallback (internal)
+            - woken: Re-dispatched by CookieWaitlist.wake_next (internal)
         
     Returns:
         Dictionary with status and details
     """
+    wait_token = kwargs.pop('wait_token', None)
+    woken = kwargs.pop('woken', False)
+    
     # Extract required parameters
     job_id = kwargs.get('job_id')
     post_url = kwargs.get('post_url')
     callback_url = kwargs.get('callback_url')
     retry_count = kwargs.get('retry_count', 0)
     next_cursor = kwargs.get('next_cursor')
+    allocation_retry_count = kwargs.get('allocation_retries', 0)
+    
+    if wait_token and not CookieWaitlist.claim(platform, wait_token):
+        # A cookie release already re-dispatched this job; this fallback is stale
+        log_debug(
+            "Parked job already woken, skipping countdown fallback",
+            job_id=job_id,
+            platform=platform,
+            wait_token=wait_token
+        )
+        return {
+            'status': 'skipped',
+            'message': 'Job already re-dispatched by cookie release',
+            'job_id': job_id,
+            'platform': platform,
+        }
     
     # Add tracing attributes for the job
     add_span_attributes(
@@ -97,7 +130,8 @@ def _process_platform_job(platform: str, **kwargs) -> dict:
         platform=platform,
         retry_count=retry_count,
         has_next_cursor=bool(next_cursor),
-        is_retry=retry_count > 0
+        is_retry=retry_count > 0,
+        cookie_allocation_retries=allocation_retry_count
     )
     
     log_info(
@@ -108,31 +142,11 @@ def _process_platform_job(platform: str, **kwargs) -> dict:
         has_cursor=bool(next_cursor)
     )
     
-    cookie_data = None
-    allocation_retry_count = 0
+    cookie_data = CookieService.allocate_cookie(platform, post_url=post_url)
     
-    while cookie_data is None:
-        cookie_data = CookieService.allocate_cookie(platform, post_url=post_url)
-        
-        if cookie_data is None:
-            allocation_retry_count += 1
-            add_span_attributes(cookie_allocation_retries=allocation_retry_count)
-            add_span_event("cookie_allocation_retry", {"retry_count": allocation_retry_count, "retry_delay": RETRY_DELAY})
-            
-            log_warning(
-                f"No available cookies for {platform}. Blocking queue",
-                job_id=job_id,
-                platform=platform,
-                allocation_retry=allocation_retry_count,
-                retry_delay_seconds=RETRY_DELAY
-            )
-            time.sleep(RETRY_DELAY)
-            log_info(
-                "Retrying cookie allocation",
-                job_id=job_id,
-                platform=platform,
-                allocation_retry=allocation_retry_count
-            )
+    if cookie_data is None:
+        # A job that was already waiting keeps its place in line
+        return _park_job(task, platform, kwargs, was_waiting=wait_token is not None or woken)
     
     add_span_attributes(cookie_id=cookie_data['cookie_id'], cookie_allocation_retries=allocation_retry_count)
     add_span_event("cookie_allocated", {"cookie_id": cookie_data['cookie_id'], "allocation_retries": allocation_retry_count})
@@ -158,6 +172,10 @@ def _process_platform_job(platform: str, **kwargs) -> dict:
         'retry_count': retry_count,  # Lambda retry count (not cookie allocation retry)
     }
     
+    # Media id captured during validation saves Lambda a lookup
+    if cookie_data.get('media_id'):
+        payload['media_id'] = cookie_data['media_id']
+    
     # Add optional next_cursor parameter
     if next_cursor:
         payload['next_cursor'] = next_cursor
@@ -192,6 +210,101 @@ def _process_platform_job(platform: str, **kwargs) -> dict:
     }
 
 
+def _park_job(task, platform: str, job_kwargs: dict, was_waiting: bool = False) -> dict:
+    """
+    Park a job that could not get a cookie and release the worker slot.
+    
+    The job is added to the platform's waitlist (at the head if it was already
+    waiting, to keep its place in line) and a countdown fallback is scheduled.
+    If a cookie is already free again by the time the job is parked (a release
+    raced with the failed allocation), the oldest waiter is woken right away.
+    """
+    job_id = job_kwargs.get('job_id')
+    allocation_retry_count = job_kwargs.get('allocation_retries', 0) + 1
+    job_kwargs = {**job_kwargs, 'allocation_retries': allocation_retry_count}
+    
+    add_span_attributes(cookie_allocation_retries=allocation_retry_count)
+    add_span_event("cookie_allocation_retry", {"retry_count": allocation_retry_count, "retry_delay": RETRY_DELAY})
+    
+    try:
+        wait_token = CookieWaitlist.park(platform, task.name, task.queue, job_kwargs, front=was_waiting)
+    except Exception as e:
+        # Waitlist unavailable - fall back to a plain countdown retry
+        log_error(
+            "Failed to park job in cookie waitlist, retrying with countdown",
+            error=e,
+            job_id=job_id,
+            platform=platform
+        )
+        task.apply_async(kwargs=job_kwargs, countdown=RETRY_DELAY)
+        wait_token = None
+    else:
+        task.apply_async(kwargs={**job_kwargs, 'wait_token': wait_token}, countdown=RETRY_DELAY)
+    
+    log_warning(
+        f"No available cookies for {platform}. Job parked until a cookie is released",
+        job_id=job_id,
+        platform=platform,
+        allocation_retry=allocation_retry_count,
+        retry_delay_seconds=RETRY_DELAY
+    )
+    
+    platform_code = CookieService.get_platform_code(platform)
+    if wait_token and CookieService.has_available_cookie(platform_code):
+        CookieWaitlist.wake_next(platform)
+    
+    return {
+        'status': 'waiting',
+        'message': 'No cookie available, job parked',
+        'job_id': job_id,
+        'platform': platform,
+        'allocation_retries': allocation_retry_count,
+    }
+
+
+@shared_task(queue='maintenance_queue', name='bots.tasks.flush_cookie_pool_writes', ignore_result=True)
+def flush_cookie_pool_writes():
+    """
+    Apply queued CookiePool state changes to Postgres (scheduled by Celery beat).
+    
+    Drains the write-behind list in batches of COOKIE_POOL_FLUSH_BATCH_SIZE
+    until it is empty, so a backlog never grows past one beat interval.
+    """
+    if not CookiePool.is_enabled():
+        return 0
+    
+    flushed = 0
+    while True:
+        applied = CookiePool.flush_writes()
+        flushed += applied
+        if applied < settings.COOKIE_POOL_FLUSH_BATCH_SIZE:
+            break
+    
+    add_span_attributes(cookie_pool_events_flushed=flushed)
+    return flushed
+
+
+@shared_task(queue='maintenance_queue', name='bots.tasks.probe_idle_cookies', ignore_result=True)
+def probe_idle_cookies():
+    """
+    Pre-validate idle cookies so allocation can skip inline validation (scheduled by Celery beat).
+    
+    Cookies validated within COOKIE_VALIDATION_FRESHNESS are allocated without
+    a validation call; dead cookies are logged out here instead of on a job's path.
+    """
+    return CookieProber.probe_idle_cookies()
+
+
+@shared_task(queue='maintenance_queue', name='bots.tasks.validate_cookies', ignore_result=True)
+def validate_cookies(account_ids):
+    """
+    Validate selected cookies and record the results (dispatched by the admin bulk action).
+    
+    Cookies that are logged out or leased by the time the task runs are skipped.
+    """
+    return CookieProber.validate_account_ids(account_ids)
+
+
 @traced("lambda.invoke_fire_and_forget")
 def _fire_and_forget_lambda(url: str, payload: dict, job_id: str, platform: str, cookie_id: int) -> None:
     """Fire-and-forget method to send payload to Lambda function."""
@@ -0,0 +1,33 @@
+"""
+Shared fixtures for tests that need Redis.
+"""
+import unittest
+
+import redis
+from django.conf import settings
+
+from bots.services import redis_client
+
+# Tests run against a separate Redis database, emptied before and after each test
+TEST_REDIS_DB = 15
+
+
+class RedisTestMixin:
+    """Point get_redis() at an empty test database; skip the test if Redis is unreachable."""
+
+    def setUp(self):
+        super().setUp()
+        client = redis.Redis.from_url(settings.REDIS_URL, db=TEST_REDIS_DB, decode_responses=True)
+        try:
+            client.ping()
+        except redis.ConnectionError:
+            raise unittest.SkipTest("Redis is not reachable")
+        client.flushdb()
+        self.redis = client
+        self._previous_client = redis_client._client
+        redis_client._client = client
+
+    def tearDown(self):
+        self.redis.flushdb()
+        redis_client._client = self._previous_client
+        super().tearDown()
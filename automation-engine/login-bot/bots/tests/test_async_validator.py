@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from unittest import mock
+
+import requests
+from django.test import SimpleTestCase
+
+from bots.services.async_validator import AsyncCookieValidator, ValidationRequest
+from bots.services.cookie_validator import CookieValidator
+from bots.tests.helpers import RedisTestMixin
+
+POST_URL = 'https://www.instagram.com/p/DSB0eUtjWBq/'
+
+
+def media_info_response(comment_count):
+    response = mock.Mock(spec=requests.Response)
+    response.content = json.dumps({
+        'data': {'xdt_api__v1__media__shortcode__web_info': {'items': [{'pk': '1', 'comment_count': comment_count}]}}
+    })
+    return response
+
+
+def request(cookie_id, platform='instagram'):
+    return ValidationRequest(
+        cookie_id=cookie_id, cookies='sessionid=x', csrf_token='csrf', platform=platform, post_url=POST_URL
+    )
+
+
+@mock.patch.object(CookieValidator, '_get_proxies', return_value=None)
+class AsyncCookieValidatorTests(RedisTestMixin, SimpleTestCase):
+
+    def test_sync_platforms_run_off_the_event_loop(self, _proxies):
+        threads = []
+
+        def validate(**kwargs):
+            threads.append(threading.current_thread().name)
+            time.sleep(0.2)
+            return (True, "", 0)
+
+        with mock.patch.object(CookieValidator, 'validate', side_effect=validate):
+            started = time.monotonic()
+            results = AsyncCookieValidator.validate_many(
+                [request(cookie_id, platform='linkedin') for cookie_id in range(5)], concurrency=5
+            )
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(results, {cookie_id: (True, "", 0) for cookie_id in range(5)})
+        self.assertTrue(all(name.startswith('cookie-validate') for name in threads))
+        # Five blocking validations overlap instead of running back to back
+        self.assertLess(elapsed, 0.6)
+
+    def test_instagram_validation(self, _proxies):
+        with mock.patch.object(requests.Session, 'get', return_value=media_info_response(42)) as get:
+            results = AsyncCookieValidator.validate_many([request(1), request(2)])
+
+        self.assertEqual(results, {1: (True, "", 42), 2: (True, "", 42)})
+        self.assertEqual(get.call_count, 2)
+
+    def test_instagram_http_error_is_final(self, _proxies):
+        response = mock.Mock(spec=requests.Response, status_code=401)
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+
+        with mock.patch.object(requests.Session, 'get', return_value=response) as get:
+            results = AsyncCookieValidator.validate_many([request(1)])
+
+        self.assertFalse(results[1][0])
+        self.assertEqual(get.call_count, 1)
+
+    def test_network_error_is_retried(self, _proxies):
+        responses = [requests.exceptions.ConnectionError("reset"), media_info_response(7)]
+
+        with mock.patch.object(AsyncCookieValidator, 'RETRY_DELAYS', [0, 0, 0]), \
+                mock.patch.object(requests.Session, 'get', side_effect=responses):
+            results = AsyncCookieValidator.validate_many([request(1)])
+
+        self.assertEqual(results, {1: (True, "", 7)})
+
+    def test_exception_becomes_failure_result(self, _proxies):
+        with mock.patch.object(CookieValidator, 'validate', side_effect=RuntimeError("boom")):
+            results = AsyncCookieValidator.validate_many([request(1, platform='twitter')])
+
+        self.assertFalse(results[1][0])
+
+    def test_invalid_post_url(self, _proxies):
+        bad = ValidationRequest(cookie_id=1, cookies='', csrf_token='', platform='instagram', post_url='https://x.com/')
+        self.assertEqual(AsyncCookieValidator.validate_many([bad]), {1: (False, "invalid_shortcode", 0)})
@@ -0,0 +1,131 @@
+import threading
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from bots.models import SocialAccount
+from bots.services.cookie_pool import CookiePool
+from bots.services.cookie_service import CookieService
+from bots.tests.helpers import RedisTestMixin
+
+
+def make_account(username, platform='IG', **fields):
+    return SocialAccount.objects.create(
+        platform=platform,
+        username=username,
+        password='secret',
+        logged_in=True,
+        cookies=[{'name': 'sessionid', 'value': username}],
+        **fields,
+    )
+
+
+class LeaseTokenTests(TestCase):
+    """Commit and rollback only act on the claim that holds the lease (no ABA)."""
+
+    def setUp(self):
+        self.account = make_account('alice')
+
+    def test_claim_writes_new_token(self):
+        first = CookieService._claim_account('IG')
+        SocialAccount.objects.filter(id=first.id).update(in_use=False)
+        second = CookieService._claim_account('IG')
+
+        self.assertEqual(first.id, second.id)
+        self.assertIsNotNone(first.lease_token)
+        self.assertNotEqual(first.lease_token, second.lease_token)
+
+    def test_stale_commit_after_reclaim_is_rejected(self):
+        stale = CookieService._claim_account('IG')
+        # Admin "Release Cookie" while validation runs, then another allocator claims it
+        SocialAccount.objects.filter(id=stale.id).update(in_use=False)
+        current = CookieService._claim_account('IG')
+
+        self.assertFalse(CookieService._commit_lease(stale))
+        self.assertFalse(CookieService._commit_lease(stale, revalidated=False))
+        self.assertTrue(CookieService._commit_lease(current))
+
+    def test_stale_rollback_after_reclaim_keeps_new_lease(self):
+        stale = CookieService._claim_account('IG')
+        SocialAccount.objects.filter(id=stale.id).update(in_use=False)
+        current = CookieService._claim_account('IG')
+
+        self.assertFalse(CookieService._rollback_lease(stale, 'expired'))
+
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.logged_in)
+        self.assertTrue(self.account.in_use)
+        self.assertEqual(self.account.lease_token, current.lease_token)
+        self.assertEqual(self.account.consecutive_failures, 0)
+
+    def test_rollback_of_current_lease(self):
+        leased = CookieService._claim_account('IG')
+
+        self.assertTrue(CookieService._rollback_lease(leased, 'expired'))
+
+        self.account.refresh_from_db()
+        self.assertFalse(self.account.logged_in)
+        self.assertFalse(self.account.in_use)
+        self.assertEqual(self.account.consecutive_failures, 1)
+
+
+class ConcurrentClaimTests(TransactionTestCase):
+    """Concurrent allocators each claim a different cookie."""
+
+    def test_threads_claim_distinct_accounts(self):
+        for index in range(8):
+            make_account(f'user{index}')
+
+        claimed = []
+        barrier = threading.Barrier(8)
+
+        def claim():
+            try:
+                barrier.wait()
+                account = CookieService._claim_account('IG')
+                if account:
+                    claimed.append((account.id, account.lease_token))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(claimed), 8)
+        self.assertEqual(len({account_id for account_id, _ in claimed}), 8)
+        self.assertEqual(SocialAccount.objects.filter(in_use=True).count(), 8)
+
+
+@override_settings(COOKIE_POOL_ENABLED=True)
+class PoolLeaseTokenTests(RedisTestMixin, TestCase):
+    """The pool path compares the same per-lease token."""
+
+    def setUp(self):
+        super().setUp()
+        self.account = make_account('alice')
+
+    def reclaim(self, stale):
+        # Lease released outside the pool and the cookie leased again
+        CookiePool.release(stale.id, success=True)
+        current = CookiePool.lease('IG')
+        self.assertEqual(current.id, stale.id)
+        return current
+
+    def test_stale_commit_after_reclaim_is_rejected(self):
+        stale = CookiePool.lease('IG')
+        current = self.reclaim(stale)
+
+        self.assertFalse(CookiePool.commit_lease(stale))
+        self.assertFalse(CookiePool.commit_lease(stale, revalidated=False))
+        self.assertTrue(CookiePool.commit_lease(current))
+
+    def test_stale_rollback_after_reclaim_keeps_new_lease(self):
+        stale = CookiePool.lease('IG')
+        current = self.reclaim(stale)
+
+        self.assertFalse(CookiePool.rollback_lease(stale, 'expired'))
+        self.assertTrue(self.redis.sismember(CookiePool._leased_key('IG'), current.id))
+        self.assertTrue(CookiePool.commit_lease(current))
@@ -0,0 +1,147 @@
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from bots.models import SocialAccount
+from bots.services.cookie_pool import CookiePool
+from bots.tests.helpers import RedisTestMixin
+from bots.tests.test_cookie_lease import make_account
+
+
+@override_settings(COOKIE_POOL_ENABLED=True)
+class CookiePoolLoadTests(RedisTestMixin, TestCase):
+
+    def test_reload_skips_cookies_leased_through_the_pool(self):
+        leased_account = make_account('alice')
+        make_account('bob')
+        leased = CookiePool.lease('IG')
+
+        CookiePool.invalidate(['IG'])
+        CookiePool.ensure_loaded('IG')
+
+        available = self.redis.zrange(CookiePool._available_key('IG'), 0, -1)
+        self.assertNotIn(str(leased.id), available)
+        self.assertEqual(len(available), 1)
+        leased_account.refresh_from_db()
+        self.assertTrue(leased_account.in_use)
+
+    def test_lease_during_reload_is_not_put_back(self):
+        make_account('alice')
+        CookiePool.ensure_loaded('IG')
+        CookiePool.invalidate(['IG'])
+        leased = []
+        original_pipeline = self.redis.pipeline
+
+        def pipeline(*args, **kwargs):
+            pipe = original_pipeline(*args, **kwargs)
+            original_execute = pipe.execute
+
+            def execute(*execute_args, **execute_kwargs):
+                # Another allocator leases after the reload read its snapshot
+                if not leased:
+                    with mock.patch.object(CookiePool, 'ensure_loaded'):
+                        leased.append(CookiePool.lease('IG'))
+                return original_execute(*execute_args, **execute_kwargs)
+
+            pipe.execute = execute
+            return pipe
+
+        with mock.patch.object(self.redis, 'pipeline', side_effect=pipeline):
+            CookiePool.ensure_loaded('IG')
+
+        self.assertIsNotNone(leased[0])
+        self.assertEqual(self.redis.zcard(CookiePool._available_key('IG')), 0)
+        self.assertIsNone(CookiePool.lease('IG'))
+
+    def test_reload_keeps_cookie_returned_after_snapshot(self):
+        make_account('alice')
+        leased = CookiePool.lease('IG')
+        # Flushed: Postgres now shows the cookie in use
+        CookiePool.flush_writes()
+        CookiePool.release(leased.id, success=True)
+        CookiePool.invalidate(['IG'])
+
+        # Reload reads Postgres before the release is flushed
+        with mock.patch.object(CookiePool, '_drain_writes', return_value=True):
+            CookiePool.ensure_loaded('IG')
+
+        self.assertEqual(self.redis.zrange(CookiePool._available_key('IG'), 0, -1), [str(leased.id)])
+
+    def test_reload_drains_the_whole_write_behind_list(self):
+        for index in range(5):
+            make_account(f'user{index}')
+        for _ in range(5):
+            CookiePool.lease('IG')
+
+        CookiePool.invalidate(['IG'])
+        with override_settings(COOKIE_POOL_FLUSH_BATCH_SIZE=2):
+            CookiePool.ensure_loaded('IG')
+
+        self.assertEqual(self.redis.llen(CookiePool.WRITEBACK_KEY), 0)
+        self.assertEqual(SocialAccount.objects.filter(in_use=True).count(), 5)
+
+    def test_failed_flush_does_not_break_allocation(self):
+        make_account('alice')
+        CookiePool.ensure_loaded('IG')
+        CookiePool.invalidate(['IG'])
+
+        with mock.patch.object(CookiePool, 'flush_writes', side_effect=RuntimeError("db down")):
+            leased = CookiePool.lease('IG')
+
+        # The current pool kept serving and the next call reloads
+        self.assertIsNotNone(leased)
+        self.assertFalse(self.redis.exists(CookiePool._loaded_key('IG')))
+
+
+@override_settings(COOKIE_POOL_ENABLED=True)
+class CookiePoolConcurrencyTests(RedisTestMixin, TransactionTestCase):
+
+    def test_concurrent_leases_and_reloads_never_share_a_cookie(self):
+        for index in range(4):
+            make_account(f'user{index}')
+
+        holders = {}
+        errors = []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def allocator(worker):
+            try:
+                for _ in range(100):
+                    account = CookiePool.lease('IG')
+                    if account is None:
+                        continue
+                    with lock:
+                        if account.id in holders:
+                            errors.append(f"cookie {account.id} leased by {holders[account.id]} and {worker}")
+                        holders[account.id] = worker
+                    with lock:
+                        del holders[account.id]
+                    CookiePool.release(account.id, success=True)
+            finally:
+                connection.close()
+
+        def reloader():
+            try:
+                while not stop.is_set():
+                    CookiePool.invalidate(['IG'])
+                    CookiePool.ensure_loaded('IG')
+            finally:
+                connection.close()
+
+        reload_thread = threading.Thread(target=reloader)
+        reload_thread.start()
+        threads = [threading.Thread(target=allocator, args=(worker,)) for worker in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        reload_thread.join()
+
+        self.assertEqual(errors, [])
+        CookiePool.flush_writes()
+        self.assertEqual(SocialAccount.objects.filter(in_use=True).count(), 0)
+        self.assertEqual(self.redis.zcard(CookiePool._available_key('IG')), 4)
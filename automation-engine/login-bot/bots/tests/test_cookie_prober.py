@@ -0,0 +1,179 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib import admin
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bots.admin import validate_cookies_action
+from bots.models import SocialAccount
+from bots.services.async_validator import AsyncCookieValidator
+from bots.services.cookie_pool import CookiePool
+from bots.services.cookie_prober import CookieProber
+from bots.tests.helpers import RedisTestMixin
+from bots.tests.test_cookie_lease import make_account
+
+
+@override_settings(COOKIE_VALIDATION_FRESHNESS=300, COOKIE_PROBE_INTERVAL=120, COOKIE_PROBE_POST_URL='')
+class DueAccountsTests(TestCase):
+
+    def due_usernames(self, limit=10):
+        return [account.username for account in CookieProber.get_due_accounts(limit)]
+
+    def test_never_validated_first_then_oldest_validation(self):
+        now = timezone.now()
+        make_account('old', platform='LI', last_validated_at=now - timedelta(hours=2))
+        make_account('never', platform='LI')
+        make_account('older', platform='LI', last_validated_at=now - timedelta(hours=3))
+
+        self.assertEqual(self.due_usernames(), ['never', 'older', 'old'])
+        self.assertEqual(self.due_usernames(limit=2), ['never', 'older'])
+
+    def test_fresh_leased_and_logged_out_cookies_are_not_due(self):
+        make_account('fresh', platform='LI', last_validated_at=timezone.now())
+        make_account('leased', platform='LI', in_use=True)
+        dead = make_account('dead', platform='LI')
+        SocialAccount.objects.filter(id=dead.id).update(logged_in=False)
+        make_account('due', platform='LI')
+
+        self.assertEqual(self.due_usernames(), ['due'])
+
+    def test_instagram_needs_a_probe_post(self):
+        make_account('insta')
+        make_account('linked', platform='LI')
+
+        self.assertEqual(self.due_usernames(), ['linked'])
+        with override_settings(COOKIE_PROBE_POST_URL='https://www.instagram.com/p/abc/'):
+            self.assertEqual(sorted(self.due_usernames()), ['insta', 'linked'])
+
+
+@override_settings(COOKIE_POOL_ENABLED=True, COOKIE_PROBE_POST_URL='')
+class PoolDueAccountsTests(RedisTestMixin, TestCase):
+
+    def test_cookie_leased_through_the_pool_is_not_due(self):
+        make_account('alice', platform='LI')
+        make_account('bob', platform='LI')
+        leased = CookiePool.lease('LI')
+
+        # The lease has not reached Postgres yet (write-behind)
+        self.assertFalse(SocialAccount.objects.get(id=leased.id).in_use)
+        due = [account.id for account in CookieProber.get_due_accounts(10)]
+
+        self.assertEqual(len(due), 1)
+        self.assertNotIn(leased.id, due)
+
+
+class RecordResultTests(TestCase):
+
+    def setUp(self):
+        self.account = make_account('alice', consecutive_failures=1, failure_reason='Probe failed: timeout')
+
+    def test_valid_result_stamps_validation_and_resets_failures(self):
+        self.assertTrue(CookieProber.record_result(self.account.id, True, ''))
+
+        self.account.refresh_from_db()
+        self.assertIsNotNone(self.account.last_validated_at)
+        self.assertEqual(self.account.consecutive_failures, 0)
+        self.assertIsNone(self.account.failure_reason)
+
+    def test_invalid_result_records_a_failure(self):
+        self.assertTrue(CookieProber.record_result(self.account.id, False, 'timeout'))
+
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.logged_in)
+        self.assertEqual(self.account.consecutive_failures, 2)
+        self.assertEqual(self.account.failure_reason, 'Probe failed: timeout')
+
+    def test_third_failure_bans_the_cookie(self):
+        SocialAccount.objects.filter(id=self.account.id).update(consecutive_failures=2)
+
+        self.assertTrue(CookieProber.record_result(self.account.id, False, 'timeout'))
+
+        self.account.refresh_from_db()
+        self.assertFalse(self.account.logged_in)
+        self.assertEqual(self.account.consecutive_failures, 3)
+
+    def test_fatal_result_logs_the_cookie_out(self):
+        self.assertTrue(CookieProber.record_result(self.account.id, False, 'session_expired'))
+
+        self.account.refresh_from_db()
+        self.assertFalse(self.account.logged_in)
+        self.assertEqual(self.account.failure_reason, 'Probe failed: session_expired')
+
+    def test_logged_out_cookie_is_not_touched(self):
+        SocialAccount.objects.filter(id=self.account.id).update(logged_in=False)
+
+        self.assertFalse(CookieProber.record_result(self.account.id, True, ''))
+
+        self.account.refresh_from_db()
+        self.assertFalse(self.account.logged_in)
+        self.assertIsNone(self.account.last_validated_at)
+
+    def test_cookie_leased_during_the_probe_is_not_touched(self):
+        SocialAccount.objects.filter(id=self.account.id).update(in_use=True)
+
+        self.assertFalse(CookieProber.record_result(self.account.id, False, 'session_expired'))
+
+        self.account.refresh_from_db()
+        self.assertTrue(self.account.logged_in)
+        self.assertEqual(self.account.consecutive_failures, 1)
+
+
+@override_settings(COOKIE_POOL_ENABLED=True)
+class PoolRecordResultTests(RedisTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.alice = make_account('alice', platform='LI')
+        self.bob = make_account('bob', platform='LI')
+
+    def test_cookie_leased_through_the_pool_is_not_touched(self):
+        leased = CookiePool.lease('LI')
+
+        self.assertFalse(CookieProber.record_result(leased.id, False, 'session_expired'))
+
+        self.assertTrue(SocialAccount.objects.get(id=leased.id).logged_in)
+
+    def test_batch_invalidates_the_pool_once(self):
+        results = {
+            self.alice.id: (True, '', 0),
+            self.bob.id: (False, 'session_expired', 0),
+        }
+        with mock.patch.object(AsyncCookieValidator, 'validate_many', return_value=results), \
+                mock.patch.object(CookiePool, 'invalidate', wraps=CookiePool.invalidate) as invalidate:
+            summary = CookieProber.validate_accounts([self.alice, self.bob])
+
+        self.assertEqual(summary, {'probed': 2, 'valid': 1, 'invalid': 1, 'skipped': 0})
+        invalidate.assert_called_once_with({'LI'})
+        self.bob.refresh_from_db()
+        self.assertFalse(self.bob.logged_in)
+
+
+class ValidateAccountIdsTests(TestCase):
+
+    def test_only_idle_logged_in_cookies_are_validated(self):
+        idle = make_account('idle', platform='LI')
+        leased = make_account('leased', platform='LI', in_use=True)
+        dead = make_account('dead', platform='LI')
+        SocialAccount.objects.filter(id=dead.id).update(logged_in=False)
+
+        with mock.patch.object(AsyncCookieValidator, 'validate_many', return_value={idle.id: (True, '', 0)}) as validate:
+            summary = CookieProber.validate_account_ids([idle.id, leased.id, dead.id])
+
+        self.assertEqual([request.cookie_id for request in validate.call_args.args[0]], [idle.id])
+        self.assertEqual(summary['valid'], 1)
+
+
+class ValidateCookiesActionTests(TestCase):
+
+    def test_action_queues_idle_cookies_only(self):
+        idle = make_account('idle', platform='LI')
+        make_account('leased', platform='LI', in_use=True)
+        modeladmin = admin.site._registry[SocialAccount]
+
+        with mock.patch('bots.admin.validate_cookies') as task, \
+                mock.patch.object(modeladmin, 'message_user') as message_user:
+            validate_cookies_action(modeladmin, mock.Mock(), SocialAccount.objects.all())
+
+        task.delay.assert_called_once_with([idle.id])
+        self.assertIn('1 skipped', message_user.call_args.args[1])
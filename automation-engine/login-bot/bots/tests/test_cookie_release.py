@@ -0,0 +1,54 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from bots.services.cookie_pool import CookiePool
+from bots.services.cookie_service import CookieService
+from bots.tests.helpers import RedisTestMixin
+from bots.tests.test_cookie_lease import make_account
+
+
+class ReleaseCookieTests(RedisTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.account = make_account('alice', in_use=True, last_validated_at=timezone.now())
+
+    def test_failed_release_clears_validation(self):
+        self.assertTrue(CookieService.release_cookie(self.account.id, success=False, failure_reason='checkpoint'))
+
+        self.account.refresh_from_db()
+        self.assertFalse(self.account.in_use)
+        self.assertIsNone(self.account.last_validated_at)
+        self.assertFalse(CookieService.is_recently_validated(self.account))
+
+    def test_successful_release_keeps_validation(self):
+        self.assertTrue(CookieService.release_cookie(self.account.id, success=True))
+
+        self.account.refresh_from_db()
+        self.assertIsNotNone(self.account.last_validated_at)
+
+
+@override_settings(COOKIE_POOL_ENABLED=True)
+class PoolReleaseCookieTests(RedisTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        make_account('alice')
+        self.leased = CookiePool.lease('IG')
+        CookiePool.commit_lease(self.leased)
+
+    def test_failed_release_clears_validation(self):
+        self.assertTrue(CookieService.release_cookie(self.leased.id, success=False, failure_reason='checkpoint'))
+
+        self.assertEqual(self.redis.hget(CookiePool._account_key(self.leased.id), 'last_validated_at'), '')
+        self.assertIsNone(CookiePool.lease('IG').last_validated_at)
+
+        CookiePool.flush_writes()
+        self.leased.refresh_from_db()
+        self.assertIsNone(self.leased.last_validated_at)
+
+    def test_successful_release_keeps_validation(self):
+        self.assertTrue(CookieService.release_cookie(self.leased.id, success=True))
+        CookiePool.flush_writes()
+
+        self.assertIsNotNone(CookiePool.lease('IG').last_validated_at)
@@ -0,0 +1,95 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from bots import tasks
+from bots.services.cookie_service import CookieService
+from bots.services.cookie_waitlist import CookieWaitlist
+from bots.tests.helpers import RedisTestMixin
+
+
+class CookieWaitlistTests(RedisTestMixin, SimpleTestCase):
+
+    def park(self, job_id, front=False):
+        return CookieWaitlist.park(
+            'instagram', 'bots.tasks.process_instagram_job', 'instagram_queue', {'job_id': job_id}, front=front
+        )
+
+    def test_wake_next_dispatches_oldest_job(self):
+        self.park('job-1')
+        self.park('job-2')
+
+        with mock.patch('bots.services.cookie_waitlist.current_app') as app:
+            app.send_task.return_value.id = 'task-1'
+            self.assertEqual(CookieWaitlist.wake_next('instagram'), 'task-1')
+
+        app.send_task.assert_called_once_with(
+            'bots.tasks.process_instagram_job', kwargs={'job_id': 'job-1', 'woken': True}, queue='instagram_queue'
+        )
+        self.assertEqual(CookieWaitlist.size('instagram'), 1)
+
+    def test_wake_next_on_empty_waitlist(self):
+        with mock.patch('bots.services.cookie_waitlist.current_app') as app:
+            self.assertIsNone(CookieWaitlist.wake_next('instagram'))
+        app.send_task.assert_not_called()
+
+    def test_failed_dispatch_keeps_job_parked(self):
+        first = self.park('job-1')
+        self.park('job-2')
+
+        with mock.patch('bots.services.cookie_waitlist.current_app') as app:
+            app.send_task.side_effect = ConnectionError("broker down")
+            self.assertIsNone(CookieWaitlist.wake_next('instagram'))
+
+        # Back at the head of the line, and its countdown fallback still owns it
+        self.assertEqual(CookieWaitlist.size('instagram'), 2)
+        list_key, _ = CookieWaitlist._keys('instagram')
+        self.assertEqual(self.redis.lindex(list_key, 0), first)
+        self.assertTrue(CookieWaitlist.claim('instagram', first))
+
+    def test_claim_after_wake_is_rejected(self):
+        token = self.park('job-1')
+
+        with mock.patch('bots.services.cookie_waitlist.current_app') as app:
+            app.send_task.return_value.id = 'task-1'
+            CookieWaitlist.wake_next('instagram')
+
+        self.assertFalse(CookieWaitlist.claim('instagram', token))
+
+
+class ParkedJobOrderTests(RedisTestMixin, SimpleTestCase):
+    """A job that was already waiting keeps its place when it loses a freed cookie."""
+
+    def setUp(self):
+        super().setUp()
+        self.task = mock.Mock(queue='instagram_queue')
+        self.task.name = 'bots.tasks.process_instagram_job'
+        for job_id in ('job-1', 'job-2'):
+            CookieWaitlist.park('instagram', self.task.name, self.task.queue, {'job_id': job_id})
+
+    def run_job(self, **kwargs):
+        # A new job took the freed cookie first
+        with mock.patch.object(CookieService, 'allocate_cookie', return_value=None), \
+                mock.patch.object(CookieService, 'has_available_cookie', return_value=False):
+            return tasks._process_platform_job(self.task, 'instagram', **kwargs)
+
+    def parked_jobs(self):
+        list_key, jobs_key = CookieWaitlist._keys('instagram')
+        return [json.loads(self.redis.hget(jobs_key, token))['kwargs'] for token in self.redis.lrange(list_key, 0, -1)]
+
+    def test_woken_job_is_parked_at_the_head(self):
+        with mock.patch('bots.services.cookie_waitlist.current_app') as app:
+            app.send_task.return_value.id = 'task-1'
+            CookieWaitlist.wake_next('instagram')
+        woken_kwargs = app.send_task.call_args.kwargs['kwargs']
+
+        self.assertEqual(self.run_job(**woken_kwargs)['status'], 'waiting')
+
+        self.assertEqual([job['job_id'] for job in self.parked_jobs()], ['job-1', 'job-2'])
+        self.assertNotIn('woken', self.parked_jobs()[0])
+
+    def test_new_job_is_parked_at_the_back(self):
+        self.run_job(job_id='job-3')
+
+        self.assertEqual([job['job_id'] for job in self.parked_jobs()], ['job-1', 'job-2', 'job-3'])
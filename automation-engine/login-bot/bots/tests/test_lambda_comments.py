@@ -0,0 +1,208 @@
+import json
+import time
+import tracemalloc
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import instagram_comments_lambda as lambda_module
+from instagram_comments_lambda import (
+    CommentRecord,
+    InstagramCommentScraper,
+    InstagramHikerCommentScraper,
+    json_default,
+    json_dumps_bytes,
+    response_result,
+)
+
+SHORTCODE = 'DSB0eUtjWBq'
+POST_URL = f'https://www.instagram.com/p/{SHORTCODE}/'
+SCRAPPED_AT = '2026-01-01T00:00:00+00:00'
+
+GRAPHQL_NODE = {
+    'pk': 17900000000000001,
+    'text': 'nice post ✨',
+    'created_at': 1700000000,
+    'child_comment_count': 3,
+    'comment_like_count': 7,
+    'user': {
+        'id': '42', 'username': 'alice', 'full_name': 'Alice A',
+        'profile_pic_url': 'https://cdn.example/alice.jpg', 'is_verified': True,
+    },
+}
+
+HIKER_NODE = {
+    'id': '17900000000000002',
+    'text': 'reply',
+    'created_at_utc': 1700000100,
+    'like_count': 2,
+    'user': {'pk': 43, 'username': 'bob'},
+}
+
+
+def legacy_comment(node, created_at_iso, user_id, comment_id, is_reply, parent_comment_id=''):
+    """The dict _parse_comment returned before comments became CommentRecords."""
+    user = node.get('user', {})
+    username = user.get('username', '')
+    return {
+        'job_id': 'job',
+        'data': {
+            'comment_id': comment_id,
+            'parent_comment_id': parent_comment_id,
+            'platform': 'instagram',
+            'type': 'reply' if is_reply else 'comment',
+            'text': node.get('text', ''),
+            'media': [],
+            'profile_image': user.get('profile_pic_url', ''),
+            'profile_name': user.get('full_name', username),
+            'profile_username': username,
+            'profile_meta_data': {
+                'user_id': user_id,
+                'is_verified': user.get('is_verified', False)
+            },
+            'comment_meta_data': {
+                'child_comment_count': node.get('child_comment_count', 0)
+            },
+            'reply_count': node.get('child_comment_count', 0) if not is_reply else 0,
+            'likes_count': node.get('comment_like_count', 0) or node.get('like_count', 0),
+            'comment_url': f"https://www.instagram.com/p/{SHORTCODE}/c/{comment_id}/",
+            'post_url': POST_URL,
+            'commented_at': created_at_iso,
+            'scrapped_at': SCRAPPED_AT
+        }
+    }
+
+
+def make_comment(index):
+    return CommentRecord(
+        job_id='job', comment_id=str(17900000000000000 + index), parent_comment_id='', type='comment',
+        text=f'comment {index}', profile_image='https://cdn.example/u.jpg', profile_name='Alice',
+        profile_username='alice', user_id='42', is_verified=False, child_comment_count=0, likes_count=1,
+        shortcode=SHORTCODE, post_url=POST_URL, commented_at='2023-11-14T22:13:20+00:00',
+        scrapped_at=SCRAPPED_AT,
+    )
+
+
+class CommentWireFormatTests(SimpleTestCase):
+
+    def test_graphql_comment_matches_the_legacy_dict(self):
+        scraper = InstagramCommentScraper('sessionid=x', 'csrf', requests_per_second=0)
+        record = scraper._parse_comment(GRAPHQL_NODE, 'job', POST_URL, SHORTCODE, scrapped_at=SCRAPPED_AT)
+
+        expected = legacy_comment(
+            GRAPHQL_NODE, '2023-11-14T22:13:20+00:00', user_id='42',
+            comment_id='17900000000000001', is_reply=False,
+        )
+        self.assertEqual(record.to_dict(), expected)
+        self.assertEqual(json.loads(json_dumps_bytes([record])), [expected])
+
+    def test_hiker_reply_matches_the_legacy_dict(self):
+        scraper = InstagramHikerCommentScraper('key', requests_per_second=0)
+        record = scraper._parse_comment(
+            HIKER_NODE, 'job', POST_URL, SHORTCODE, is_reply=True,
+            parent_comment_id='17900000000000001', scrapped_at=SCRAPPED_AT,
+        )
+
+        expected = legacy_comment(
+            HIKER_NODE, '2023-11-14T22:15:00+00:00', user_id='43', comment_id='17900000000000002',
+            is_reply=True, parent_comment_id='17900000000000001',
+        )
+        self.assertEqual(record.to_dict(), expected)
+        self.assertEqual(json.loads(json_dumps_bytes({'comments': [record]})), {'comments': [expected]})
+
+
+class JsonEncodingTests(SimpleTestCase):
+
+    def test_unknown_objects_are_rejected(self):
+        with self.assertRaises(TypeError):
+            json_default(object())
+        with self.assertRaises(TypeError):
+            json_dumps_bytes({'comments': [make_comment(1)], 'when': object()})
+
+    def test_stdlib_fallback_expands_records(self):
+        # orjson rejects lone surrogates; the stdlib encoder takes over
+        comment = make_comment(1)
+        comment.text = 'broken \ud800 emoji'
+
+        payload = json.loads(json_dumps_bytes({'comments': [comment]}))
+
+        self.assertEqual(payload['comments'][0]['data']['text'], 'broken \ud800 emoji')
+
+    def test_stdlib_only(self):
+        with mock.patch.object(lambda_module, 'orjson', None):
+            payload = json_dumps_bytes({'comments': [make_comment(1)]})
+
+        self.assertEqual(json.loads(payload), {'comments': [make_comment(1).to_dict()]})
+
+
+class ResponseResultTests(SimpleTestCase):
+
+    def result(self):
+        return {'comments': [make_comment(1)], 'seen_comment_ids': ['1'], 'total_comments': 1}
+
+    def test_comments_are_returned_by_default(self):
+        data = response_result(self.result())
+
+        self.assertEqual(data['comments'], [make_comment(1).to_dict()])
+        self.assertNotIn('seen_comment_ids', data)
+
+    def test_comments_can_be_omitted(self):
+        data = response_result(self.result(), omit_comments=True)
+
+        self.assertEqual(data, {'total_comments': 1, 'comments': []})
+
+    def test_handler_omits_comments_only_when_asked_with_a_callback(self):
+        cases = [
+            ({'callback_url': 'https://backend.example/webhook'}, 1),
+            ({'callback_url': 'https://backend.example/webhook', 'omit_response_comments': True}, 0),
+            ({'omit_response_comments': True}, 1),
+        ]
+        for extra, expected in cases:
+            event = {
+                'post_url': POST_URL, 'job_id': 'job', 'cookies': 'sessionid=x', 'csrf_token': 'csrf',
+                'expected_comment_count': 1, **extra,
+            }
+            with self.subTest(**extra), \
+                    mock.patch.object(InstagramCommentScraper, 'scrape_comments', return_value=self.result()), \
+                    mock.patch.object(lambda_module, 'ensure_cleanup'):
+                response = lambda_module.lambda_handler(event, None)
+
+            self.assertEqual(response['statusCode'], 200, response)
+            self.assertEqual(len(response['body']['data']['comments']), expected)
+
+
+class CommentRecordBenchmarkTests(SimpleTestCase):
+    """Microbenchmark: records vs the legacy dicts for a large post."""
+
+    COUNT = 5000
+
+    @staticmethod
+    def measure(build):
+        tracemalloc.start()
+        try:
+            comments = build()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        started = time.perf_counter()
+        payload = json_dumps_bytes({'comments': comments})
+        return peak, time.perf_counter() - started, payload
+
+    def test_records_use_less_memory_and_serialize_identically(self):
+        record_peak, record_seconds, record_payload = self.measure(
+            lambda: [make_comment(index) for index in range(self.COUNT)]
+        )
+        dict_peak, dict_seconds, dict_payload = self.measure(
+            lambda: [make_comment(index).to_dict() for index in range(self.COUNT)]
+        )
+
+        self.assertEqual(record_payload, dict_payload)
+        self.assertLess(
+            record_peak * 2, dict_peak,
+            f'records {record_peak} B vs dicts {dict_peak} B for {self.COUNT} comments',
+        )
+        # Expanding records while serializing must not dominate the encode time
+        self.assertLess(
+            record_seconds, dict_seconds * 10 + 0.5,
+            f'records {record_seconds:.3f}s vs dicts {dict_seconds:.3f}s to serialize',
+        )
@@ -0,0 +1,79 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib import error
+
+from django.test import SimpleTestCase
+
+import instagram_comments_lambda as lambda_module
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.connections.add(self.client_address)
+        status, body = self.server.responses.pop(0) if self.server.responses else (200, {'ok': True})
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+class KeepAliveHttpTests(SimpleTestCase):
+    """Scraper HTTP calls go through one keep-alive pool per container."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.connections = set()
+        self.server.responses = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/graphql/query'
+
+        patcher = mock.patch.object(lambda_module, '_http_pool', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def test_pool_is_built_once(self):
+        self.assertIs(lambda_module.get_http_pool(), lambda_module.get_http_pool())
+
+    def test_requests_reuse_one_connection(self):
+        for _ in range(5):
+            response = lambda_module.pooled_request('POST', self.url, headers={}, body=b'x=1')
+            self.assertEqual(json.loads(response.data), {'ok': True})
+
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_http_error_status_raises_http_error(self):
+        self.server.responses.append((429, {'message': 'rate limited'}))
+
+        with self.assertRaises(error.HTTPError) as raised:
+            lambda_module.pooled_request('POST', self.url, headers={}, body=b'')
+        self.assertEqual(raised.exception.code, 429)
+
+    def test_connection_failure_raises_url_error(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.assertRaises(error.URLError):
+            lambda_module.pooled_request('POST', self.url, headers={}, body=b'', timeout=1)
+
+    def test_scraper_pages_share_the_connection(self):
+        scraper = lambda_module.InstagramCommentScraper('sessionid=x', 'csrf', requests_per_second=0)
+        scraper.url = self.url
+
+        for _ in range(3):
+            self.assertEqual(scraper._make_request({'doc_id': '1'}), {'ok': True})
+
+        self.assertEqual(len(self.server.connections), 1)
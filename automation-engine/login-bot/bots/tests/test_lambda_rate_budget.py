@@ -0,0 +1,130 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import instagram_comments_lambda as lambda_module
+from instagram_comments_lambda import AdaptiveRateBudget, RateBudget
+
+
+class FakeClock:
+    """Stands in for the lambda module's time: sleep() advances monotonic() instead of blocking."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # A real sleep never returns before the clock ticks, even for a rounding-sized delay
+        seconds = max(seconds, 1e-6)
+        self.now += seconds
+        self.slept += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class FakeClockTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(lambda_module, 'time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def burst(self, budget):
+        """Requests the budget allows right now without waiting."""
+        count = 0
+        while budget.acquire() == 0:
+            count += 1
+        return count
+
+
+class RateBudgetTests(FakeClockTestCase):
+
+    def test_burst_then_steady_rate(self):
+        budget = RateBudget(5)
+
+        self.assertEqual(self.burst(budget), 5)
+        # The sixth request waited for one token at 5 rps
+        self.assertAlmostEqual(self.clock.slept, 0.2, places=5)
+
+        self.clock.advance(1)
+        self.assertEqual(self.burst(budget), 5)
+
+    def test_zero_rate_never_waits(self):
+        budget = RateBudget(0)
+
+        for _ in range(100):
+            self.assertEqual(budget.acquire(), 0)
+
+
+class AdaptiveRateBudgetTests(FakeClockTestCase):
+
+    def budget(self, rate=5.0, **kwargs):
+        kwargs.setdefault('min_rate', 0.2)
+        kwargs.setdefault('max_rate', 10.0)
+        kwargs.setdefault('latency_target', 2.0)
+        return AdaptiveRateBudget(rate, **kwargs)
+
+    def test_fast_success_increases_additively(self):
+        budget = self.budget()
+
+        budget.record_success(0.5)
+        budget.record_success(2.0)
+
+        self.assertAlmostEqual(budget.rate, 6.0)
+
+    def test_slow_success_decreases_by_slow_factor(self):
+        budget = self.budget()
+
+        budget.record_success(2.5)
+
+        self.assertAlmostEqual(budget.rate, 4.5)
+
+    def test_throttle_halves_the_rate(self):
+        budget = self.budget()
+
+        budget.record_throttle()
+
+        self.assertAlmostEqual(budget.rate, 2.5)
+        self.assertEqual(budget.throttle_count, 1)
+
+    def test_rate_is_clamped(self):
+        budget = self.budget()
+
+        for _ in range(20):
+            budget.record_success(0.1)
+        self.assertEqual(budget.rate, 10.0)
+
+        for _ in range(20):
+            budget.record_throttle()
+        self.assertEqual(budget.rate, 0.2)
+
+    def test_throttle_empties_the_bucket(self):
+        budget = self.budget()
+
+        budget.record_throttle()
+
+        # Full bucket before the throttle, yet the next request waits a full burst interval at the new rate
+        self.assertEqual(budget.capacity, 2)
+        self.assertAlmostEqual(budget.acquire(), 2 / 2.5, places=5)
+
+    def test_capacity_follows_the_rate(self):
+        budget = self.budget()
+        self.assertEqual(budget.capacity, 5)
+
+        for _ in range(5):
+            budget.record_throttle()
+        self.assertEqual(budget.capacity, 1)
+
+        # A long idle period refills at most one request at 0.2 rps
+        self.clock.advance(600)
+        self.assertEqual(self.burst(budget), 1)
+
+        for _ in range(20):
+            budget.record_success(0.1)
+        self.assertEqual(budget.capacity, 10)
+
@@ -0,0 +1,77 @@
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import instagram_comments_lambda as lambda_module
+from bots.tests.test_lambda_streaming import CALLBACK_URL, POST_URL, make_comment
+
+
+def scrape_result(comment_ids, next_cursor='cursor-2'):
+    return {
+        'shortcode': 'DSB0eUtjWBq',
+        'media_id': '1',
+        'post_url': POST_URL,
+        'total_comments': len(comment_ids),
+        'top_level_comments': len(comment_ids),
+        'reply_comments': 0,
+        'comments': [make_comment(comment_id) for comment_id in comment_ids],
+        'next_cursor': next_cursor,
+        'seen_comment_ids': list(comment_ids),
+    }
+
+
+class ResumableRetryTests(SimpleTestCase):
+    """A run below the comment threshold triggers a retry; only streaming consumers get partial deliveries."""
+
+    def run_handler(self, **event):
+        event = {
+            'job_id': 'job',
+            'post_url': POST_URL,
+            'callback_url': CALLBACK_URL,
+            'expected_comment_count': 100,
+            **event,
+        }
+        result = scrape_result(['1', '2'])
+        with mock.patch.object(lambda_module.InstagramCommentScraper, 'scrape_comments', return_value=result), \
+                mock.patch.object(lambda_module, 'post_to_callback', return_value=True) as post, \
+                mock.patch.object(lambda_module, 'invoke_lambda_retry', return_value=True) as invoke:
+            response = lambda_module.lambda_handler(event, None)
+        return response, [call.args[1] for call in post.call_args_list], invoke.call_args.args[0]
+
+    def test_non_streaming_retry_sends_no_partial_callback(self):
+        response, payloads, retry_event = self.run_handler()
+
+        self.assertEqual(payloads, [])
+        self.assertNotIn('next_cursor', retry_event)
+        self.assertNotIn('seen_comment_ids', retry_event)
+        self.assertTrue(response['body']['retry_info']['retry_triggered'])
+
+    def test_streaming_retry_resumes_after_delivered_comments(self):
+        _, payloads, retry_event = self.run_handler(stream_batch_size=10)
+
+        self.assertFalse(any(payload.get('partial') for payload in payloads))
+        self.assertEqual(retry_event['next_cursor'], 'cursor-2')
+        self.assertEqual(retry_event['seen_comment_ids'], ['1', '2'])
+        self.assertEqual(retry_event['delivered_count'], 2)
+
+
+class EventForLogTests(SimpleTestCase):
+
+    def test_seen_ids_are_logged_as_a_count(self):
+        event = {'job_id': 'job', 'seen_comment_ids': [str(index) for index in range(20000)]}
+
+        logged = lambda_module.event_for_log(event)
+
+        self.assertIn('<20000 ids>', logged)
+        self.assertLess(len(logged), 200)
+
+    def test_function_url_body_is_summarized(self):
+        event = {'body': json.dumps({'job_id': 'job', 'seen_comment_ids': ['1', '2', '3']})}
+
+        self.assertIn('<3 ids>', lambda_module.event_for_log(event))
+
+    def test_long_events_are_capped(self):
+        logged = lambda_module.event_for_log({'cookies': 'x' * 10000})
+
+        self.assertLess(len(logged), lambda_module.EVENT_LOG_MAX_CHARS + 50)
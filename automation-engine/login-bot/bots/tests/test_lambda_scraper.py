@@ -0,0 +1,203 @@
+import itertools
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+import instagram_comments_lambda as lambda_module
+
+SHORTCODE = 'DSB0eUtjWBq'
+POST_URL = f'https://www.instagram.com/p/{SHORTCODE}/'
+
+
+def comments_page(ids, cursor=None, child_comment_count=0, created_at=1700000000):
+    return {'data': {'xdt_api__v1__media__media_id__comments__connection': {
+        'edges': [
+            {'node': {
+                'pk': comment_id,
+                'text': f'comment {comment_id}',
+                'created_at': created_at,
+                'child_comment_count': child_comment_count,
+                'user': {'username': f'user{comment_id}', 'id': comment_id},
+            }}
+            for comment_id in ids
+        ],
+        'page_info': {'has_next_page': cursor is not None, 'end_cursor': cursor},
+    }}}
+
+
+def replies_page(ids, cursor=None):
+    return {'data': {'xdt_api__v1__media__media_id__comments__parent_comment_id__child_comments__connection': {
+        'edges': [{'node': {'pk': reply_id, 'text': 'reply', 'user': {'username': 'replier'}}} for reply_id in ids],
+        'page_info': {'has_next_page': cursor is not None, 'end_cursor': cursor},
+    }}}
+
+
+class FakeScraper(lambda_module.InstagramCommentScraper):
+    """GraphQL scraper serving canned pages instead of calling Instagram."""
+
+    def __init__(self, pages, reply_delay=0.0, endless_replies=False, page_delay=0.0, **kwargs):
+        super().__init__('sessionid=x', 'csrf', requests_per_second=0, **kwargs)
+        self.pages = pages
+        self.page_requests = []
+        self.pages_served = 0
+        self.page_delay = page_delay
+        self.reply_requests = 0
+        self.reply_delay = reply_delay
+        self.endless_replies = endless_replies
+        self._reply_ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def fetch_comments_page(self, media_id, after_cursor=None, sort_order='popular'):
+        with self._lock:
+            self.page_requests.append(after_cursor)
+        time.sleep(self.page_delay)
+        with self._lock:
+            self.pages_served += 1
+        return self.pages.get(after_cursor)
+
+    def fetch_replies_page(self, media_id, comment_id, after_cursor=None):
+        time.sleep(self.reply_delay)
+        with self._lock:
+            self.reply_requests += 1
+            reply_id = f'{comment_id}-r{next(self._reply_ids)}'
+        next_cursor = f'{reply_id}-next' if self.endless_replies else None
+        return replies_page([reply_id], next_cursor)
+
+
+class ScrapeWorkerShutdownTests(SimpleTestCase):
+    """Background fetches stop when a scrape ends early."""
+
+    def test_reply_fetches_stop_when_scrape_fails(self):
+        scraper = FakeScraper(
+            {None: comments_page(['1', '2'], child_comment_count=5)},
+            reply_delay=0.02,
+            endless_replies=True,
+        )
+
+        def failing_sink(comments):
+            raise RuntimeError("callback down")
+
+        with self.assertRaises(RuntimeError):
+            scraper.scrape_comments(POST_URL, job_id='job', comment_sink=failing_sink)
+
+        requests_at_return = scraper.reply_requests
+        time.sleep(0.1)
+        # At most the requests that were already in flight finish
+        self.assertLessEqual(scraper.reply_requests - requests_at_return, scraper.reply_concurrency)
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith('replies')])
+
+    def test_page_prefetch_finishes_before_a_failed_scrape_returns(self):
+        scraper = FakeScraper(
+            {None: comments_page(['1'], cursor='c2'), 'c2': comments_page(['2'])},
+            page_delay=0.05,
+        )
+
+        def failing_sink(comments):
+            raise RuntimeError("callback down")
+
+        with self.assertRaises(RuntimeError):
+            scraper.scrape_comments(POST_URL, job_id='job', comment_sink=failing_sink)
+
+        self.assertEqual(scraper.page_requests, [None, 'c2'])
+        self.assertEqual(scraper.pages_served, len(scraper.page_requests))
+
+
+class ParseWatchingScraper(FakeScraper):
+    """Records whether the next page was requested while the first comment was being parsed."""
+
+    requested_during_parse = None
+
+    def _parse_comment(self, node, *args, **kwargs):
+        if self.requested_during_parse is None:
+            deadline = time.monotonic() + 1
+            while 'c2' not in self.page_requests and time.monotonic() < deadline:
+                time.sleep(0.001)
+            self.requested_during_parse = 'c2' in self.page_requests
+        return super()._parse_comment(node, *args, **kwargs)
+
+
+class PagePrefetchTests(SimpleTestCase):
+    """The next page is requested as soon as page_info shows one, and dropped on an early stop."""
+
+    def assert_prefetch_settled(self, scraper):
+        # A cancelled prefetch either never ran or finished before the scrape returned
+        self.assertEqual(scraper.pages_served, len(scraper.page_requests))
+
+    def test_pages_are_prefetched_in_order(self):
+        scraper = FakeScraper({
+            None: comments_page(['1'], cursor='c2'),
+            'c2': comments_page(['2'], cursor='c3'),
+            'c3': comments_page(['3']),
+        })
+
+        result = scraper.scrape_comments(POST_URL, job_id='job')
+
+        self.assertEqual(scraper.page_requests, [None, 'c2', 'c3'])
+        self.assertEqual(result['total_comments'], 3)
+
+    def test_next_page_is_fetched_while_the_page_is_parsed(self):
+        scraper = ParseWatchingScraper({
+            None: comments_page(['1', '2'], cursor='c2'),
+            'c2': comments_page(['3']),
+        })
+
+        result = scraper.scrape_comments(POST_URL, job_id='job', include_replies=False)
+
+        self.assertTrue(scraper.requested_during_parse)
+        self.assertEqual(result['total_comments'], 3)
+
+    def test_prefetched_page_is_dropped_once_max_comments_is_reached(self):
+        scraper = FakeScraper({
+            None: comments_page(['1', '2'], cursor='c2'),
+            'c2': comments_page(['3']),
+        }, page_delay=0.01)
+
+        result = scraper.scrape_comments(POST_URL, job_id='job', max_comments=2, include_replies=False)
+
+        self.assertEqual(result['total_comments'], 2)
+        self.assert_prefetch_settled(scraper)
+
+    def test_prefetched_page_is_dropped_after_consecutive_empty_pages(self):
+        scraper = FakeScraper({
+            None: comments_page([], cursor='c2'),
+            'c2': comments_page([], cursor='c3'),
+            'c3': comments_page([], cursor='c4'),
+            'c4': comments_page(['1']),
+        })
+
+        result = scraper.scrape_comments(POST_URL, job_id='job')
+
+        self.assertEqual(scraper.page_requests[:3], [None, 'c2', 'c3'])
+        self.assertEqual(result['total_comments'], 0)
+        self.assert_prefetch_settled(scraper)
+
+    def test_prefetched_page_is_dropped_when_incremental_scrape_reaches_known_comments(self):
+        store = MemoryWatermarkStore()
+        pages = {None: comments_page(['1'], cursor='c2'), 'c2': comments_page(['0'])}
+        FakeScraper(pages).scrape_comments(
+            POST_URL, job_id='job', incremental=True, sort_order='chronological', watermark_store=store,
+        )
+
+        scraper = FakeScraper({
+            None: comments_page(['2', '1'], cursor='c2', created_at=1700000000),
+            'c2': comments_page(['0']),
+        })
+        result = scraper.scrape_comments(
+            POST_URL, job_id='job', incremental=True, sort_order='chronological', watermark_store=store,
+        )
+
+        self.assertEqual(result['total_comments'], 1)
+        self.assert_prefetch_settled(scraper)
+
+
+class MemoryWatermarkStore:
+
+    def __init__(self):
+        self.watermarks = {}
+
+    def load(self, shortcode):
+        return self.watermarks.get(shortcode)
+
+    def save(self, shortcode, watermark):
+        self.watermarks[shortcode] = watermark
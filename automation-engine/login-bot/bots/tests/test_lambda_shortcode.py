@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from instagram_comments_lambda import PRIVATE_SHORTCODE_SUFFIX_LENGTH, shortcode_to_media_id
+
+PRIVATE_SUFFIX = 'x' * PRIVATE_SHORTCODE_SUFFIX_LENGTH
+
+
+class ShortcodeToMediaIdTests(SimpleTestCase):
+
+    CASES = [
+        # (description, shortcode, media id)
+        ('public post', 'DSB0eUtjWBq', '3783535944209883242'),
+        ('public reel', 'CKcGcVVF6LA', '2493896628983276224'),
+        ('first digit', 'A', '0'),
+        ('single digit', 'B', '1'),
+        ('url-safe digits', '-_', str(62 * 64 + 63)),
+        ('leading zero digits', 'AAB', '1'),
+        ('private post', 'DSB0eUtjWBq' + PRIVATE_SUFFIX, '3783535944209883242'),
+        ('private, suffix of valid digits', 'CKcGcVVF6LA' + 'A' * PRIVATE_SHORTCODE_SUFFIX_LENGTH, '2493896628983276224'),
+        ('12 characters', 'DSB0eUtjWBqA', None),
+        ('28 characters', 'A' * 28, None),
+        ('too long once the suffix is removed', 'A' * 12 + PRIVATE_SUFFIX, None),
+        ('suffix only', PRIVATE_SUFFIX, None),
+        ('standard base64 plus', 'DSB0eUtj+Bq', None),
+        ('standard base64 slash', 'DSB0eUtj/Bq', None),
+        ('padding', 'DSB0eUtjWB=', None),
+        ('whitespace', 'DSB0 UtjWBq', None),
+        ('non-ascii', 'DSB0eUtjWBé', None),
+        ('invalid character in a private shortcode', 'DSB0eUtj+Bq' + PRIVATE_SUFFIX, None),
+        ('empty', '', None),
+    ]
+
+    def test_shortcodes(self):
+        for description, shortcode, media_id in self.CASES:
+            with self.subTest(description, shortcode=shortcode):
+                self.assertEqual(shortcode_to_media_id(shortcode), media_id)
@@ -0,0 +1,194 @@
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.sampling import ALWAYS_OFF
+
+from lambda_span_export import LambdaSpanProcessor
+
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        payload = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        time.sleep(self.server.delay)
+        status = self.server.status
+        if status == 200:
+            self.server.payloads.append(payload)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def span_names(payload):
+    request = ExportTraceServiceRequest()
+    request.ParseFromString(payload)
+    return [
+        span.name
+        for resource_spans in request.resource_spans
+        for scope_spans in resource_spans.scope_spans
+        for span in scope_spans.spans
+    ]
+
+
+class LambdaSpanProcessorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _CollectorHandler)
+        self.server.payloads = []
+        self.server.status = 200
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        spool = tempfile.TemporaryDirectory()
+        self.addCleanup(spool.cleanup)
+        self.spool_dir = os.path.join(spool.name, 'spool')
+
+    def processor(self, **kwargs):
+        processor = LambdaSpanProcessor(
+            endpoint=f'http://127.0.0.1:{self.server.server_port}/v1/traces',
+            spool_dir=self.spool_dir,
+            **kwargs,
+        )
+        self.provider = TracerProvider()
+        self.provider.add_span_processor(processor)
+        return processor
+
+    def end_spans(self, *names):
+        tracer = self.provider.get_tracer(__name__)
+        for name in names:
+            tracer.start_span(name).end()
+
+    def spooled(self):
+        return sorted(os.listdir(self.spool_dir)) if os.path.isdir(self.spool_dir) else []
+
+    def sent(self):
+        return [span_names(payload) for payload in self.server.payloads]
+
+    def test_spans_are_sent_only_on_flush(self):
+        processor = self.processor()
+        self.end_spans('a', 'b')
+        self.assertEqual(self.sent(), [])
+
+        self.assertTrue(processor.flush())
+
+        self.assertEqual(self.sent(), [['a', 'b']])
+        self.assertTrue(processor.flush())
+        self.assertEqual(len(self.sent()), 1)
+
+    def test_failed_export_is_spooled_and_sent_first_next_time(self):
+        processor = self.processor()
+        self.server.status = 503
+        self.end_spans('first')
+
+        self.assertFalse(processor.flush())
+        self.assertEqual(len(self.spooled()), 1)
+
+        self.server.status = 200
+        self.end_spans('second')
+        self.assertTrue(processor.flush())
+
+        self.assertEqual(self.sent(), [['first'], ['second']])
+        self.assertEqual(self.spooled(), [])
+
+    def test_rejected_export_is_dropped_not_spooled(self):
+        processor = self.processor()
+        self.server.status = 400
+        self.end_spans('bad')
+
+        with self.assertLogs('lambda_span_export', 'ERROR'):
+            self.assertTrue(processor.flush())
+
+        self.assertEqual(self.spooled(), [])
+        self.server.status = 200
+        self.end_spans('next')
+        self.assertTrue(processor.flush())
+        self.assertEqual(self.sent(), [['next']])
+
+    def test_rejected_spool_file_does_not_block_newer_exports(self):
+        processor = self.processor()
+        self.server.status = 503
+        self.end_spans('first')
+        self.assertFalse(processor.flush())
+
+        self.server.status = 401
+        self.end_spans('second')
+        with self.assertLogs('lambda_span_export', 'ERROR'):
+            self.assertTrue(processor.flush())
+
+        self.assertEqual(self.spooled(), [])
+
+    def test_rate_limited_export_is_spooled(self):
+        for status in (408, 429):
+            with self.subTest(status=status):
+                processor = self.processor()
+                self.server.status = status
+                self.end_spans('throttled')
+
+                self.assertFalse(processor.flush())
+                self.assertEqual(len(self.spooled()), 1)
+
+                self.server.status = 200
+                self.assertTrue(processor.flush())
+                self.assertEqual(self.spooled(), [])
+
+    def test_flush_returns_within_its_budget(self):
+        processor = self.processor(flush_timeout_ms=100)
+        self.server.delay = 0.5
+        self.end_spans('slow')
+
+        started = time.monotonic()
+        self.assertFalse(processor.flush())
+
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(len(self.spooled()), 1)
+
+    def test_remaining_invocation_time_caps_the_budget(self):
+        processor = self.processor(flush_timeout_ms=1000)
+        self.end_spans('late')
+
+        self.assertFalse(processor.flush(timeout_millis=0))
+
+        self.assertEqual(self.sent(), [])
+        self.assertEqual(len(self.spooled()), 1)
+
+    def test_spool_keeps_the_newest_files(self):
+        processor = self.processor(spool_max_files=2)
+        self.server.status = 503
+        for name in ('one', 'two', 'three'):
+            self.end_spans(name)
+            processor.flush()
+
+        self.server.status = 200
+        self.assertTrue(processor.flush())
+
+        self.assertEqual(self.sent(), [['two'], ['three']])
+
+    def test_spans_over_the_buffer_limit_are_dropped(self):
+        processor = self.processor(max_buffered_spans=2)
+        self.end_spans('a', 'b', 'c')
+
+        processor.flush()
+
+        self.assertEqual(processor.dropped_spans, 1)
+        self.assertEqual(self.sent(), [['a', 'b']])
+
+    def test_unsampled_spans_are_not_buffered(self):
+        processor = LambdaSpanProcessor(endpoint='http://127.0.0.1:9/v1/traces', spool_dir=self.spool_dir)
+        provider = TracerProvider(sampler=ALWAYS_OFF)
+        provider.add_span_processor(processor)
+
+        provider.get_tracer(__name__).start_span('dropped').end()
+
+        self.assertTrue(processor.flush())
+        self.assertEqual(self.spooled(), [])
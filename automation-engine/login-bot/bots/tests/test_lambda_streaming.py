@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+import instagram_comments_lambda as lambda_module
+from instagram_comments_lambda import CallbackStreamer, CommentRecord
+
+CALLBACK_URL = 'https://backend.example/webhook'
+POST_URL = 'https://www.instagram.com/p/DSB0eUtjWBq/'
+
+
+def make_comment(comment_id, type='comment', parent_comment_id=''):
+    return CommentRecord(
+        job_id='job', comment_id=comment_id, parent_comment_id=parent_comment_id, type=type,
+        text='hello', profile_image='', profile_name='Alice', profile_username='alice', user_id='1',
+        is_verified=False, child_comment_count=0, likes_count=0, shortcode='DSB0eUtjWBq',
+        post_url=POST_URL, commented_at='', scrapped_at='2026-01-01T00:00:00+00:00',
+    )
+
+
+class CallbackStreamerTests(SimpleTestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(lambda_module, 'post_to_callback', return_value=True)
+        self.post = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def payloads(self):
+        return [call.args[1] for call in self.post.call_args_list]
+
+    def test_batches_carry_sequence_and_retry_index(self):
+        streamer = CallbackStreamer(CALLBACK_URL, 'job', batch_size=2, retry_index=1)
+        streamer([make_comment('1'), make_comment('2'), make_comment('3')])
+        streamer.complete()
+
+        payloads = self.payloads()
+        self.assertEqual([payload['sequence'] for payload in payloads], [0, 1])
+        self.assertEqual({payload['retry_index'] for payload in payloads}, {1})
+        self.assertEqual(payloads[-1]['batches'], 2)
+        self.assertEqual(payloads[-1]['total_comments'], 3)
+
+    def test_retry_continues_the_sequence(self):
+        first = CallbackStreamer(CALLBACK_URL, 'job', batch_size=1)
+        first([make_comment('1')])
+        first.flush()
+        resume_sequence = first.resume_sequence
+        first.complete(retry_loop=True)
+
+        retry = CallbackStreamer(CALLBACK_URL, 'job', batch_size=1, sequence=resume_sequence, retry_index=1)
+        retry([make_comment('2')])
+        retry.complete()
+
+        sequences = [payload['sequence'] for payload in self.payloads()]
+        self.assertEqual(sequences, list(range(len(sequences))))
+        self.assertEqual(self.payloads()[-1]['batches'], sequences[-1] + 1)
+        self.assertEqual(retry.batches_sent, 2)
+
+    def test_only_delivered_comments_are_recorded(self):
+        streamer = CallbackStreamer(CALLBACK_URL, 'job', batch_size=2)
+        streamer([make_comment('1'), make_comment('1-r', type='reply', parent_comment_id='1')])
+        self.post.return_value = False
+        streamer([make_comment('2'), make_comment('3')])
+
+        self.assertEqual(streamer.delivered_comments, 2)
+        self.assertEqual(streamer.delivered_comment_ids, ['1'])
+        self.assertEqual(streamer.failed_batches, 1)
+
+
+class BlockedFallbackStreamingTests(SimpleTestCase):
+    """Comments streamed before the API was blocked are handed to the Hiker retry as already delivered."""
+
+    def test_streamed_comments_are_marked_seen_for_the_retry(self):
+        def scrape(self_, **kwargs):
+            kwargs['comment_sink']([make_comment('10'), make_comment('11')])
+            raise lambda_module.InstagramAPIBlockedException("blocked")
+
+        event = {
+            'job_id': 'job',
+            'post_url': POST_URL,
+            'callback_url': CALLBACK_URL,
+            'stream_batch_size': 1,
+            'seen_comment_ids': ['1'],
+            'delivered_count': 1,
+            'retry_count': 2,
+            'stream_sequence': 4,
+        }
+
+        with mock.patch.object(lambda_module.InstagramCommentScraper, 'scrape_comments', scrape), \
+                mock.patch.object(lambda_module, 'post_to_callback', return_value=True) as post, \
+                mock.patch.object(lambda_module, 'invoke_lambda_retry', return_value=True) as invoke:
+            lambda_module.lambda_handler(event, None)
+
+        retry_event = invoke.call_args.args[0]
+        self.assertEqual(retry_event['seen_comment_ids'], ['1', '10', '11'])
+        self.assertEqual(retry_event['delivered_count'], 3)
+        self.assertEqual(retry_event['retry_count'], lambda_module.MAX_RETRY_COUNT)
+
+        sequences = [call.args[1]['sequence'] for call in post.call_args_list if 'sequence' in call.args[1]]
+        self.assertEqual(sequences, [4, 5, 6])
+        # The Hiker run starts after this run's closing message
+        self.assertEqual(retry_event['stream_sequence'], 7)
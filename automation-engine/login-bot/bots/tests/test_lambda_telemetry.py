@@ -0,0 +1,164 @@
+import os
+import subprocess
+import sys
+import threading
+import types
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase
+from opentelemetry import trace
+
+import lambda_telemetry
+
+LAMBDA_DIR = Path(lambda_telemetry.__file__).resolve().parent
+
+
+class LazySetupTests(SimpleTestCase):
+    """setup_lambda_telemetry() defers the SDK setup to the first span."""
+
+    def setUp(self):
+        for name, value in [
+            ('tracer', None),
+            ('_telemetry_initialized', False),
+            ('_pending_setup', None),
+            ('_span_processor', None),
+        ]:
+            patcher = mock.patch.object(lambda_telemetry, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.initialized_tracer = trace.NoOpTracer()
+
+        def initialize(**config):
+            lambda_telemetry.tracer = self.initialized_tracer
+            lambda_telemetry._telemetry_initialized = True
+            return self.initialized_tracer
+
+        patcher = mock.patch.object(lambda_telemetry, '_initialize_telemetry', side_effect=initialize)
+        self.initialize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lazy_setup_runs_on_the_first_span(self):
+        lambda_telemetry.setup_lambda_telemetry(service_name='svc', lazy=True)
+        self.initialize.assert_not_called()
+
+        @lambda_telemetry.traced('work')
+        def work():
+            return 'done'
+
+        self.assertEqual(work(), 'done')
+        self.assertEqual(work(), 'done')
+        self.initialize.assert_called_once()
+        self.assertEqual(self.initialize.call_args.kwargs['service_name'], 'svc')
+        self.assertIsNone(lambda_telemetry._pending_setup)
+
+    def test_eager_setup_runs_immediately(self):
+        tracer = lambda_telemetry.setup_lambda_telemetry(lazy=False)
+
+        self.initialize.assert_called_once()
+        self.assertIs(tracer, self.initialized_tracer)
+
+    def test_concurrent_first_spans_set_up_once(self):
+        lambda_telemetry.setup_lambda_telemetry(lazy=True)
+        barrier = threading.Barrier(8)
+        tracers = []
+
+        def first_span():
+            barrier.wait()
+            tracers.append(lambda_telemetry.get_tracer())
+
+        threads = [threading.Thread(target=first_span) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.initialize.assert_called_once()
+        self.assertEqual({id(tracer) for tracer in tracers}, {id(self.initialized_tracer)})
+
+    def test_handler_finishes_setup_before_extracting_the_trace_context(self):
+        lambda_telemetry.setup_lambda_telemetry(lazy=True)
+        calls = []
+        initialize = self.initialize.side_effect
+        self.initialize.side_effect = lambda **config: calls.append('setup') or initialize(**config)
+
+        with mock.patch.object(
+            lambda_telemetry, 'extract_trace_context',
+            side_effect=lambda headers: calls.append('extract') or lambda_telemetry.context_api.get_current(),
+        ):
+            @lambda_telemetry.traced_lambda_handler()
+            def handler(event, context):
+                return 'ok'
+
+            self.assertEqual(handler({'headers': {'traceparent': '00-abc-def-01'}}, None), 'ok')
+
+        self.assertEqual(calls, ['setup', 'extract'])
+
+
+class InstrumentLibrariesTests(SimpleTestCase):
+
+    def test_only_imported_libraries_are_instrumented(self):
+        instrumentor = mock.Mock()
+        instrumentation = types.ModuleType('fake_instrumentation')
+        instrumentation.FakeInstrumentor = instrumentor
+        instrumentors = {
+            'imported_library': ('fake_instrumentation', 'FakeInstrumentor'),
+            'missing_library': ('fake_instrumentation', 'FakeInstrumentor'),
+        }
+
+        with mock.patch.object(lambda_telemetry, 'INSTRUMENTORS', instrumentors), \
+                mock.patch.dict(sys.modules, {
+                    'fake_instrumentation': instrumentation,
+                    'imported_library': types.ModuleType('imported_library'),
+                }):
+            lambda_telemetry._instrument_libraries()
+
+        instrumentor.assert_called_once_with()
+        instrumentor.return_value.instrument.assert_called_once_with()
+
+    def test_missing_instrumentation_package_is_skipped(self):
+        instrumentors = {'imported_library': ('missing_instrumentation_package', 'FakeInstrumentor')}
+
+        with mock.patch.object(lambda_telemetry, 'INSTRUMENTORS', instrumentors), \
+                mock.patch.dict(sys.modules, {'imported_library': types.ModuleType('imported_library')}), \
+                self.assertLogs('lambda_telemetry', 'WARNING'):
+            lambda_telemetry._instrument_libraries()
+
+    def test_scraper_http_clients_have_instrumentors(self):
+        import instagram_comments_lambda  # noqa: F401 - imports the HTTP clients it uses
+
+        for module_name in ('urllib.request', 'urllib3'):
+            with self.subTest(module=module_name):
+                self.assertIn(module_name, sys.modules)
+                self.assertIn(module_name, lambda_telemetry.INSTRUMENTORS)
+
+
+class ColdImportTests(SimpleTestCase):
+    """The SDK is imported by the first span, not by the module or a lazy setup."""
+
+    SCRIPT = '''
+import sys
+import lambda_telemetry
+from opentelemetry import trace
+lambda_telemetry.setup_lambda_telemetry()
+print('sdk_after_setup', 'opentelemetry.sdk.trace' in sys.modules)
+
+@lambda_telemetry.traced('work')
+def work():
+    return trace.get_current_span().is_recording()
+
+print('recording', work())
+print('sdk_after_span', 'opentelemetry.sdk.trace' in sys.modules)
+'''
+
+    def test_sdk_is_imported_on_the_first_span(self):
+        env = {**os.environ, 'OTEL_LAZY_INIT': 'true', 'OTLP_ENDPOINT': 'http://127.0.0.1:9/v1/traces'}
+        output = subprocess.run(
+            [sys.executable, '-c', self.SCRIPT],
+            cwd=LAMBDA_DIR, env=env, capture_output=True, text=True, timeout=60,
+        )
+
+        lines = dict(line.split(' ', 1) for line in output.stdout.splitlines() if ' ' in line)
+        self.assertEqual(lines.get('sdk_after_setup'), 'False', output.stderr)
+        self.assertEqual(lines.get('recording'), 'True', output.stderr)
+        self.assertEqual(lines.get('sdk_after_span'), 'True', output.stderr)
@@ -0,0 +1,44 @@
+import logging
+from unittest import mock
+
+from django.test import SimpleTestCase
+from opentelemetry.sdk.trace import TracerProvider
+
+from bots.services import logger as logger_module
+from bots.services.logger import log_debug, log_info, log_warning
+
+
+class LogSpanEventTests(SimpleTestCase):
+    """log_* calls at LOG_SPAN_EVENT_LEVEL and above are mirrored as span events."""
+
+    def setUp(self):
+        self.tracer = TracerProvider().get_tracer(__name__)
+
+    def events(self, *calls):
+        with self.tracer.start_as_current_span('work') as span:
+            for call in calls:
+                call()
+        return [event.name for event in span.events]
+
+    def test_info_and_above_are_mirrored_by_default(self):
+        self.assertEqual(logger_module.LOG_SPAN_EVENT_LEVEL, logging.INFO)
+
+        events = self.events(
+            lambda: log_debug("detail"),
+            lambda: log_info("started", job_id='1'),
+            lambda: log_warning("slow"),
+        )
+
+        self.assertEqual(events, ['log.info', 'log.warning'])
+
+    def test_level_can_be_raised(self):
+        with mock.patch.object(logger_module, 'LOG_SPAN_EVENT_LEVEL', logging.WARNING):
+            events = self.events(lambda: log_info("started"), lambda: log_warning("slow"))
+
+        self.assertEqual(events, ['log.warning'])
+
+    def test_none_disables_mirroring(self):
+        with mock.patch.object(logger_module, 'LOG_SPAN_EVENT_LEVEL', logger_module._span_event_level('NONE')):
+            events = self.events(lambda: log_warning("slow"))
+
+        self.assertEqual(events, [])
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from celery.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from project import celery as celery_config
+
+LIMITS = {'instagram_queue': 4, 'linkedin_queue': 2, 'twitter_queue': 1}
+
+
+@mock.patch.dict(celery_config.QUEUE_CONCURRENCY, LIMITS)
+class QueueConcurrencyTests(SimpleTestCase):
+
+    def configure(self, **options):
+        conf = SimpleNamespace(worker_concurrency=None)
+        celery_config.configure_queue_concurrency(conf=conf, options=options)
+        return conf.worker_concurrency
+
+    def test_single_queue_worker_gets_queue_limit(self):
+        self.assertEqual(self.configure(queues=['instagram_queue']), 4)
+
+    def test_multi_queue_worker_gets_smallest_limit(self):
+        self.assertEqual(self.configure(queues='instagram_queue,linkedin_queue'), 2)
+        self.assertEqual(self.configure(queues=['instagram_queue', 'linkedin_queue', 'twitter_queue']), 1)
+
+    def test_non_platform_queues_are_left_alone(self):
+        self.assertIsNone(self.configure(queues=['maintenance_queue']))
+
+    def test_explicit_concurrency_within_limit(self):
+        self.assertIsNone(self.configure(queues=['instagram_queue'], concurrency=2))
+
+    def test_explicit_concurrency_above_limit_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.configure(queues=['instagram_queue', 'twitter_queue'], concurrency=4)
@@ -0,0 +1,123 @@
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+import lambda_telemetry
+from bots.services import logger as logger_module
+from bots.services import span_batching
+
+
+class SpanBatchTestsMixin:
+    """span_batch() and traced_method(batch=True), through the API one telemetry module re-exports."""
+
+    telemetry = None
+
+    def setUp(self):
+        super().setUp()
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        self.tracer = provider.get_tracer(__name__)
+        patcher = mock.patch.object(self.telemetry, 'get_tracer', return_value=self.tracer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def finished(self, name):
+        return next(span for span in self.exporter.get_finished_spans() if span.name == name)
+
+    def test_calls_are_applied_when_the_block_exits(self):
+        with self.tracer.start_as_current_span('work') as span:
+            with self.telemetry.span_batch():
+                self.telemetry.add_span_attributes(page=1)
+                self.telemetry.add_span_attributes(page=2, cursor='abc')
+                self.telemetry.add_span_event('page_fetched', {'page': 1})
+                added_at = time.time_ns()
+                self.telemetry.add_span_event('page_fetched', {'page': 2})
+                self.assertNotIn('page', span.attributes)
+                self.assertEqual(len(span.events), 0)
+            self.assertEqual(span.attributes['page'], 2)
+
+        work = self.finished('work')
+        self.assertEqual(work.attributes['cursor'], 'abc')
+        self.assertEqual([dict(event.attributes) for event in work.events], [{'page': 1}, {'page': 2}])
+        # Events keep the time they were added, not the time the batch was applied
+        self.assertLessEqual(work.events[0].timestamp, added_at)
+
+    def test_child_span_calls_bypass_the_batch(self):
+        with self.tracer.start_as_current_span('parent'):
+            with self.telemetry.span_batch():
+                with self.tracer.start_as_current_span('child') as child:
+                    self.telemetry.add_span_attributes(step='child')
+                    self.assertEqual(child.attributes['step'], 'child')
+                self.telemetry.add_span_attributes(step='parent')
+
+        self.assertEqual(self.finished('child').attributes['step'], 'child')
+        self.assertEqual(self.finished('parent').attributes['step'], 'parent')
+
+    def test_nothing_is_collected_without_a_recording_span(self):
+        with self.telemetry.span_batch():
+            self.telemetry.add_span_attributes(page=1)
+            self.telemetry.add_span_event('page_fetched')
+            self.assertIsNone(span_batching._span_batch.get())
+
+    def test_traced_method_batch(self):
+        telemetry = self.telemetry
+
+        class Scraper:
+            @telemetry.traced_method('scrape', batch=True)
+            def scrape(self, fail=False):
+                span = trace.get_current_span()
+                telemetry.add_span_attributes(comments=3)
+                telemetry.add_span_event('page_done')
+                self.pending = ('comments' in span.attributes, len(span.events))
+                if fail:
+                    raise ValueError('blocked')
+                return 'ok'
+
+        scraper = Scraper()
+        self.assertEqual(scraper.scrape(), 'ok')
+        self.assertEqual(scraper.pending, (False, 0))
+        span = self.finished('scrape')
+        self.assertEqual(span.attributes['comments'], 3)
+        self.assertEqual([event.name for event in span.events], ['page_done'])
+
+        self.exporter.clear()
+        with self.assertRaises(ValueError):
+            scraper.scrape(fail=True)
+        span = self.finished('scrape')
+        self.assertEqual(span.attributes['comments'], 3)
+        self.assertEqual(span.status.status_code, trace.StatusCode.ERROR)
+        self.assertIn('page_done', [event.name for event in span.events])
+
+    def test_traced_method_without_batch_writes_through(self):
+        telemetry = self.telemetry
+
+        class Scraper:
+            @telemetry.traced_method('scrape')
+            def scrape(self):
+                telemetry.add_span_attributes(comments=3)
+                return 'comments' in trace.get_current_span().attributes
+
+        self.assertTrue(Scraper().scrape())
+
+
+class LoggerSpanBatchTests(SpanBatchTestsMixin, SimpleTestCase):
+    telemetry = logger_module
+
+
+class LambdaTelemetrySpanBatchTests(SpanBatchTestsMixin, SimpleTestCase):
+    telemetry = lambda_telemetry
+
+
+class SharedSpanBatchingTests(SimpleTestCase):
+
+    def test_both_telemetry_modules_use_the_shared_implementation(self):
+        for telemetry in (logger_module, lambda_telemetry):
+            for name in ('span_batch', 'add_span_attributes', 'add_span_event'):
+                with self.subTest(module=telemetry.__name__, name=name):
+                    self.assertIs(getattr(telemetry, name), getattr(span_batching, name))
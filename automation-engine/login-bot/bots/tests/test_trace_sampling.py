@@ -0,0 +1,113 @@
+from django.test import SimpleTestCase
+from opentelemetry import trace
+from opentelemetry.sdk.trace import SpanProcessor, TracerProvider
+from opentelemetry.sdk.trace.id_generator import RandomIdGenerator
+
+from bots.services.trace_sampling import TailSamplingSpanProcessor, sampled_span_processor
+
+IN_RATIO = 1  # Low trace id bits: below the 0.5 bound
+OUT_OF_RATIO = 2 ** 64 - 1
+
+
+class CollectingProcessor(SpanProcessor):
+
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span.name)
+
+
+class FixedTraceIds(RandomIdGenerator):
+
+    def __init__(self):
+        self.trace_id = OUT_OF_RATIO
+
+    def generate_trace_id(self):
+        return self.trace_id
+
+
+class TailSamplingSpanProcessorTests(SimpleTestCase):
+
+    def setUp(self):
+        self.exported = CollectingProcessor()
+        self.processor = TailSamplingSpanProcessor(self.exported, ratio=0.5, keep_events=('hiker_api_fallback',))
+        self.ids = FixedTraceIds()
+        provider = TracerProvider(id_generator=self.ids)
+        provider.add_span_processor(self.processor)
+        self.tracer = provider.get_tracer(__name__)
+
+    def test_traces_in_the_ratio_are_exported_as_spans_end(self):
+        self.ids.trace_id = IN_RATIO
+        with self.tracer.start_as_current_span('root'):
+            with self.tracer.start_as_current_span('child'):
+                pass
+            self.assertEqual(self.exported.spans, ['child'])
+
+        self.assertEqual(self.exported.spans, ['child', 'root'])
+
+    def test_plain_traces_outside_the_ratio_are_dropped(self):
+        with self.tracer.start_as_current_span('root'):
+            with self.tracer.start_as_current_span('child'):
+                pass
+
+        self.assertEqual(self.exported.spans, [])
+        self.assertEqual(self.processor.dropped_traces, 1)
+
+    def test_error_keeps_the_whole_trace(self):
+        with self.tracer.start_as_current_span('root'):
+            with self.tracer.start_as_current_span('child') as child:
+                child.set_status(trace.Status(trace.StatusCode.ERROR, 'boom'))
+            self.assertEqual(self.exported.spans, [])
+
+        self.assertEqual(self.exported.spans, ['child', 'root'])
+
+    def test_keep_event_keeps_the_whole_trace(self):
+        with self.tracer.start_as_current_span('root'):
+            with self.tracer.start_as_current_span('child') as child:
+                child.add_event('hiker_api_fallback', {'retry_count': 3})
+
+        self.assertEqual(self.exported.spans, ['child', 'root'])
+
+    def test_span_ending_after_its_root_follows_the_decision(self):
+        cases = [
+            (OUT_OF_RATIO, trace.StatusCode.ERROR, ['root', 'late']),
+            (OUT_OF_RATIO - 1, trace.StatusCode.UNSET, []),
+        ]
+        for trace_id, status, expected in cases:
+            with self.subTest(status=status):
+                self.ids.trace_id = trace_id
+                self.exported.spans.clear()
+                root = self.tracer.start_span('root')
+                late = self.tracer.start_span('late', context=trace.set_span_in_context(root))
+                root.set_status(trace.Status(status))
+                root.end()
+                late.end()
+
+                self.assertEqual(self.exported.spans, expected)
+
+    def test_remote_parent_makes_a_local_root(self):
+        remote = trace.NonRecordingSpan(trace.SpanContext(
+            trace_id=OUT_OF_RATIO, span_id=7, is_remote=True, trace_flags=trace.TraceFlags(1),
+        ))
+        with self.tracer.start_as_current_span('lambda', context=trace.set_span_in_context(remote)) as span:
+            span.add_event('hiker_api_fallback')
+
+        self.assertEqual(self.exported.spans, ['lambda'])
+
+
+class SampledSpanProcessorTests(SimpleTestCase):
+
+    def test_full_ratio_keeps_the_delegate(self):
+        delegate = CollectingProcessor()
+
+        self.assertEqual(sampled_span_processor(delegate, ratio=1.0), (delegate, None))
+
+    def test_lower_ratio_wraps_the_delegate(self):
+        delegate = CollectingProcessor()
+
+        processor, sampler = sampled_span_processor(delegate, ratio=0.1)
+
+        self.assertIsInstance(processor, TailSamplingSpanProcessor)
+        self.assertIs(processor.delegate, delegate)
+        self.assertIsNotNone(sampler)
@@ -0,0 +1,127 @@
+from unittest import mock
+
+import redis
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from bots.services.cookie_service import CookieService
+from bots.services.validation_cache import ValidationCache
+from bots.tests.helpers import RedisTestMixin
+from bots.tests.test_cookie_lease import make_account
+
+SHORTCODE = 'DSB0eUtjWBq'
+
+
+@override_settings(VALIDATION_CACHE_COOKIE_TTL=60, VALIDATION_CACHE_MEDIA_TTL=300)
+class ValidationCacheTests(RedisTestMixin, SimpleTestCase):
+
+    def test_hit_needs_both_the_cookie_and_the_media_entry(self):
+        self.assertIsNone(ValidationCache.get(1, SHORTCODE))
+
+        ValidationCache.store(1, SHORTCODE, 42)
+
+        self.assertEqual(ValidationCache.get(1, SHORTCODE), 42)
+        # Another cookie: the post is cached but the cookie was never validated
+        self.assertIsNone(ValidationCache.get(2, SHORTCODE))
+        # Another post: the cookie is healthy but the post was never looked up
+        self.assertIsNone(ValidationCache.get(1, 'other'))
+        self.assertEqual(ValidationCache.get_comment_count(SHORTCODE), 42)
+
+    def test_store_sets_each_entry_ttl(self):
+        ValidationCache.store(1, SHORTCODE, 42)
+
+        self.assertTrue(0 < self.redis.ttl(ValidationCache._cookie_key(1)) <= 60)
+        self.assertTrue(60 < self.redis.ttl(ValidationCache._media_key(SHORTCODE)) <= 300)
+
+    def test_zero_ttl_disables_the_cache(self):
+        with override_settings(VALIDATION_CACHE_COOKIE_TTL=0):
+            ValidationCache.store(1, SHORTCODE, 42)
+            self.assertIsNone(ValidationCache.get(1, SHORTCODE))
+
+        self.assertEqual(self.redis.keys(f'{ValidationCache.KEY_PREFIX}:*'), [])
+
+    def test_invalidate_cookie_keeps_the_media_entry(self):
+        ValidationCache.store(1, SHORTCODE, 42)
+
+        ValidationCache.invalidate_cookie(1)
+
+        self.assertIsNone(ValidationCache.get(1, SHORTCODE))
+        self.assertEqual(ValidationCache.get_comment_count(SHORTCODE), 42)
+
+    def test_media_id(self):
+        self.assertIsNone(ValidationCache.get_media_id(SHORTCODE))
+
+        ValidationCache.store_media_id(SHORTCODE, '3751234567890')
+
+        self.assertEqual(ValidationCache.get_media_id(SHORTCODE), '3751234567890')
+        self.assertGreater(self.redis.ttl(ValidationCache._media_id_key(SHORTCODE)), 300)
+
+    def test_stats_count_hits_and_misses(self):
+        ValidationCache.get(1, SHORTCODE)
+        ValidationCache.store(1, SHORTCODE, 42)
+        ValidationCache.get(1, SHORTCODE)
+        ValidationCache.get(2, SHORTCODE)
+
+        self.assertEqual(ValidationCache.stats(), {
+            'cookie_hits': 1,
+            'cookie_misses': 2,
+            'cookie_hit_ratio': 0.3333,
+            'media_hits': 2,
+            'media_misses': 1,
+            'media_hit_ratio': 0.6667,
+        })
+
+        ValidationCache.reset_stats()
+        self.assertEqual(ValidationCache.stats()['cookie_hits'], 0)
+        self.assertEqual(ValidationCache.stats()['cookie_hit_ratio'], 0.0)
+
+
+@override_settings(VALIDATION_CACHE_COOKIE_TTL=60, VALIDATION_CACHE_MEDIA_TTL=300)
+class ValidationCacheRedisDownTests(SimpleTestCase):
+    """Cache errors are logged and treated as a miss, never raised."""
+
+    def setUp(self):
+        patcher = mock.patch(
+            'bots.services.validation_cache.get_redis',
+            side_effect=redis.ConnectionError("Redis is down"),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lookups_miss(self):
+        self.assertIsNone(ValidationCache.get(1, SHORTCODE))
+        self.assertIsNone(ValidationCache.get_comment_count(SHORTCODE))
+        self.assertIsNone(ValidationCache.get_media_id(SHORTCODE))
+        self.assertEqual(ValidationCache.stats(), {})
+
+    def test_writes_do_not_raise(self):
+        ValidationCache.store(1, SHORTCODE, 42)
+        ValidationCache.store_media_id(SHORTCODE, '3751234567890')
+        ValidationCache.invalidate_cookie(1)
+
+
+@override_settings(VALIDATION_CACHE_COOKIE_TTL=60, VALIDATION_CACHE_MEDIA_TTL=300)
+class ValidationCacheReleaseTests(RedisTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.account = make_account('alice', in_use=True)
+        ValidationCache.store(self.account.id, SHORTCODE, 42)
+
+    def test_failed_release_drops_the_cookie_entry(self):
+        CookieService.release_cookie(self.account.id, success=False, failure_reason='checkpoint')
+
+        self.assertIsNone(ValidationCache.get(self.account.id, SHORTCODE))
+
+    def test_successful_release_keeps_the_cookie_entry(self):
+        CookieService.release_cookie(self.account.id, success=True)
+
+        self.assertEqual(ValidationCache.get(self.account.id, SHORTCODE), 42)
+
+    def test_health_check_reports_stats(self):
+        ValidationCache.get(self.account.id, SHORTCODE)
+
+        response = self.client.get('/webhook/health/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['validation_cache']['cookie_hits'], 1)
+        self.assertEqual(response.json()['validation_cache']['media_hit_ratio'], 1.0)
@@ -0,0 +1,120 @@
+"""
+Comment High-Water Marks for Incremental Re-Scrapes
+
+A watermark records, per post shortcode, the newest top-level comment
+timestamp and every comment ID already delivered (with its reply count).
+InstagramCommentScraper.scrape_comments(incremental=True) uses it to:
+    - skip comments that were delivered by an earlier run
+    - stop paginating at the first known comment in chronological order
+    - re-expand a reply thread only when its child_comment_count changed
+
+SQLiteWatermarkStore is the default store (WATERMARK_DB_PATH, /tmp on Lambda,
+so it lives as long as the warm container). Any object with the same
+load(shortcode) / save(shortcode, watermark) methods can be passed instead.
+
+With the /tmp default, incremental mode is best-effort: each Lambda container
+has its own marks, so a run on a new or different container finds no
+watermark and does a full scrape (still correct, just not incremental). Point
+WATERMARK_DB_PATH at storage shared by every container (e.g. an EFS mount) to
+share the marks.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+WATERMARK_DB_PATH = os.environ.get('WATERMARK_DB_PATH', '/tmp/comment_watermarks.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    shortcode TEXT PRIMARY KEY,
+    newest_created_at INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS known_comments (
+    shortcode TEXT NOT NULL,
+    comment_id TEXT NOT NULL,
+    child_comment_count INTEGER NOT NULL,
+    PRIMARY KEY (shortcode, comment_id)
+);
+"""
+
+
+@dataclass
+class CommentWatermark:
+    """
+    What an earlier scrape of one post already delivered.
+
+    known_comments maps comment_id to child_comment_count (0 for replies).
+    """
+    newest_created_at: int = 0
+    known_comments: Dict[str, int] = field(default_factory=dict)
+
+    def is_known(self, comment_id: str) -> bool:
+        return comment_id in self.known_comments
+
+    def replies_changed(self, comment_id: str, child_comment_count: int) -> bool:
+        """True if a known comment's reply count differs from the recorded one."""
+        return self.known_comments.get(comment_id, 0) != child_comment_count
+
+    def record(self, comment_id: str, child_comment_count: int = 0, created_at: Optional[int] = None) -> None:
+        self.known_comments[comment_id] = child_comment_count
+        if created_at:
+            self.newest_created_at = max(self.newest_created_at, int(created_at))
+
+
+class SQLiteWatermarkStore:
+    """Watermarks persisted in a local SQLite file."""
+
+    def __init__(self, path: str = WATERMARK_DB_PATH):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def load(self, shortcode: str) -> Optional[CommentWatermark]:
+        """
+        Load the watermark of a post.
+
+        Args:
+            shortcode: Post shortcode
+
+        Returns:
+            CommentWatermark, or None if the post was never scraped completely
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT newest_created_at FROM watermarks WHERE shortcode = ?", (shortcode,)
+            ).fetchone()
+            if row is None:
+                return None
+            known = dict(conn.execute(
+                "SELECT comment_id, child_comment_count FROM known_comments WHERE shortcode = ?", (shortcode,)
+            ))
+        return CommentWatermark(newest_created_at=row[0], known_comments=known)
+
+    def save(self, shortcode: str, watermark: CommentWatermark) -> None:
+        """
+        Merge a watermark into the stored one (newest timestamp wins, comments are upserted).
+
+        Args:
+            shortcode: Post shortcode
+            watermark: Comments delivered by the scrape that just finished
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO watermarks (shortcode, newest_created_at, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(shortcode) DO UPDATE SET "
+                "newest_created_at = MAX(newest_created_at, excluded.newest_created_at), "
+                "updated_at = excluded.updated_at",
+                (shortcode, watermark.newest_created_at, time.time())
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO known_comments (shortcode, comment_id, child_comment_count) VALUES (?, ?, ?)",
+                ((shortcode, comment_id, count) for comment_id, count in watermark.known_comments.items())
+            )
@@ -10,7 +10,10 @@ Environment Variables (Optional - can also be passed in request):
 
 Deployment:
     1. Create a Lambda function in AWS
-    2. Upload as a zip with dependencies (requests)
+    2. Upload as a zip with dependencies (lambda_requirements.txt), lambda_telemetry.py,
+       lambda_span_export.py, bots/services/trace_sampling.py (with bots/__init__.py and
+       bots/services/__init__.py) and comment_watermarks.py (set WATERMARK_DB_PATH to shared storage, e.g. an
+       EFS mount, for incremental re-scrapes across containers)
     3. Set handler to: lambda_function.lambda_handler
     4. Increase timeout to 5 minutes (300 seconds)
     5. Memory: 512 MB recommended
@@ -26,15 +29,27 @@ Test Event Example:
     }
 """
 
+import contextvars
 import json
 import os
 import re
+import threading
 import time
 import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Union, Callable, Deque
 from urllib import request, error, parse
 
+import urllib3
+
+try:
+    import orjson  # Optional fast JSON backend (see json_loads / json_dumps_bytes)
+except ImportError:
+    orjson = None
+
 # OpenTelemetry imports
 from opentelemetry import trace
 from lambda_telemetry import (
@@ -47,12 +62,13 @@ from lambda_telemetry import (
     set_span_error,
     traced_http_request,
 )
+from comment_watermarks import CommentWatermark, SQLiteWatermarkStore
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize OpenTelemetry (call once at module level)
+# Initialize OpenTelemetry (call once at module level; the SDK is built on the first span)
 setup_lambda_telemetry(
     service_name="instagram-comments-lambda",
     service_version="1.0.0",
@@ -62,6 +78,12 @@ setup_lambda_telemetry(
 MAX_RETRY_COUNT = 5
 COMMENT_THRESHOLD_PERCENT = 0.80  # 80% threshold
 
+# Most recent top-level comment IDs handed to a resumed retry for de-duplication
+RESUME_SEEN_IDS_LIMIT = int(os.environ.get('RESUME_SEEN_IDS_LIMIT', '20000'))
+
+# Longest event logged by lambda_handler (resume checkpoints make retry events large)
+EVENT_LOG_MAX_CHARS = 4096
+
 # Lambda function URL for self-invocation retries
 LAMBDA_FUNCTION_URL = "https://4a4fadvw2ovchgzhqk6w6bdaje0qmiin.lambda-url.ap-south-1.on.aws/"
 
@@ -69,6 +91,347 @@ LAMBDA_FUNCTION_URL = "https://4a4fadvw2ovchgzhqk6w6bdaje0qmiin.lambda-url.ap-so
 DEFAULT_HIKER_API_KEY = "lyjwxdpzatek6whrirzrh3cjohim5811"
 
 
+# Keep-alive HTTP pool for scraping calls (Instagram GraphQL, Hiker API)
+# Built once per container and reused by every request of an invocation and by
+# warm invocations, so paging through a post pays the TCP/TLS handshake once.
+HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', '10'))
+HTTP_POOL_RETRIES = urllib3.Retry(total=None, connect=0, read=0, status=0, other=0, redirect=5)
+_http_pool: Optional[urllib3.PoolManager] = None
+
+
+def get_http_pool() -> urllib3.PoolManager:
+    """
+    Get the container-wide keep-alive connection pool.
+    
+    Honours HTTPS_PROXY like urlopen did. Set HTTP2_ENABLED=true to negotiate
+    HTTP/2 where the server supports it (needs urllib3>=2.3 with h2 installed;
+    not used through a proxy).
+    """
+    global _http_pool
+    if _http_pool is None:
+        proxy_url = request.getproxies().get('https')
+        if not proxy_url and os.environ.get('HTTP2_ENABLED', 'false').lower() == 'true':
+            try:
+                # Not `import urllib3.http2`: that would make urllib3 a local name here
+                from urllib3.http2 import inject_into_urllib3
+                inject_into_urllib3()
+            except ImportError:
+                logger.warning("HTTP/2 requested but not available (needs urllib3>=2.3 and h2), using HTTP/1.1")
+        
+        pool_kwargs = {
+            'num_pools': 4,
+            'maxsize': HTTP_POOL_MAXSIZE,
+            'block': False,
+            'retries': HTTP_POOL_RETRIES,
+        }
+        _http_pool = urllib3.ProxyManager(proxy_url, **pool_kwargs) if proxy_url else urllib3.PoolManager(**pool_kwargs)
+    return _http_pool
+
+
+def pooled_request(method: str, url: str, headers: Dict[str, str], body: Optional[bytes] = None, timeout: float = 60) -> urllib3.BaseHTTPResponse:
+    """
+    Send a request through the keep-alive pool.
+    
+    Errors are raised as urllib.error.HTTPError (status >= 400) and
+    urllib.error.URLError (connection/timeout), the same as urlopen, so
+    existing retry handling is unchanged.
+    
+    Returns:
+        Response with the body preloaded (response.data)
+    """
+    try:
+        response = get_http_pool().request(method, url, body=body, headers=headers, timeout=timeout)
+    except urllib3.exceptions.HTTPError as e:
+        raise error.URLError(e)
+    
+    if response.status >= 400:
+        raise error.HTTPError(url, response.status, response.reason, response.headers, None)
+    return response
+
+
+# Reply expansion runs in the background while top-level pages are fetched.
+# All Instagram requests made with one cookie share one adaptive rate budget:
+# it starts at *_REQUESTS_PER_SECOND and moves between MIN_REQUESTS_PER_SECOND
+# and *_MAX_REQUESTS_PER_SECOND with the observed latency and throttling.
+REPLY_FETCH_CONCURRENCY = int(os.environ.get('REPLY_FETCH_CONCURRENCY', '4'))
+# Seconds a scrape that ends early waits for its background fetches to stop
+SCRAPE_WORKER_STOP_TIMEOUT = float(os.environ.get('SCRAPE_WORKER_STOP_TIMEOUT', '5'))
+INSTAGRAM_REQUESTS_PER_SECOND = float(os.environ.get('INSTAGRAM_REQUESTS_PER_SECOND', '5'))
+INSTAGRAM_MAX_REQUESTS_PER_SECOND = float(os.environ.get('INSTAGRAM_MAX_REQUESTS_PER_SECOND', '10'))
+HIKER_REQUESTS_PER_SECOND = float(os.environ.get('HIKER_REQUESTS_PER_SECOND', '5'))
+HIKER_MAX_REQUESTS_PER_SECOND = float(os.environ.get('HIKER_MAX_REQUESTS_PER_SECOND', '10'))
+MIN_REQUESTS_PER_SECOND = float(os.environ.get('MIN_REQUESTS_PER_SECOND', '0.2'))
+RATE_LATENCY_TARGET = float(os.environ.get('RATE_LATENCY_TARGET', '2.0'))  # seconds
+
+# Streaming callbacks: send comments in batches while scraping instead of one
+# final payload (0 = off; a job can override with stream_batch_size)
+CALLBACK_STREAM_BATCH_SIZE = int(os.environ.get('CALLBACK_STREAM_BATCH_SIZE', '0'))
+CALLBACK_STREAM_INTERVAL = float(os.environ.get('CALLBACK_STREAM_INTERVAL', '10'))
+
+# Leave comments out of the handler response when a callback_url carries them
+# (a job can override with omit_response_comments)
+OMIT_RESPONSE_COMMENTS = os.environ.get('OMIT_RESPONSE_COMMENTS', 'false').lower() == 'true'
+
+
+class CommentRecord:
+    """
+    One scraped comment, kept compact until it is serialized.
+    
+    Only the scraped fields are stored (in __slots__); the nested callback dict
+    is built by to_dict() while the payload is serialized (see json_default),
+    so a large post's comments never sit in memory as ~20-key dicts.
+    comment_url is derived from shortcode and comment_id, and scrapped_at is a
+    single string shared by every comment parsed from the same page.
+    """
+    
+    __slots__ = (
+        'job_id', 'comment_id', 'parent_comment_id', 'type', 'text',
+        'profile_image', 'profile_name', 'profile_username', 'user_id',
+        'is_verified', 'child_comment_count', 'likes_count', 'shortcode',
+        'post_url', 'commented_at', 'scrapped_at',
+    )
+    
+    def __init__(self, job_id: str, comment_id: str, parent_comment_id: str, type: str, text: str,
+                 profile_image: str, profile_name: str, profile_username: str, user_id: str,
+                 is_verified: bool, child_comment_count: int, likes_count: int, shortcode: str,
+                 post_url: str, commented_at: str, scrapped_at: str):
+        self.job_id = job_id
+        self.comment_id = comment_id
+        self.parent_comment_id = parent_comment_id
+        self.type = type
+        self.text = text
+        self.profile_image = profile_image
+        self.profile_name = profile_name
+        self.profile_username = profile_username
+        self.user_id = user_id
+        self.is_verified = is_verified
+        self.child_comment_count = child_comment_count
+        self.likes_count = likes_count
+        self.shortcode = shortcode
+        self.post_url = post_url
+        self.commented_at = commented_at
+        self.scrapped_at = scrapped_at
+    
+    @property
+    def comment_url(self) -> str:
+        return f"https://www.instagram.com/p/{self.shortcode}/c/{self.comment_id}/"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Callback wire format of the comment."""
+        return {
+            'job_id': self.job_id,
+            'data': {
+                'comment_id': self.comment_id,
+                'parent_comment_id': self.parent_comment_id,
+                'platform': 'instagram',
+                'type': self.type,
+                'text': self.text,
+                'media': [],
+                'profile_image': self.profile_image,
+                'profile_name': self.profile_name,
+                'profile_username': self.profile_username,
+                'profile_meta_data': {
+                    'user_id': self.user_id,
+                    'is_verified': self.is_verified
+                },
+                'comment_meta_data': {
+                    'child_comment_count': self.child_comment_count
+                },
+                'reply_count': self.child_comment_count if self.type == 'comment' else 0,
+                'likes_count': self.likes_count,
+                'comment_url': self.comment_url,
+                'post_url': self.post_url,
+                'commented_at': self.commented_at,
+                'scrapped_at': self.scrapped_at
+            }
+        }
+
+
+def json_default(value: Any) -> Any:
+    """json.dumps / orjson.dumps default hook: CommentRecords become their wire dict."""
+    if isinstance(value, CommentRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON response body.
+    
+    orjson (when installed) decodes bytes directly, without an intermediate
+    str; the stdlib fallback accepts bytes too. Invalid JSON raises
+    json.JSONDecodeError with either backend (orjson's error subclasses it).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_bytes(data: Any) -> bytes:
+    """
+    Encode a payload to UTF-8 JSON bytes, expanding CommentRecords via json_default.
+    
+    Uses orjson when installed and falls back to the stdlib for anything
+    orjson refuses (e.g. lone surrogates in text). Values neither backend can
+    encode raise TypeError.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, default=json_default)
+        except TypeError:
+            pass
+    try:
+        return json.dumps(data, ensure_ascii=False, default=json_default).encode('utf-8')
+    except UnicodeEncodeError:
+        # Lone surrogates have no UTF-8 form; keep them as \u escapes
+        return json.dumps(data, default=json_default).encode('ascii')
+
+
+# Shortcodes are the media id in base64 (URL-safe alphabet, most significant digit first).
+# Private posts append a 28-character suffix to the 11-character public shortcode.
+SHORTCODE_ALPHABET = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
+_SHORTCODE_DIGITS = {char: value for value, char in enumerate(SHORTCODE_ALPHABET)}
+MAX_SHORTCODE_LENGTH = 11
+PRIVATE_SHORTCODE_SUFFIX_LENGTH = 28
+
+
+@lru_cache(maxsize=1024)
+def shortcode_to_media_id(shortcode: str) -> Optional[str]:
+    """
+    Decode a post shortcode to its numeric media id without a network call.
+    
+    Args:
+        shortcode: Post shortcode (public, or private with its 28-character suffix)
+        
+    Returns:
+        Media id as a string, or None if the shortcode cannot be decoded
+    """
+    if len(shortcode) > PRIVATE_SHORTCODE_SUFFIX_LENGTH:
+        shortcode = shortcode[:-PRIVATE_SHORTCODE_SUFFIX_LENGTH]
+    if not shortcode or len(shortcode) > MAX_SHORTCODE_LENGTH:
+        return None
+    
+    media_id = 0
+    for char in shortcode:
+        digit = _SHORTCODE_DIGITS.get(char)
+        if digit is None:
+            return None
+        media_id = media_id * 64 + digit
+    return str(media_id)
+
+
+def utc_now_iso() -> str:
+    """Current UTC time in ISO format (the scrapped_at stamp of a page)."""
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RateBudget:
+    """
+    Thread-safe token bucket limiting the request rate of one cookie.
+    
+    Allows `rate` requests per second on average, with bursts of up to `burst`.
+    A rate of 0 disables the limit.
+    """
+    
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self._burst = burst
+        self.capacity = self._capacity_for(rate)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _capacity_for(self, rate: float) -> int:
+        return self._burst or max(1, int(rate))
+    
+    def acquire(self) -> float:
+        """
+        Take one request from the budget, sleeping until one is available.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+        
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+    
+    def record_success(self, latency: float) -> None:
+        """Feedback hook for a successful request (no-op for a fixed rate)."""
+    
+    def record_throttle(self) -> None:
+        """Feedback hook for a throttled request (no-op for a fixed rate)."""
+
+
+class AdaptiveRateBudget(RateBudget):
+    """
+    RateBudget whose rate follows the API's health (AIMD).
+    
+    - Fast success (latency <= latency_target): rate grows by `increase`, up to max_rate
+    - Slow success: rate shrinks by `slow_factor`
+    - Throttled (HTTP 429, "blocked" invalid-JSON responses): rate shrinks by
+      `throttle_factor` and the bucket is emptied, so the next request waits
+      a full burst interval at the new rate
+    The rate never drops below min_rate. Without an explicit burst the bucket
+    size follows the rate, so an idle period after a throttle does not allow
+    a burst sized for the original rate.
+    """
+    
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float = MIN_REQUESTS_PER_SECOND,
+        max_rate: Optional[float] = None,
+        latency_target: float = RATE_LATENCY_TARGET,
+        increase: float = 0.5,
+        slow_factor: float = 0.9,
+        throttle_factor: float = 0.5
+    ):
+        super().__init__(rate)
+        self.min_rate = min(min_rate, rate)
+        self.max_rate = max(max_rate or rate, rate)
+        self.latency_target = latency_target
+        self.increase = increase
+        self.slow_factor = slow_factor
+        self.throttle_factor = throttle_factor
+        self.throttle_count = 0
+    
+    def _set_rate(self, rate: float) -> None:
+        # Caller holds the lock; refill at the old rate up to now first
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.capacity = self._capacity_for(self.rate)
+        self._tokens = min(self._tokens, self.capacity)
+    
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            if latency <= self.latency_target:
+                self._set_rate(self.rate + self.increase)
+            else:
+                self._set_rate(self.rate * self.slow_factor)
+    
+    def record_throttle(self) -> None:
+        with self._lock:
+            self._set_rate(self.rate * self.throttle_factor)
+            self._tokens = min(self._tokens, 1 - self.capacity)
+            self.throttle_count += 1
+            rate = self.rate
+        add_span_event("rate_decreased", {"requests_per_second": round(rate, 2)})
+
+
 class InstagramAPIBlockedException(Exception):
     """
     Exception raised when Instagram API returns empty/invalid JSON responses
@@ -103,7 +466,7 @@ def fetch_expected_comment_count(post_url: str) -> Optional[int]:
         )
         
         with request.urlopen(req, timeout=30) as response:
-            data = json.loads(response.read().decode('utf-8'))
+            data = json_loads(response.read())
             
             if data.get('success') and data.get('data'):
                 post_counts = data['data'].get('post_counts', {})
@@ -179,7 +542,7 @@ def invoke_lambda_retry(event: Dict[str, Any], retry_count: int) -> bool:
         # Use Lambda function URL for self-invocation
         lambda_url = os.environ.get('LAMBDA_FUNCTION_URL', LAMBDA_FUNCTION_URL)
         
-        payload = json.dumps(retry_event, ensure_ascii=False, default=str).encode('utf-8')
+        payload = json_dumps_bytes(retry_event)
         
         # Make synchronous request to invoke the retry Lambda
         result = _fire_retry_request(lambda_url, payload)
@@ -226,22 +589,87 @@ def should_retry(fetched_count: int, expected_count: int, retry_count: int) -> b
     return True
 
 
+def event_for_log(event: Dict[str, Any]) -> str:
+    """
+    Event as logged by lambda_handler: seen_comment_ids replaced by their count
+    (also inside a JSON 'body'), and the result capped at EVENT_LOG_MAX_CHARS.
+    """
+    def summarize(data: Any) -> Any:
+        if isinstance(data, dict) and isinstance(data.get('seen_comment_ids'), list):
+            return {**data, 'seen_comment_ids': f"<{len(data['seen_comment_ids'])} ids>"}
+        return data
+    
+    logged = summarize(event)
+    body = logged.get('body') if isinstance(logged, dict) else None
+    if isinstance(body, str):
+        try:
+            logged = {**logged, 'body': summarize(json.loads(body))}
+        except ValueError:
+            pass
+    elif isinstance(body, dict):
+        logged = {**logged, 'body': summarize(body)}
+    
+    text = json.dumps(logged, default=str)
+    if len(text) > EVENT_LOG_MAX_CHARS:
+        text = f"{text[:EVENT_LOG_MAX_CHARS]}... ({len(text)} chars)"
+    return text
+
+
+def build_resume_event(event: Dict[str, Any], result: Dict[str, Any], delivered_count: int) -> Dict[str, Any]:
+    """
+    Build the retry event that resumes scraping where this run stopped.
+    
+    Args:
+        event: Original event data
+        result: This run's scrape result (with its next_cursor/seen_comment_ids checkpoint)
+        delivered_count: Comments delivered to the callback by this and earlier runs
+        
+    Returns:
+        Event with next_cursor, seen_comment_ids and delivered_count set
+    """
+    resume_event = event.copy()
+    resume_event['delivered_count'] = delivered_count
+    seen_ids = list(event.get('seen_comment_ids') or []) + result.get('seen_comment_ids', [])
+    resume_event['seen_comment_ids'] = list(dict.fromkeys(seen_ids))[-RESUME_SEEN_IDS_LIMIT:]
+    if result.get('next_cursor'):
+        resume_event['next_cursor'] = result['next_cursor']
+    else:
+        resume_event.pop('next_cursor', None)
+    return resume_event
+
+
 class InstagramCommentScraper:
     """
     Instagram comment scraper using GraphQL API.
     Designed for AWS Lambda.
     """
     
-    def __init__(self, cookies: str, csrf_token: str):
+    def __init__(
+        self,
+        cookies: str,
+        csrf_token: str,
+        reply_concurrency: int = REPLY_FETCH_CONCURRENCY,
+        requests_per_second: float = INSTAGRAM_REQUESTS_PER_SECOND,
+        max_requests_per_second: float = INSTAGRAM_MAX_REQUESTS_PER_SECOND
+    ):
         """
         Initialize the scraper with authentication.
         
         Args:
             cookies: Instagram session cookies
             csrf_token: CSRF token
+            reply_concurrency: Comments whose replies are fetched at the same time
+            requests_per_second: Starting rate for all requests made with this cookie
+                (0 disables rate limiting)
+            max_requests_per_second: Ceiling the adaptive rate may grow to
         """
         self.cookies = cookies
         self.csrf_token = csrf_token
+        self.reply_concurrency = max(1, reply_concurrency)
+        self.rate_budget = (
+            AdaptiveRateBudget(requests_per_second, max_rate=max_requests_per_second)
+            if requests_per_second > 0 else RateBudget(0)
+        )
         self.url = "https://www.instagram.com/graphql/query"
         self.comments_doc_id = "25060748103519434"
         self.media_info_doc_id = "25018359077785073"
@@ -300,19 +728,17 @@ class InstagramCommentScraper:
             http_span.set_attribute("instagram.doc_id", doc_id)
             
             try:
-                req = request.Request(self.url, data=encoded_data, headers=headers, method='POST')
-                with request.urlopen(req, timeout=60) as response:
-                    http_span.set_attribute("http.status_code", response.status)
-                    response_text = response.read().decode('utf-8')
-                    result = json.loads(response_text)
-                    http_span.set_status(trace.Status(trace.StatusCode.OK))
-                    return result
+                response = pooled_request('POST', self.url, headers=headers, body=encoded_data, timeout=60)
+                http_span.set_attribute("http.status_code", response.status)
+                result = json_loads(response.data)
+                http_span.set_status(trace.Status(trace.StatusCode.OK))
+                return result
             except Exception as req_error:
                 http_span.record_exception(req_error)
                 http_span.set_status(trace.Status(trace.StatusCode.ERROR, str(req_error)))
                 raise
     
-    @traced_method("instagram.api_request")
+    @traced_method("instagram.api_request", batch=True)
     def _make_request(self, data: Dict[str, str], max_retries: int = 3) -> Optional[Dict]:
         """
         Make HTTP POST request to Instagram API.
@@ -342,15 +768,20 @@ class InstagramCommentScraper:
             add_span_event(f"attempt_{attempt + 1}", {"attempt": attempt + 1, "max_retries": max_retries})
             
             try:
-                return self._make_traced_instagram_request(encoded_data, headers, data.get('doc_id', 'unknown'))
+                self.rate_budget.acquire()
+                started = time.monotonic()
+                result = self._make_traced_instagram_request(encoded_data, headers, data.get('doc_id', 'unknown'))
+                self.rate_budget.record_success(time.monotonic() - started)
+                add_span_attributes(request_rate=round(self.rate_budget.rate, 2))
+                return result
                     
             except json.JSONDecodeError as e:
                 # Track JSON decode errors (empty response / blocked API)
                 json_decode_errors += 1
                 logger.error(f"JSON Decode Error on attempt {attempt + 1}: {e}")
+                self.rate_budget.record_throttle()
                 if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
-                    continue
+                    continue  # The rate budget paces the retry
                 # All retries failed with JSON decode error - API is blocked
                 logger.error(f"All {max_retries} attempts failed with JSON decode error. API appears blocked.")
                 raise InstagramAPIBlockedException(
@@ -359,7 +790,11 @@ class InstagramCommentScraper:
                 )
             except error.HTTPError as e:
                 logger.error(f"HTTP Error {e.code} on attempt {attempt + 1}")
-                if attempt < max_retries - 1:
+                if e.code == 429:
+                    self.rate_budget.record_throttle()
+                    if attempt < max_retries - 1:
+                        continue  # The rate budget paces the retry
+                elif attempt < max_retries - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
                     continue
                 return None
@@ -375,9 +810,9 @@ class InstagramCommentScraper:
                 if "Expecting value" in error_str or "JSONDecodeError" in error_str:
                     json_decode_errors += 1
                     logger.error(f"JSON-related Error on attempt {attempt + 1}: {e}")
+                    self.rate_budget.record_throttle()
                     if attempt < max_retries - 1:
-                        time.sleep(2 ** attempt)
-                        continue
+                        continue  # The rate budget paces the retry
                     # All retries failed with JSON decode error - API is blocked
                     logger.error(f"All {max_retries} attempts failed with JSON-related error. API appears blocked.")
                     raise InstagramAPIBlockedException(
@@ -432,8 +867,9 @@ class InstagramCommentScraper:
         post_url: str,
         shortcode: str,
         is_reply: bool = False,
-        parent_comment_id: str = ''
-    ) -> Dict[str, Any]:
+        parent_comment_id: str = '',
+        scrapped_at: Optional[str] = None
+    ) -> CommentRecord:
         """
         Parse a comment into standardized format.
         
@@ -444,41 +880,32 @@ class InstagramCommentScraper:
             shortcode: Post shortcode
             is_reply: Whether this is a reply
             parent_comment_id: Parent comment ID (for replies)
+            scrapped_at: Scrape timestamp shared by the page (default: now)
             
         Returns:
-            Formatted comment dictionary
+            CommentRecord (serialized to the callback format by json_default)
         """
         user = node.get('user', {})
-        comment_id = str(node.get('pk', ''))
         username = user.get('username', '')
         
-        return {
-            'job_id': job_id,
-            'data': {
-                'comment_id': comment_id,
-                'parent_comment_id': parent_comment_id,
-                'platform': 'instagram',
-                'type': 'reply' if is_reply else 'comment',
-                'text': node.get('text', ''),
-                'media': [],
-                'profile_image': user.get('profile_pic_url', ''),
-                'profile_name': user.get('full_name', username),
-                'profile_username': username,
-                'profile_meta_data': {
-                    'user_id': str(user.get('id', '') or user.get('pk', '')),
-                    'is_verified': user.get('is_verified', False)
-                },
-                'comment_meta_data': {
-                    'child_comment_count': node.get('child_comment_count', 0)
-                },
-                'reply_count': node.get('child_comment_count', 0) if not is_reply else 0,
-                'likes_count': node.get('comment_like_count', 0) or node.get('like_count', 0),
-                'comment_url': f"https://www.instagram.com/p/{shortcode}/c/{comment_id}/",
-                'post_url': post_url,
-                'commented_at': self._timestamp_to_iso(node.get('created_at')),
-                'scrapped_at': datetime.now(timezone.utc).isoformat()
-            }
-        }
+        return CommentRecord(
+            job_id=job_id,
+            comment_id=str(node.get('pk', '')),
+            parent_comment_id=parent_comment_id,
+            type='reply' if is_reply else 'comment',
+            text=node.get('text', ''),
+            profile_image=user.get('profile_pic_url', ''),
+            profile_name=user.get('full_name', username),
+            profile_username=username,
+            user_id=str(user.get('id', '') or user.get('pk', '')),
+            is_verified=user.get('is_verified', False),
+            child_comment_count=node.get('child_comment_count', 0),
+            likes_count=node.get('comment_like_count', 0) or node.get('like_count', 0),
+            shortcode=shortcode,
+            post_url=post_url,
+            commented_at=self._timestamp_to_iso(node.get('created_at')),
+            scrapped_at=scrapped_at or utc_now_iso()
+        )
     
     def _timestamp_to_iso(self, timestamp: Any) -> str:
         """Convert Unix timestamp to ISO format."""
@@ -511,6 +938,9 @@ class InstagramCommentScraper:
                 "media_id": media_id,
                 "__relay_internal__pv__PolarisIsLoggedInrelayprovider": True
             }
+            if sort_order != "popular":
+                # The first page defaults to popular order
+                variables["sort_order"] = sort_order
         else:
             variables = {
                 "after": after_cursor,
@@ -583,20 +1013,52 @@ class InstagramCommentScraper:
         job_id: str = '',
         max_comments: Optional[int] = None,
         include_replies: bool = True,
-        sort_order: str = "popular"
+        sort_order: str = "popular",
+        comment_sink: Optional[Callable[[List[CommentRecord]], None]] = None,
+        after_cursor: Optional[str] = None,
+        seen_comment_ids: Optional[List[str]] = None,
+        incremental: bool = False,
+        watermark_store: Optional[Any] = None,
+        media_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Scrape comments from an Instagram post.
         
+        Replies are fetched on a pool of reply_concurrency threads while the
+        next top-level pages are requested, and as soon as a page's page_info
+        shows more pages, the next page is requested while the page is parsed
+        and its comments are handed to the sink (an early stop cancels it).
+        Output order does not depend
+        on completion order: every comment is followed by its replies, in page order.
+        
         Args:
             post_url: Instagram post URL or shortcode
             job_id: Job identifier
-            max_comments: Maximum comments to fetch
+            max_comments: Maximum comments to fetch (pagination stops once
+                comments plus their announced reply counts reach it; the
+                result is truncated to exactly max_comments)
             include_replies: Whether to fetch replies
             sort_order: 'popular' or 'chronological'
+            comment_sink: Optional callable receiving comments in output order as
+                soon as they are ready (streaming). Comments passed to the sink
+                are not kept, so the result's 'comments' list is empty.
+            after_cursor: Resume pagination from this end_cursor (checkpoint of a previous run)
+            seen_comment_ids: Top-level comment IDs already delivered by a previous run
+            incremental: Only fetch comments that are new since the post's last
+                complete scrape (see comment_watermarks). Known comments are
+                skipped, their reply threads re-expanded only if
+                child_comment_count changed, and in 'chronological' order
+                pagination stops at the first known comment. The watermark is
+                updated only when the scrape reaches its natural end.
+            watermark_store: Store with load(shortcode)/save(shortcode, watermark)
+                (default: SQLiteWatermarkStore)
+            media_id: Media id (pk) if already known (e.g. from cookie validation);
+                skips the media info lookup
             
         Returns:
-            Dictionary with comments and metadata
+            Dictionary with comments and metadata, plus the resume checkpoint:
+            'next_cursor' (cursor of the first page not fully processed) and
+            'seen_comment_ids' (most recent RESUME_SEEN_IDS_LIMIT top-level IDs)
         """
         # Extract shortcode
         shortcode = self.extract_shortcode(post_url)
@@ -611,12 +1073,20 @@ class InstagramCommentScraper:
             sort_order=sort_order,
             max_comments=max_comments or 0,
             include_replies=include_replies,
+            resumed_from_cursor=bool(after_cursor),
+            incremental=incremental,
+            initial_request_rate=self.rate_budget.rate,
         )
         
-        # Get media ID
-        media_id = self.get_media_id(shortcode)
+        # Get media ID: from the caller, else decoded from the shortcode, else looked up
+        media_id_source = 'provided' if media_id else 'decoded'
+        media_id = media_id or shortcode_to_media_id(shortcode)
+        if not media_id:
+            media_id_source = 'lookup'
+            media_id = self.get_media_id(shortcode)
         if not media_id:
             raise ValueError(f"Could not get media ID for shortcode: {shortcode}")
+        add_span_attributes(media_id_source=media_id_source)
         
         logger.info(f"Media ID: {media_id}")
         
@@ -627,11 +1097,38 @@ class InstagramCommentScraper:
         if not post_url.startswith('http'):
             post_url = f"https://www.instagram.com/p/{shortcode}/"
         
+        # High-water mark of earlier scrapes (incremental mode)
+        watermark = None
+        delivered = None
+        if incremental:
+            watermark_store = watermark_store or SQLiteWatermarkStore()
+            watermark = watermark_store.load(shortcode)
+            delivered = CommentWatermark()
+            add_span_attributes(
+                watermark_found=watermark is not None,
+                watermark_known_comments=len(watermark.known_comments) if watermark else 0,
+            )
+        reached_end = False
+        skipped_known = 0
+        
+        # Comments in output order; a Future stands in for a comment's replies until they arrive
+        slots: Deque[Union[CommentRecord, Future]] = deque()
         all_comments = []
-        seen_comment_ids = set()  # Track unique comment IDs to detect duplicates
-        after_cursor = None
+        sink = comment_sink or all_comments.extend
+        if delivered is not None:
+            sink = self._recording_sink(sink, delivered)
+        counts = {'total': 0, 'comment': 0, 'reply': 0}
+        collected = 0  # Comments so far plus announced replies, for the max_comments check
+        # Track unique comment IDs to detect duplicates (a dict keeps insertion order for the checkpoint)
+        seen_ids: Dict[str, None] = dict.fromkeys(seen_comment_ids or ())
+        resume_cursor = after_cursor
         page = 0
         consecutive_empty_pages = 0
+        reply_pool = ThreadPoolExecutor(max_workers=self.reply_concurrency, thread_name_prefix='replies')
+        stop_workers = threading.Event()  # Tells background fetches to stop once the scrape ends
+        prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='page-prefetch')
+        next_page: Optional[Future] = None  # Request for the following page, already in flight
+        prefetched_pages = 0
         
         # Log start of scraping
         add_span_event("scraping_started", {
@@ -640,132 +1137,313 @@ class InstagramCommentScraper:
             "sort_order": sort_order
         })  # Track consecutive pages with no new comments
         
-        while True:
-            page += 1
-            logger.info(f"Fetching page {page}...")
-            
-            response = self.fetch_comments_page(media_id, after_cursor, sort_order)
-            if not response:
-                logger.error("Failed to fetch comments page after retries. Stopping.")
-                break
-            
-            # Extract comments
-            try:
-                connection = response.get('data', {}).get(
-                    'xdt_api__v1__media__media_id__comments__connection', {}
-                )
-                edges = connection.get('edges', [])
-                page_info = connection.get('page_info', {})
-                
-                logger.info(f"Page {page}: Got {len(edges)} edges from API")
+        try:
+            while True:
+                page += 1
+                logger.info(f"Fetching page {page}...")
                 
-                # First extract all comments, then filter duplicates (like original)
-                page_comments = []
-                for edge in edges:
-                    node = edge.get('node', {})
-                    comment_id = node.get('pk')
-                    if comment_id:
-                        page_comments.append({
-                            'comment_id': str(comment_id),
-                            'node': node
-                        })
+                if next_page is not None:
+                    response = next_page.result()
+                    next_page = None
+                else:
+                    response = self.fetch_comments_page(media_id, after_cursor, sort_order)
                 
-                # Filter out duplicates
-                new_comments = []
-                duplicate_count = 0
-                for item in page_comments:
-                    comment_id = item['comment_id']
-                    if comment_id not in seen_comment_ids:
-                        seen_comment_ids.add(comment_id)
-                        new_comments.append(item)
-                    else:
-                        duplicate_count += 1
+                if page == 1 and media_id_source == 'decoded' and not self._has_comments_connection(response):
+                    # The decoded media id may be wrong; verify it once with the media info lookup
+                    media_id_source = 'verified'
+                    verified_id = self.get_media_id(shortcode)
+                    add_span_event("media_id_verified", {"decoded": media_id, "verified": str(verified_id)})
+                    if verified_id and str(verified_id) != media_id:
+                        logger.warning(f"Decoded media ID {media_id} did not match lookup {verified_id}, retrying first page")
+                        media_id = str(verified_id)
+                        response = self.fetch_comments_page(media_id, after_cursor, sort_order)
                 
-                logger.info(f"Page {page}: {len(page_comments)} comments ({duplicate_count} duplicates, {len(new_comments)} new) Total: {len(all_comments)}")
+                if not response:
+                    logger.error("Failed to fetch comments page after retries. Stopping.")
+                    break
                 
-                # Process new comments
-                for item in new_comments:
-                    node = item['node']
-                    comment = self._parse_comment(
-                        node, job_id, post_url, shortcode,
-                        is_reply=False
+                # Extract comments
+                try:
+                    connection = response.get('data', {}).get(
+                        'xdt_api__v1__media__media_id__comments__connection', {}
                     )
-                    all_comments.append(comment)
+                    edges = connection.get('edges', [])
+                    page_info = connection.get('page_info', {})
                     
-                    # Fetch replies if enabled
-                    if include_replies and node.get('child_comment_count', 0) > 0:
-                        replies = self._fetch_all_replies(
+                    # Request the next page now (through the same rate budget) so it is
+                    # fetched while this page is parsed; the early stops below cancel it
+                    if page_info.get('has_next_page') and page_info.get('end_cursor'):
+                        next_page = prefetch_pool.submit(
+                            contextvars.copy_context().run,
+                            self.fetch_comments_page,
                             media_id,
-                            item['comment_id'],
-                            job_id,
-                            post_url,
-                            shortcode,
-                            comment['data']['comment_id']
+                            page_info['end_cursor'],
+                            sort_order
                         )
-                        all_comments.extend(replies)
+                        prefetched_pages += 1
                     
-                    # Check max limit
-                    if max_comments and len(all_comments) >= max_comments:
-                        logger.info(f"Reached max_comments limit: {max_comments}")
+                    logger.info(f"Page {page}: Got {len(edges)} edges from API")
+                    scrapped_at = utc_now_iso()
+                    
+                    # First extract all comments, then filter duplicates (like original)
+                    page_comments = []
+                    for edge in edges:
+                        node = edge.get('node', {})
+                        comment_id = node.get('pk')
+                        if comment_id:
+                            page_comments.append({
+                                'comment_id': str(comment_id),
+                                'node': node
+                            })
+                    
+                    # Filter out duplicates
+                    new_comments = []
+                    duplicate_count = 0
+                    for item in page_comments:
+                        comment_id = item['comment_id']
+                        if comment_id not in seen_ids:
+                            seen_ids[comment_id] = None
+                            new_comments.append(item)
+                        else:
+                            duplicate_count += 1
+                    
+                    logger.info(f"Page {page}: {len(page_comments)} comments ({duplicate_count} duplicates, {len(new_comments)} new) Total: {collected}")
+                    
+                    # Process new comments
+                    for item in new_comments:
+                        node = item['node']
+                        child_count = node.get('child_comment_count', 0)
+                        
+                        if watermark and watermark.is_known(item['comment_id']):
+                            skipped_known += 1
+                            if sort_order == 'chronological' and int(node.get('created_at') or 0) <= watermark.newest_created_at:
+                                # Everything from here on was delivered by an earlier scrape
+                                logger.info(f"Reached known comments on page {page}. Incremental fetch complete!")
+                                reached_end = True
+                                break
+                            if include_replies and watermark.replies_changed(item['comment_id'], child_count):
+                                # Re-expand the thread; only unseen replies are emitted
+                                delivered.record(item['comment_id'], child_count)
+                                slots.append(reply_pool.submit(
+                                    contextvars.copy_context().run,
+                                    self._fetch_all_replies,
+                                    media_id,
+                                    item['comment_id'],
+                                    job_id,
+                                    post_url,
+                                    shortcode,
+                                    item['comment_id'],
+                                    watermark,
+                                    stop_workers
+                                ))
+                                collected += max(child_count - watermark.known_comments[item['comment_id']], 0)
+                            continue
+                        
+                        comment = self._parse_comment(
+                            node, job_id, post_url, shortcode,
+                            is_reply=False,
+                            scrapped_at=scrapped_at
+                        )
+                        slots.append(comment)
+                        collected += 1
+                        if delivered is not None:
+                            delivered.record(item['comment_id'], child_count, node.get('created_at'))
+                        
+                        # Fetch replies in the background if enabled
+                        if include_replies and child_count > 0:
+                            slots.append(reply_pool.submit(
+                                contextvars.copy_context().run,
+                                self._fetch_all_replies,
+                                media_id,
+                                item['comment_id'],
+                                job_id,
+                                post_url,
+                                shortcode,
+                                comment.comment_id,
+                                watermark,
+                                stop_workers
+                            ))
+                            collected += child_count
+                        
+                        # Check max limit
+                        if max_comments and collected >= max_comments:
+                            logger.info(f"Reached max_comments limit: {max_comments}")
+                            break
+                    
+                    if reached_end:
                         break
-                
-                # Track consecutive empty pages
-                if len(new_comments) == 0:
-                    consecutive_empty_pages += 1
-                    logger.warning(f"No new comments on page {page} ({consecutive_empty_pages} consecutive empty pages)")
-                else:
-                    consecutive_empty_pages = 0  # Reset counter if we got comments
-                
-                # Stop if we got 3 consecutive empty pages (Instagram API quirk)
-                if consecutive_empty_pages >= 3:
-                    logger.info(f"Stopping: {consecutive_empty_pages} consecutive pages with no new comments. Likely end of comments.")
-                    break
-                
-                # Check max limit again after processing
-                if max_comments and len(all_comments) >= max_comments:
-                    break
-                
-                # Check pagination
-                if not page_info.get('has_next_page'):
-                    logger.info("No more pages (has_next_page=False). Fetching complete!")
-                    break
-                
-                after_cursor = page_info.get('end_cursor')
-                if not after_cursor:
-                    logger.info("No end_cursor. Fetching complete!")
+                    
+                    # Track consecutive empty pages
+                    if len(new_comments) == 0:
+                        consecutive_empty_pages += 1
+                        logger.warning(f"No new comments on page {page} ({consecutive_empty_pages} consecutive empty pages)")
+                    else:
+                        consecutive_empty_pages = 0  # Reset counter if we got comments
+                    
+                    # Stop if we got 3 consecutive empty pages (Instagram API quirk)
+                    if consecutive_empty_pages >= 3:
+                        logger.info(f"Stopping: {consecutive_empty_pages} consecutive pages with no new comments. Likely end of comments.")
+                        reached_end = True
+                        break
+                    
+                    # Check max limit again after processing
+                    if max_comments and collected >= max_comments:
+                        break
+                    
+                    # Checkpoint: this page is fully processed
+                    resume_cursor = page_info.get('end_cursor') or resume_cursor
+                    
+                    # Check pagination
+                    if not page_info.get('has_next_page'):
+                        logger.info("No more pages (has_next_page=False). Fetching complete!")
+                        reached_end = True
+                        break
+                    
+                    after_cursor = page_info.get('end_cursor')
+                    if not after_cursor:
+                        logger.info("No end_cursor. Fetching complete!")
+                        reached_end = True
+                        break
+                    
+                    # Surface a blocked API seen by a reply fetch without waiting for the whole scrape
+                    self._raise_reply_errors(slots)
+                    self._drain_ready(slots, sink, counts, max_comments)
+                    
+                except (KeyError, TypeError) as e:
+                    logger.error(f"Error parsing comments: {e}")
                     break
-                
-                time.sleep(1.0)  # Rate limiting - increased delay
-                
-            except (KeyError, TypeError) as e:
-                logger.error(f"Error parsing comments: {e}")
-                break
-        
+            
+            self._drain_ready(slots, sink, counts, max_comments, wait=True)
+        finally:
+            # A prefetched page is not needed once pagination stopped (max_comments,
+            # known comments, empty pages, an error)
+            pending = [slot for slot in slots if isinstance(slot, Future)]
+            if next_page is not None:
+                next_page.cancel()
+                pending.append(next_page)
+            prefetch_pool.shutdown(wait=False, cancel_futures=True)
+            self._stop_workers(stop_workers, reply_pool, pending)
+        
+        if delivered is not None:
+            if reached_end:
+                watermark_store.save(shortcode, delivered)
+            else:
+                # A partial scrape must not move the mark past comments it never fetched
+                logger.info("Scrape did not reach the end, watermark not updated")
+            add_span_attributes(
+                skipped_known_comments=skipped_known,
+                watermark_updated=reached_end,
+            )
         
         # Calculate stats
-        top_level = len([c for c in all_comments if c['data']['type'] == 'comment'])
-        replies = len([c for c in all_comments if c['data']['type'] == 'reply'])
+        top_level = counts['comment']
+        replies = counts['reply']
         
-        logger.info(f"Scrape complete: {len(all_comments)} total ({top_level} comments, {replies} replies)")
+        logger.info(f"Scrape complete: {counts['total']} total ({top_level} comments, {replies} replies)")
         
         # Add final stats to span
         add_span_attributes(
-            total_comments=len(all_comments),
+            total_comments=counts['total'],
             top_level_comments=top_level,
             reply_comments=replies,
             pages_fetched=page,
+            streamed=comment_sink is not None,
+            final_request_rate=round(self.rate_budget.rate, 2),
+            prefetched_pages=prefetched_pages,
         )
         
         return {
             'shortcode': shortcode,
             'media_id': media_id,
             'post_url': post_url,
-            'total_comments': len(all_comments),
+            'total_comments': counts['total'],
             'top_level_comments': top_level,
             'reply_comments': replies,
-            'comments': all_comments
+            'comments': all_comments,
+            'next_cursor': resume_cursor,
+            'seen_comment_ids': list(seen_ids)[-RESUME_SEEN_IDS_LIMIT:]
         }
     
+    @staticmethod
+    def _raise_reply_errors(slots: Deque[Union[CommentRecord, Future]]) -> None:
+        """Re-raise InstagramAPIBlockedException from any reply fetch that already finished."""
+        for slot in slots:
+            if isinstance(slot, Future) and slot.done() and not slot.cancelled():
+                reply_error = slot.exception()
+                if isinstance(reply_error, InstagramAPIBlockedException):
+                    raise reply_error
+    
+    @staticmethod
+    def _stop_workers(stop: threading.Event, pool: ThreadPoolExecutor, pending: List[Future]) -> None:
+        """
+        Stop the background fetches of a scrape that ended early (max_comments, error, blocked API).
+        
+        Queued fetches are cancelled and running ones return after their current
+        request (reply fetches check `stop`; a page prefetch is a single request). Waits up to SCRAPE_WORKER_STOP_TIMEOUT
+        seconds for them, so they do not keep using the cookie after the scrape
+        returns.
+        """
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        running = [future for future in pending if not future.done()]
+        if not running:
+            return
+        _, still_running = wait_futures(running, timeout=SCRAPE_WORKER_STOP_TIMEOUT)
+        if still_running:
+            logger.warning(f"{len(still_running)} background fetches still running after {SCRAPE_WORKER_STOP_TIMEOUT}s")
+    
+    @staticmethod
+    def _has_comments_connection(response: Optional[Dict]) -> bool:
+        """True if a comments page response carries the comments connection (even an empty one)."""
+        if not response:
+            return False
+        connection = (response.get('data') or {}).get('xdt_api__v1__media__media_id__comments__connection')
+        return connection is not None
+    
+    @staticmethod
+    def _recording_sink(sink: Callable[[List[CommentRecord]], None], delivered: CommentWatermark) -> Callable[[List[CommentRecord]], None]:
+        """Wrap a comment sink so every emitted reply is recorded on the watermark."""
+        def record_and_emit(comments: List[CommentRecord]) -> None:
+            for comment in comments:
+                if comment.type == 'reply':
+                    delivered.record(comment.comment_id)
+            sink(comments)
+        return record_and_emit
+    
+    @staticmethod
+    def _drain_ready(
+        slots: Deque[Union[CommentRecord, Future]],
+        sink: Callable[[List[CommentRecord]], None],
+        counts: Dict[str, int],
+        limit: Optional[int],
+        wait: bool = False
+    ) -> None:
+        """
+        Hand comments to the sink in page order, as far as reply fetches have finished.
+        
+        Stops at the first reply fetch still running (unless wait=True), so
+        the order never depends on completion order. At most `limit` comments
+        are emitted in total.
+        """
+        while slots:
+            slot = slots[0]
+            if isinstance(slot, Future):
+                if not wait and not slot.done():
+                    return
+                ready = slot.result()
+            else:
+                ready = [slot]
+            slots.popleft()
+            
+            if limit:
+                ready = ready[:max(limit - counts['total'], 0)]
+            if not ready:
+                continue
+            for comment in ready:
+                counts[comment.type] += 1
+            counts['total'] += len(ready)
+            sink(ready)
+    
     def _fetch_all_replies(
         self,
         media_id: str,
@@ -773,8 +1451,10 @@ class InstagramCommentScraper:
         job_id: str,
         post_url: str,
         shortcode: str,
-        parent_comment_id: str
-    ) -> List[Dict]:
+        parent_comment_id: str,
+        watermark: Optional[CommentWatermark] = None,
+        stop: Optional[threading.Event] = None
+    ) -> List[CommentRecord]:
         """
         Fetch all replies for a comment.
         
@@ -785,6 +1465,8 @@ class InstagramCommentScraper:
             post_url: Post URL
             shortcode: Post shortcode
             parent_comment_id: Parent comment ID for response
+            watermark: Leave out replies already known from an earlier scrape
+            stop: Set when the scrape has ended; no further pages are requested
             
         Returns:
             List of reply comments
@@ -796,6 +1478,8 @@ class InstagramCommentScraper:
         page = 0
         
         while True:
+            if stop is not None and stop.is_set():
+                break
             page += 1
             response = self.fetch_replies_page(media_id, comment_id, after_cursor)
             if not response:
@@ -807,23 +1491,29 @@ class InstagramCommentScraper:
                 )
                 edges = connection.get('edges', [])
                 page_info = connection.get('page_info', {})
+                scrapped_at = utc_now_iso()
                 
                 # Filter out duplicate replies
                 new_replies = []
+                page_new_ids = 0
                 for edge in edges:
                     node = edge.get('node', {})
                     reply_id = str(node.get('pk', '') or node.get('id', ''))
                     
                     if reply_id and reply_id not in seen_reply_ids:
                         seen_reply_ids.add(reply_id)
+                        page_new_ids += 1
+                        if watermark and watermark.is_known(reply_id):
+                            continue
                         reply = self._parse_comment(
                             node, job_id, post_url, shortcode,
                             is_reply=True,
-                            parent_comment_id=parent_comment_id
+                            parent_comment_id=parent_comment_id,
+                            scrapped_at=scrapped_at
                         )
                         new_replies.append(reply)
                 
-                if not new_replies:
+                if not page_new_ids:
                     break
                 
                 replies.extend(new_replies)
@@ -842,8 +1532,6 @@ class InstagramCommentScraper:
                 previous_cursor = after_cursor
                 after_cursor = next_cursor
                 
-                time.sleep(0.1)  # Rate limiting
-                
             except (KeyError, TypeError) as e:
                 logger.error(f"Error parsing replies: {e}")
                 break
@@ -859,15 +1547,26 @@ class InstagramHikerCommentScraper:
     API Documentation: https://api.instagrapi.com/docs
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self,
+        api_key: str = None,
+        requests_per_second: float = HIKER_REQUESTS_PER_SECOND,
+        max_requests_per_second: float = HIKER_MAX_REQUESTS_PER_SECOND
+    ):
         """
         Initialize the scraper with Hiker API key.
         
         Args:
             api_key: Hiker API key (defaults to environment variable or hardcoded key)
+            requests_per_second: Starting request rate (0 disables rate limiting)
+            max_requests_per_second: Ceiling the adaptive rate may grow to
         """
         self.api_key = api_key or os.environ.get('HIKER_API_KEY', DEFAULT_HIKER_API_KEY)
         self.base_url = "https://api.instagrapi.com"
+        self.rate_budget = (
+            AdaptiveRateBudget(requests_per_second, max_rate=max_requests_per_second)
+            if requests_per_second > 0 else RateBudget(0)
+        )
     
     def _get_headers(self) -> Dict[str, str]:
         """Get request headers for Hiker API."""
@@ -912,18 +1611,17 @@ class InstagramHikerCommentScraper:
             http_span.set_attribute("api.endpoint", endpoint)
             
             try:
-                req = request.Request(url, headers=headers, method=method)
-                with request.urlopen(req, timeout=60) as response:
-                    http_span.set_attribute("http.status_code", response.status)
-                    result = json.loads(response.read().decode('utf-8'))
-                    http_span.set_status(trace.Status(trace.StatusCode.OK))
-                    return result
+                response = pooled_request(method, url, headers=headers, timeout=60)
+                http_span.set_attribute("http.status_code", response.status)
+                result = json_loads(response.data)
+                http_span.set_status(trace.Status(trace.StatusCode.OK))
+                return result
             except Exception as req_error:
                 http_span.record_exception(req_error)
                 http_span.set_status(trace.Status(trace.StatusCode.ERROR, str(req_error)))
                 raise
     
-    @traced_method("hiker_api.request")
+    @traced_method("hiker_api.request", batch=True)
     def _make_request(self, endpoint: str, params: Dict[str, Any] = None, max_retries: int = 3) -> Optional[Dict]:
         """Make HTTP GET request to Hiker API."""
         url = f"{self.base_url}{endpoint}"
@@ -944,15 +1642,21 @@ class InstagramHikerCommentScraper:
             add_span_event(f"hiker_attempt_{attempt + 1}", {"attempt": attempt + 1})
             
             try:
-                return self._make_traced_request(url, headers, endpoint, method='GET')
+                self.rate_budget.acquire()
+                started = time.monotonic()
+                result = self._make_traced_request(url, headers, endpoint, method='GET')
+                self.rate_budget.record_success(time.monotonic() - started)
+                add_span_attributes(request_rate=round(self.rate_budget.rate, 2))
+                return result
                 
             except error.HTTPError as e:
                 logger.error(f"Hiker API HTTP Error {e.code} on attempt {attempt + 1}")
                 add_span_event("hiker_http_error", {"attempt": attempt + 1, "status_code": e.code})
                 if e.code == 429:  # Rate limited
-                    wait_time = min(30, 2 ** (attempt + 2))
-                    logger.info(f"Rate limited. Waiting {wait_time}s before retry...")
-                    time.sleep(wait_time)
+                    self.rate_budget.record_throttle()
+                    logger.info(f"Rate limited. Request rate lowered to {self.rate_budget.rate:.2f}/s")
+                    if attempt < max_retries - 1:
+                        continue  # The rate budget paces the retry
                 elif attempt < max_retries - 1:
                     time.sleep(2 ** attempt)
                     continue
@@ -991,7 +1695,7 @@ class InstagramHikerCommentScraper:
         return None
     
     def get_media_pk(self, shortcode: str) -> Optional[str]:
-        """Get media PK (ID) from shortcode."""
+        """Look up media PK (ID) of a shortcode through Hiker API (decodes it locally if the lookup fails)."""
         url = f"https://www.instagram.com/p/{shortcode}/"
         media_info = self.get_media_info_by_url(url)
         if media_info:
@@ -1001,25 +1705,13 @@ class InstagramHikerCommentScraper:
                 return str(pk)
         
         # Fallback: convert shortcode to media ID directly
-        media_id = self.shortcode_to_media_id(shortcode)
+        media_id = shortcode_to_media_id(shortcode)
         if media_id:
             logger.info(f"[Hiker] Converted shortcode to media ID: {media_id}")
             return media_id
         
         return None
     
-    def shortcode_to_media_id(self, shortcode: str) -> Optional[str]:
-        """Convert Instagram shortcode to media ID using base64 decoding."""
-        try:
-            alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_'
-            media_id = 0
-            for char in shortcode:
-                media_id = (media_id * 64) + alphabet.index(char)
-            return str(media_id)
-        except Exception as e:
-            logger.error(f"[Hiker] Error converting shortcode to media ID: {e}")
-            return None
-    
     def _parse_comment(
         self,
         comment_data: Dict[str, Any],
@@ -1027,11 +1719,11 @@ class InstagramHikerCommentScraper:
         post_url: str,
         shortcode: str,
         is_reply: bool = False,
-        parent_comment_id: str = ''
-    ) -> Dict[str, Any]:
-        """Parse a comment from Hiker API into standardized format."""
+        parent_comment_id: str = '',
+        scrapped_at: Optional[str] = None
+    ) -> CommentRecord:
+        """Parse a comment from Hiker API into standardized format (a CommentRecord)."""
         user = comment_data.get('user', {})
-        comment_id = str(comment_data.get('pk', '') or comment_data.get('id', ''))
         username = user.get('username', '')
         
         created_at = comment_data.get('created_at') or comment_data.get('created_at_utc')
@@ -1040,33 +1732,24 @@ class InstagramHikerCommentScraper:
         else:
             created_at_iso = str(created_at) if created_at else ''
         
-        return {
-            'job_id': job_id,
-            'data': {
-                'comment_id': comment_id,
-                'parent_comment_id': parent_comment_id,
-                'platform': 'instagram',
-                'type': 'reply' if is_reply else 'comment',
-                'text': comment_data.get('text', ''),
-                'media': [],
-                'profile_image': user.get('profile_pic_url', ''),
-                'profile_name': user.get('full_name', username),
-                'profile_username': username,
-                'profile_meta_data': {
-                    'user_id': str(user.get('pk', '') or user.get('id', '')),
-                    'is_verified': user.get('is_verified', False)
-                },
-                'comment_meta_data': {
-                    'child_comment_count': comment_data.get('child_comment_count', 0)
-                },
-                'reply_count': comment_data.get('child_comment_count', 0) if not is_reply else 0,
-                'likes_count': comment_data.get('comment_like_count', 0) or comment_data.get('like_count', 0),
-                'comment_url': f"https://www.instagram.com/p/{shortcode}/c/{comment_id}/",
-                'post_url': post_url,
-                'commented_at': created_at_iso,
-                'scrapped_at': datetime.now(timezone.utc).isoformat()
-            }
-        }
+        return CommentRecord(
+            job_id=job_id,
+            comment_id=str(comment_data.get('pk', '') or comment_data.get('id', '')),
+            parent_comment_id=parent_comment_id,
+            type='reply' if is_reply else 'comment',
+            text=comment_data.get('text', ''),
+            profile_image=user.get('profile_pic_url', ''),
+            profile_name=user.get('full_name', username),
+            profile_username=username,
+            user_id=str(user.get('pk', '') or user.get('id', '')),
+            is_verified=user.get('is_verified', False),
+            child_comment_count=comment_data.get('child_comment_count', 0),
+            likes_count=comment_data.get('comment_like_count', 0) or comment_data.get('like_count', 0),
+            shortcode=shortcode,
+            post_url=post_url,
+            commented_at=created_at_iso,
+            scrapped_at=scrapped_at or utc_now_iso()
+        )
     
     def fetch_comments(self, media_pk: str, page_id: Optional[str] = None) -> Optional[Dict]:
         """Fetch comments for a media using Hiker API."""
@@ -1105,7 +1788,7 @@ class InstagramHikerCommentScraper:
         post_url: str,
         shortcode: str,
         parent_comment_id: str
-    ) -> List[Dict]:
+    ) -> List[CommentRecord]:
         """Fetch all replies for a comment with pagination."""
         replies = []
         seen_reply_ids = set()
@@ -1126,6 +1809,7 @@ class InstagramHikerCommentScraper:
                 if not comment_list:
                     break
                 
+                scrapped_at = utc_now_iso()
                 new_replies = []
                 for comment_data in comment_list:
                     reply_id = str(comment_data.get('pk', '') or comment_data.get('id', ''))
@@ -1135,7 +1819,8 @@ class InstagramHikerCommentScraper:
                         reply = self._parse_comment(
                             comment_data, job_id, post_url, shortcode,
                             is_reply=True,
-                            parent_comment_id=parent_comment_id
+                            parent_comment_id=parent_comment_id,
+                            scrapped_at=scrapped_at
                         )
                         new_replies.append(reply)
                 
@@ -1152,8 +1837,6 @@ class InstagramHikerCommentScraper:
                 else:
                     break
                 
-                time.sleep(0.2)
-                
             except (KeyError, TypeError) as e:
                 logger.error(f"[Hiker] Error parsing replies: {e}")
                 break
@@ -1166,9 +1849,18 @@ class InstagramHikerCommentScraper:
         post_url: str,
         job_id: str = '',
         max_comments: Optional[int] = None,
-        include_replies: bool = True
+        include_replies: bool = True,
+        comment_sink: Optional[Callable[[List[CommentRecord]], None]] = None,
+        seen_comment_ids: Optional[List[str]] = None
     ) -> Dict[str, Any]:
-        """Scrape comments from an Instagram post using Hiker API."""
+        """
+        Scrape comments from an Instagram post using Hiker API.
+        
+        With comment_sink set, each page's comments are handed to it and not
+        kept (see InstagramCommentScraper.scrape_comments). Hiker pagination
+        cannot resume from a GraphQL cursor, so a resumed job starts from the
+        first page and skips the seen_comment_ids delivered by earlier runs.
+        """
         shortcode = self.extract_shortcode(post_url)
         if not shortcode:
             raise ValueError(f"[Hiker] Could not extract shortcode from: {post_url}")
@@ -1183,7 +1875,11 @@ class InstagramHikerCommentScraper:
             api="hiker",
         )
         
-        media_pk = self.get_media_pk(shortcode)
+        # Decode locally first; the Hiker lookup only verifies it if the first page fails
+        media_pk = shortcode_to_media_id(shortcode)
+        media_pk_decoded = media_pk is not None
+        if not media_pk:
+            media_pk = self.get_media_pk(shortcode)
         if not media_pk:
             raise ValueError(f"[Hiker] Could not get media PK for shortcode: {shortcode}")
         
@@ -1196,7 +1892,9 @@ class InstagramHikerCommentScraper:
             post_url = f"https://www.instagram.com/p/{shortcode}/"
         
         all_comments = []
-        seen_comment_ids = set()
+        streamed_total = 0
+        streamed_top_level = 0
+        seen_comment_ids = set(seen_comment_ids or ())
         page_id = None
         page = 0
         
@@ -1205,6 +1903,13 @@ class InstagramHikerCommentScraper:
             logger.info(f"[Hiker] PAGINATION: Fetching page {page}")
             
             response = self.fetch_comments(media_pk, page_id)
+            if not response and page == 1 and media_pk_decoded:
+                media_pk_decoded = False
+                verified_pk = self.get_media_pk(shortcode)
+                if verified_pk and verified_pk != media_pk:
+                    logger.warning(f"[Hiker] Decoded media PK {media_pk} did not match lookup {verified_pk}, retrying first page")
+                    media_pk = verified_pk
+                    response = self.fetch_comments(media_pk, page_id)
             if not response:
                 logger.error(f"[Hiker] PAGINATION: Failed to fetch page {page}. Stopping.")
                 break
@@ -1222,6 +1927,7 @@ class InstagramHikerCommentScraper:
                     logger.info("[Hiker] No more comments. Fetching complete!")
                     break
                 
+                scrapped_at = utc_now_iso()
                 new_comments = []
                 duplicate_count = 0
                 
@@ -1236,7 +1942,8 @@ class InstagramHikerCommentScraper:
                     
                     comment = self._parse_comment(
                         comment_data, job_id, post_url, shortcode,
-                        is_reply=False
+                        is_reply=False,
+                        scrapped_at=scrapped_at
                     )
                     new_comments.append(comment)
                     all_comments.append(comment)
@@ -1250,17 +1957,24 @@ class InstagramHikerCommentScraper:
                             job_id,
                             post_url,
                             shortcode,
-                            comment['data']['comment_id']
+                            comment.comment_id
                         )
                         all_comments.extend(replies)
                     
-                    if max_comments and len(all_comments) >= max_comments:
+                    if max_comments and streamed_total + len(all_comments) >= max_comments:
                         logger.info(f"[Hiker] Reached max_comments limit: {max_comments}")
                         break
                 
-                logger.info(f"  [Hiker] new_comments: {len(new_comments)}, duplicates: {duplicate_count}, total: {len(all_comments)}")
+                logger.info(f"  [Hiker] new_comments: {len(new_comments)}, duplicates: {duplicate_count}, total: {streamed_total + len(all_comments)}")
                 
-                if max_comments and len(all_comments) >= max_comments:
+                if comment_sink and all_comments:
+                    # Streaming: hand this page over and drop it from memory
+                    streamed_total += len(all_comments)
+                    streamed_top_level += len([c for c in all_comments if c.type == 'comment'])
+                    comment_sink(all_comments)
+                    all_comments = []
+                
+                if max_comments and streamed_total + len(all_comments) >= max_comments:
                     break
                 
                 if isinstance(response, dict):
@@ -1272,30 +1986,37 @@ class InstagramHikerCommentScraper:
                 else:
                     break
                 
-                time.sleep(1.0)
-                
             except (KeyError, TypeError) as e:
                 logger.error(f"[Hiker] Error parsing comments: {e}")
                 break
         
-        top_level = len([c for c in all_comments if c['data']['type'] == 'comment'])
-        replies_count = len([c for c in all_comments if c['data']['type'] == 'reply'])
+        if comment_sink and all_comments:
+            streamed_total += len(all_comments)
+            streamed_top_level += len([c for c in all_comments if c.type == 'comment'])
+            comment_sink(all_comments)
+            all_comments = []
+        
+        total_count = streamed_total + len(all_comments)
+        top_level = streamed_top_level + len([c for c in all_comments if c.type == 'comment'])
+        replies_count = total_count - top_level
         
-        logger.info(f"[Hiker] SCRAPE COMPLETE: {len(all_comments)} total ({top_level} comments, {replies_count} replies)")
+        logger.info(f"[Hiker] SCRAPE COMPLETE: {total_count} total ({top_level} comments, {replies_count} replies)")
         
         # Add final stats to span
         add_span_attributes(
-            total_comments=len(all_comments),
+            total_comments=total_count,
             top_level_comments=top_level,
             reply_comments=replies_count,
             pages_fetched=page,
+            streamed=comment_sink is not None,
+            final_request_rate=round(self.rate_budget.rate, 2),
         )
         
         return {
             'shortcode': shortcode,
             'media_id': media_pk,
             'post_url': post_url,
-            'total_comments': len(all_comments),
+            'total_comments': total_count,
             'top_level_comments': top_level,
             'reply_comments': replies_count,
             'comments': all_comments,
@@ -1303,6 +2024,128 @@ class InstagramHikerCommentScraper:
         }
 
 
+class CallbackStreamer:
+    """
+    Delivers scraped comments to callback_url in sequenced batches while scraping.
+    
+    Used as the scraper's comment_sink. A batch is sent every `batch_size`
+    comments, or when comments have waited `flush_interval` seconds:
+        {job_id, success: true, streaming: true, sequence: n, complete: false, comments: [...]}
+    
+    complete() sends the final message, which carries any remaining comments:
+        {..., sequence: n, complete: true, total_comments, batches, retry_loop, success, error?}
+    
+    Every message also carries retry_index (the invocation's retry_count).
+    Sequence numbers start at 0 for the job and stay contiguous across retry
+    invocations (a retry event carries stream_sequence, see resume_sequence),
+    so the consumer can detect a lost batch (batches == last sequence + 1).
+    """
+    
+    def __init__(
+        self,
+        callback_url: str,
+        job_id: str,
+        batch_size: int,
+        flush_interval: float = CALLBACK_STREAM_INTERVAL,
+        sequence: int = 0,
+        retry_index: int = 0
+    ):
+        self.callback_url = callback_url
+        self.job_id = job_id
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.sequence = sequence
+        self.first_sequence = sequence
+        self.retry_index = retry_index
+        self.sent_comments = 0
+        self.failed_batches = 0
+        # Delivered by this invocation (top-level IDs, for a retry's seen_comment_ids)
+        self.delivered_comments = 0
+        self.delivered_comment_ids: List[str] = []
+        self._buffer: List[CommentRecord] = []
+        self._last_flush = time.monotonic()
+    
+    def __call__(self, comments: List[CommentRecord]) -> None:
+        self._buffer.extend(comments)
+        while len(self._buffer) >= self.batch_size:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            self._send(batch)
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            batch, self._buffer = self._buffer, []
+            self._send(batch)
+    
+    def _send(self, comments: List[CommentRecord], complete: bool = False, **extra: Any) -> bool:
+        payload = {
+            'job_id': self.job_id,
+            'success': True,
+            'streaming': True,
+            'sequence': self.sequence,
+            'retry_index': self.retry_index,
+            'complete': complete,
+            'comments': comments,
+            **extra,
+        }
+        delivered = post_to_callback(self.callback_url, payload)
+        self.sequence += 1
+        self.sent_comments += len(comments)
+        self._last_flush = time.monotonic()
+        if delivered:
+            self.delivered_comments += len(comments)
+            self.delivered_comment_ids.extend(comment.comment_id for comment in comments if comment.type == 'comment')
+        else:
+            self.failed_batches += 1
+        return delivered
+    
+    @property
+    def batches_sent(self) -> int:
+        """Messages sent by this invocation."""
+        return self.sequence - self.first_sequence
+    
+    @property
+    def resume_sequence(self) -> int:
+        """First sequence number of a retry invocation (after this run's closing message)."""
+        return self.sequence + 1
+    
+    def flush(self) -> bool:
+        """
+        Send buffered comments now as a regular batch.
+        
+        Returns:
+            True if every batch so far was delivered
+        """
+        if self._buffer:
+            batch, self._buffer = self._buffer, []
+            self._send(batch)
+        return self.failed_batches == 0
+    
+    def complete(self, success: bool = True, error_message: Optional[str] = None, retry_loop: bool = False, **extra: Any) -> bool:
+        """
+        Send the final 'complete' message with any buffered comments.
+        
+        Returns:
+            True if the final message was delivered
+        """
+        batch, self._buffer = self._buffer, []
+        final = {
+            'total_comments': self.sent_comments + len(batch),
+            'batches': self.sequence + 1,
+            'retry_loop': retry_loop,
+            **extra,
+        }
+        if not success:
+            final['success'] = False
+            final['error'] = error_message or 'Unknown error'
+        
+        delivered = self._send(batch, complete=True, **final)
+        add_span_attributes(
+            stream_batches=self.batches_sent,
+            stream_failed_batches=self.failed_batches,
+            stream_comments=self.sent_comments,
+        )
+        return delivered
+
+
 @traced_lambda_handler()
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -1320,12 +2163,27 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             - max_comments (optional): Maximum comments to fetch
             - include_replies (optional): Include replies (default: True)
             - retry_count (optional): Current retry attempt (default: 0)
+            - next_cursor (optional): Resume pagination from this cursor (set on retries)
+            - seen_comment_ids (optional): Comment IDs already delivered (set on retries)
+            - delivered_count (optional): Comments already delivered by earlier runs (set on retries)
+            - media_id (optional): Media id (pk) captured during cookie validation
+            - expected_comment_count (optional): comment_count captured during cookie
+              validation; used instead of the tracker API when positive
+            - incremental (optional): Only fetch comments new since the post's last
+              complete scrape, in chronological order (default: False, GraphQL only).
+              Best-effort unless WATERMARK_DB_PATH is shared storage: a container
+              without the post's watermark does a full scrape
+            - stream_batch_size (optional): Stream comments to callback_url in
+              batches of this size while scraping (default: CALLBACK_STREAM_BATCH_SIZE, 0 = one final payload)
+            - stream_sequence (optional): First stream sequence number of this run (set on retries)
+            - omit_response_comments (optional): Return only the stats, not the comments, when
+              callback_url is set (default: OMIT_RESPONSE_COMMENTS)
         context: Lambda context (unused)
     
     Returns:
         API Gateway compatible response
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.info(f"Received event: {event_for_log(event)}")
     
     # Extract critical parameters first for cleanup
     job_id = ''
@@ -1333,6 +2191,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     cookies_release_url = None
     cookie_id = None
     retry_triggered = False
+    streamer = None
     
     try:
         # Handle both direct Lambda invocation and API Gateway
@@ -1373,17 +2232,39 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         max_comments = body.get('max_comments')
         include_replies = body.get('include_replies', True)
+        incremental = bool(body.get('incremental', False))
+        stream_batch_size = int(body.get('stream_batch_size', CALLBACK_STREAM_BATCH_SIZE) or 0)
+        omit_comments = bool(callback_url) and bool(body.get('omit_response_comments', OMIT_RESPONSE_COMMENTS))
         
         # Get retry count (default to 0 if not present)
         retry_count = body.get('retry_count', 0)
         logger.info(f"Current retry_count: {retry_count}")
         
+        if callback_url and stream_batch_size > 0:
+            # A retry continues the job's sequence numbers
+            streamer = CallbackStreamer(
+                callback_url, job_id, stream_batch_size,
+                sequence=int(body.get('stream_sequence', 0) or 0),
+                retry_index=retry_count
+            )
+        
+        # Resume checkpoint from a previous run of this job
+        next_cursor = body.get('next_cursor')
+        seen_comment_ids = body.get('seen_comment_ids') or []
+        delivered_count = int(body.get('delivered_count', 0) or 0)
+        if max_comments and delivered_count:
+            max_comments = max(max_comments - delivered_count, 1)
+        if next_cursor or delivered_count:
+            logger.info(f"Resuming job: {delivered_count} comments already delivered, cursor={'set' if next_cursor else 'none'}")
+        
         # Add more span attributes
         add_span_attributes(
             post_url=post_url,
             retry_count=retry_count,
             max_comments=max_comments or 0,
             include_replies=include_replies,
+            resumed_from_cursor=bool(next_cursor),
+            delivered_count=delivered_count,
         )
         
         # Check if we should use Hiker API (retry count exhausted)
@@ -1430,12 +2311,28 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         
         # Fetch comments using the selected scraper
         try:
-            result = scraper.scrape_comments(
-                post_url=post_url,
-                job_id=job_id,
-                max_comments=max_comments,
-                include_replies=include_replies
-            )
+            if use_hiker_api:
+                result = scraper.scrape_comments(
+                    post_url=post_url,
+                    job_id=job_id,
+                    max_comments=max_comments,
+                    include_replies=include_replies,
+                    comment_sink=streamer,
+                    seen_comment_ids=seen_comment_ids
+                )
+            else:
+                result = scraper.scrape_comments(
+                    post_url=post_url,
+                    job_id=job_id,
+                    max_comments=max_comments,
+                    include_replies=include_replies,
+                    comment_sink=streamer,
+                    after_cursor=next_cursor,
+                    seen_comment_ids=seen_comment_ids,
+                    sort_order='chronological' if incremental else 'popular',
+                    incremental=incremental,
+                    media_id=body.get('media_id')
+                )
         except InstagramAPIBlockedException as e:
             # Instagram API is blocked - immediately trigger Hiker API fallback
             logger.warning(f"Instagram API blocked: {str(e)}. Triggering Hiker API fallback immediately.")
@@ -1453,12 +2350,25 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     post_to_callback(cookies_release_url, release_payload)
                     logger.info(f"Released cookie {cookie_id} with failure due to API block")
                 
+                if streamer:
+                    # Comments streamed before the block are not sent again by the Hiker run
+                    streamer.flush()
+                    body['delivered_count'] = delivered_count + streamer.delivered_comments
+                    seen_ids = list(seen_comment_ids) + streamer.delivered_comment_ids
+                    body['seen_comment_ids'] = list(dict.fromkeys(seen_ids))[-RESUME_SEEN_IDS_LIMIT:]
+                    body['stream_sequence'] = streamer.resume_sequence
+                
                 # Set retry_count to MAX_RETRY_COUNT to trigger Hiker API on next invocation
                 body['retry_count'] = MAX_RETRY_COUNT
                 retry_triggered = invoke_lambda_retry(body, MAX_RETRY_COUNT - 1)
                 
                 # Send intermediate callback (but cookie already released)
-                if callback_url:
+                if streamer:
+                    streamer.complete(
+                        retry_loop=True,
+                        message='Instagram API blocked. Cookie released. Retrying with Hiker API.'
+                    )
+                elif callback_url:
                     callback_payload = {
                         'job_id': job_id,
                         'success': True,
@@ -1494,8 +2404,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if 'scraper_used' not in result:
             result['scraper_used'] = 'hiker_api' if use_hiker_api else 'graphql_api'
         
-        # Get fetched comment count
-        fetched_count = result.get('total_comments', 0)
+        # Get fetched comment count (including comments delivered by earlier runs)
+        fetched_count = delivered_count + result.get('total_comments', 0)
         
         # Add result metrics to span
         add_span_attributes(
@@ -1503,29 +2413,57 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             scraper_used=result['scraper_used'],
         )
         
-        # Fetch expected comment count from tracker API
-        expected_count = fetch_expected_comment_count(post_url)
+        # Expected comment count: from cookie validation if it was sent, else from the tracker API
+        expected_count = body.get('expected_comment_count') or None
+        if expected_count is None:
+            expected_count = fetch_expected_comment_count(post_url)
+        add_span_attributes(expected_count_source='validation' if body.get('expected_comment_count') else 'tracker_api')
         
         # Add expected count to span
         if expected_count is not None:
             add_span_attributes(expected_comments=expected_count)
         
+        # A max_comments limit caps how many comments the threshold expects
+        retry_expected_count = expected_count
+        if expected_count is not None and body.get('max_comments'):
+            retry_expected_count = min(expected_count, body['max_comments'])
+        
         # Check if retry is needed (only if not using Hiker API - no more retries after Hiker)
-        if not use_hiker_api and expected_count is not None and should_retry(fetched_count, expected_count, retry_count):
+        # (incremental scrapes fetch only new comments by design and never retry)
+        if not use_hiker_api and not incremental and expected_count is not None and should_retry(fetched_count, retry_expected_count, retry_count):
+            # Deliver this run's comments first so the retry can resume after them.
+            # Only a streaming consumer (stream_batch_size) accepts comments before
+            # the final callback; otherwise the retry starts over and its final
+            # callback carries every comment.
+            delivered = streamer.flush() if streamer else False
+            
+            if delivered:
+                retry_event = build_resume_event(body, result, fetched_count)
+                result['comments'] = []
+            else:
+                # Nothing reliably delivered: the retry starts over
+                retry_event = body
+            if streamer:
+                retry_event = {**retry_event, 'stream_sequence': streamer.resume_sequence}
+            
             # Invoke Lambda with incremented retry count
             add_span_event("retry_triggered", {
                 "fetched_count": fetched_count,
                 "expected_count": expected_count,
                 "retry_count": retry_count,
+                "resumable": bool(delivered and retry_event.get('next_cursor')),
             })
-            retry_triggered = invoke_lambda_retry(body, retry_count)
+            retry_triggered = invoke_lambda_retry(retry_event, retry_count)
             logger.info(f"Retry invocation {'succeeded' if retry_triggered else 'failed'}")
+            if retry_triggered and streamer:
+                # Close this run's stream; the retry invocation streams the rest
+                streamer.complete(retry_loop=True, next_cursor=retry_event.get('next_cursor'))
         
         # Build response
         response_data = {
             'success': True,
             'job_id': job_id,
-            'data': result,
+            'data': response_result(result, omit_comments),
             'retry_info': {
                 'retry_count': retry_count,
                 'expected_comments': expected_count,
@@ -1535,6 +2473,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'used_hiker_fallback': use_hiker_api
             }
         }
+        if streamer:
+            response_data['streamed_batches'] = streamer.batches_sent
         
         # ALWAYS send callback and release cookie (unless retry triggered)
         if not retry_triggered:
@@ -1543,7 +2483,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 result_data=result,
                 error_message=None,
                 cookie_success=True,  # Success - cookie worked
-                failure_reason=None
+                failure_reason=None,
+                streamer=streamer
             )
             response_data['callback_sent'] = True
             response_data['cookie_released'] = True
@@ -1560,7 +2501,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             result_data=None,
             error_message=str(e),
             cookie_success=False,  # Error - mark cookie as failed
-            failure_reason=f"Lambda error: {str(e)[:200]}"  # Truncate long errors
+            failure_reason=f"Lambda error: {str(e)[:200]}",  # Truncate long errors
+            streamer=streamer
         )
         
         error_response = {
@@ -1571,17 +2513,19 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'cookie_released': True
         }
         return create_response(500, error_response)
+
+
+def response_result(result: Dict[str, Any], omit_comments: bool = False) -> Dict[str, Any]:
+    """
+    Scrape result for the handler response.
     
-    finally:
-        # Force flush all spans to ensure they're sent to BetterStack
-        # This is critical in Lambda where execution stops after return
-        try:
-            tracer_provider = trace.get_tracer_provider()
-            if hasattr(tracer_provider, 'force_flush'):
-                tracer_provider.force_flush(timeout_millis=2000)
-                logger.info("Flushed all spans to BetterStack")
-        except Exception as flush_error:
-            logger.warning(f"Failed to flush spans: {flush_error}")
+    With omit_comments (the callback already carries them) the response keeps
+    the stats and an empty comments list; otherwise the comments are
+    materialized in the callback wire format.
+    """
+    data = {key: value for key, value in result.items() if key not in ('comments', 'seen_comment_ids')}
+    data['comments'] = [] if omit_comments else [comment.to_dict() for comment in result.get('comments', [])]
+    return data
 
 
 def create_response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
@@ -1644,13 +2588,9 @@ def post_to_callback(callback_url: str, data: Any) -> bool:
         ctx = current_span.get_span_context()
         logger.info(f"post_to_callback executing in trace: {ctx.trace_id:032x}, span: {ctx.span_id:016x}")
     
-    add_span_attributes(
-        callback_url=callback_url,
-        payload_size=len(json.dumps(data, default=str))
-    )
-    
     try:
-        payload = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+        payload = json_dumps_bytes(data)
+        add_span_attributes(callback_url=callback_url, payload_size=len(payload))
         _make_traced_callback_request(callback_url, payload)
         return True
             
@@ -1675,7 +2615,8 @@ def post_to_callback(callback_url: str, data: Any) -> bool:
 def ensure_cleanup(job_id: str, callback_url: Optional[str], cookies_release_url: Optional[str], 
                    cookie_id: Optional[int], result_data: Optional[Dict] = None, 
                    error_message: Optional[str] = None, cookie_success: bool = True,
-                   failure_reason: Optional[str] = None) -> None:
+                   failure_reason: Optional[str] = None,
+                   streamer: Optional[CallbackStreamer] = None) -> None:
     """
     ALWAYS call callback and release cookie, no matter what happens.
     This ensures jobs and cookies never get stuck.
@@ -1689,6 +2630,7 @@ def ensure_cleanup(job_id: str, callback_url: Optional[str], cookies_release_url
         error_message: Error message (if failed)
         cookie_success: Whether cookie worked successfully (default: True)
         failure_reason: Reason for cookie failure (if cookie_success=False)
+        streamer: Active CallbackStreamer; if set, the callback is its final 'complete' message
     """
     add_span_attributes(
         job_id=job_id,
@@ -1698,7 +2640,19 @@ def ensure_cleanup(job_id: str, callback_url: Optional[str], cookies_release_url
     )
     
     # Always send callback if URL provided
-    if callback_url:
+    if streamer:
+        add_span_event("cleanup_callback_start", {"job_id": job_id, "streaming": True})
+        callback_success = streamer.complete(
+            success=error_message is None,
+            error_message=error_message,
+            retry_loop=bool(result_data and result_data.get('retry_triggered', False))
+        )
+        logger.info(f"Cleanup: Final stream message {'sent' if callback_success else 'failed'} for job {job_id}")
+        add_span_event("cleanup_callback_complete", {
+            "job_id": job_id,
+            "success": callback_success
+        })
+    elif callback_url:
         add_span_event("cleanup_callback_start", {"job_id": job_id})
         if result_data:
             # Success case - send actual results
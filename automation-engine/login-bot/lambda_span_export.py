@@ -0,0 +1,189 @@
+"""
+Bounded-Time Span Export for AWS Lambda
+
+BatchSpanProcessor exports from a background thread, and Lambda freezes that
+thread between invocations. Spans are then lost, or their export resumes at an
+arbitrary point and blocks a later invocation. LambdaSpanProcessor buffers
+ended spans in memory instead and sends them in flush(). traced_lambda_handler
+calls flush() once the handler has computed its response:
+    - the flush has a hard time budget (OTEL_FLUSH_TIMEOUT_MS, shortened to the
+      invocation's remaining time)
+    - payloads that cannot be sent within the budget are spooled to
+      OTEL_SPOOL_DIR (/tmp) and sent first by the next warm invocation
+    - the spool keeps at most OTEL_SPOOL_MAX_FILES payloads (oldest dropped)
+    - a payload the collector rejects with a 4xx (other than 408/429) is
+      dropped, since resending it cannot succeed and would block newer spans
+
+Spans are sent as OTLP/HTTP protobuf with urllib, with instrumentation
+suppressed so the export itself is not traced.
+
+This module imports the OpenTelemetry SDK. lambda_telemetry imports it only
+when the telemetry setup runs.
+"""
+
+import logging
+import os
+import time
+import threading
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Sequence
+
+from opentelemetry.context import attach, detach, set_value, _SUPPRESS_INSTRUMENTATION_KEY
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor
+
+logger = logging.getLogger(__name__)
+
+FLUSH_TIMEOUT_MS = int(os.getenv("OTEL_FLUSH_TIMEOUT_MS", "1000"))
+SPOOL_DIR = os.getenv("OTEL_SPOOL_DIR", "/tmp/otel_spool")
+SPOOL_MAX_FILES = int(os.getenv("OTEL_SPOOL_MAX_FILES", "50"))
+MAX_BUFFERED_SPANS = int(os.getenv("OTEL_MAX_BUFFERED_SPANS", "2048"))
+
+# Client errors that are worth retrying (timeout, rate limit); other 4xx drop the payload
+RETRYABLE_CLIENT_ERRORS = {408, 429}
+
+
+class LambdaSpanProcessor(SpanProcessor):
+    """
+    Buffers ended spans and exports them on flush() within a time budget.
+
+    Spans ended after the buffer holds max_buffered_spans are dropped (counted
+    in dropped_spans).
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        flush_timeout_ms: int = FLUSH_TIMEOUT_MS,
+        spool_dir: str = SPOOL_DIR,
+        spool_max_files: int = SPOOL_MAX_FILES,
+        max_buffered_spans: int = MAX_BUFFERED_SPANS,
+    ):
+        self.endpoint = endpoint
+        self.headers = {**(headers or {}), "Content-Type": "application/x-protobuf"}
+        self.flush_timeout_ms = flush_timeout_ms
+        self.spool_dir = spool_dir
+        self.spool_max_files = spool_max_files
+        self.max_buffered_spans = max_buffered_spans
+        self.dropped_spans = 0
+        self._spans: List[ReadableSpan] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def on_start(self, span, parent_context=None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if not span.context.trace_flags.sampled:
+            return
+        with self._lock:
+            if len(self._spans) >= self.max_buffered_spans:
+                self.dropped_spans += 1
+                return
+            self._spans.append(span)
+
+    def flush(self, timeout_millis: Optional[int] = None) -> bool:
+        """
+        Send spooled payloads (oldest first), then the buffered spans.
+
+        Each request gets the remaining budget as its socket timeout. Once the
+        budget is used up or a request fails, the buffered spans are spooled
+        for the next flush.
+
+        Args:
+            timeout_millis: Time budget, capped at flush_timeout_ms (default flush_timeout_ms)
+
+        Returns:
+            True if nothing is left buffered or spooled
+        """
+        budget_ms = self.flush_timeout_ms if timeout_millis is None else min(timeout_millis, self.flush_timeout_ms)
+        deadline = time.monotonic() + max(budget_ms, 0) / 1000
+
+        with self._flush_lock:
+            with self._lock:
+                spans, self._spans = self._spans, []
+            payload = self._encode(spans) if spans else None
+
+            for path in self._spool_files():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    with open(path, 'rb') as spooled:
+                        data = spooled.read()
+                except OSError:
+                    continue
+                if not self._send(data, remaining):
+                    break
+                self._remove(path)
+            else:
+                remaining = deadline - time.monotonic()
+                if payload is None or (remaining > 0 and self._send(payload, remaining)):
+                    return True
+
+            if payload is not None:
+                self._spool(payload)
+            return False
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        self.flush()
+
+    @staticmethod
+    def _encode(spans: Sequence[ReadableSpan]) -> bytes:
+        return encode_spans(spans).SerializeToString()
+
+    def _send(self, payload: bytes, timeout: float) -> bool:
+        """Post one payload; False if it should be spooled and retried later."""
+        request = urllib.request.Request(self.endpoint, data=payload, headers=self.headers, method="POST")
+        token = attach(set_value(_SUPPRESS_INSTRUMENTATION_KEY, True))
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return 200 <= response.status < 300
+        except urllib.error.HTTPError as e:
+            if 400 <= e.code < 500 and e.code not in RETRYABLE_CLIENT_ERRORS:
+                # Bad payload or credentials: resending cannot fix it
+                logger.error(f"Span export rejected, dropping {len(payload)} bytes of spans: HTTP {e.code}")
+                return True
+            logger.warning(f"Span export failed: {e}")
+            return False
+        except (urllib.error.URLError, OSError) as e:
+            logger.warning(f"Span export failed: {e}")
+            return False
+        finally:
+            detach(token)
+
+    def _spool_files(self) -> List[str]:
+        try:
+            names = sorted(name for name in os.listdir(self.spool_dir) if name.endswith('.pb'))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.spool_dir, name) for name in names]
+
+    def _spool(self, payload: bytes) -> None:
+        """Write a payload to the spool (atomically) and drop the oldest files over the limit."""
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            path = os.path.join(self.spool_dir, f"{time.time_ns():020d}.pb")
+            with open(path + '.tmp', 'wb') as spooled:
+                spooled.write(payload)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.warning(f"Failed to spool spans: {e}")
+            return
+
+        files = self._spool_files()
+        for old in files[:max(len(files) - self.spool_max_files, 0)]:
+            self._remove(old)
+        logger.info(f"Spooled spans for the next invocation: {path}")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -19,28 +19,38 @@ Usage:
     
     # Add custom attributes during execution:
     add_span_attributes(post_url=post_url, comment_count=len(comments))
+
+Cold starts:
+    By default (OTEL_LAZY_INIT=true) setup_lambda_telemetry() only records its
+    configuration. The OTLP exporter, tracer provider, propagators and HTTP
+    instrumentation are built when the first span starts, and only libraries
+    that are already imported at that point are instrumented. The SDK and
+    exporter modules are imported then too. Check the handler's import cost with:
+        python -X importtime -c "import instagram_comments_lambda" 2>&1 | tail -n 20
+
+Span export:
+    Spans are buffered in memory and exported by traced_lambda_handler once the
+    handler has returned. The export has a hard time budget, and spans that do
+    not make it are spooled to /tmp for the next warm invocation (see
+    lambda_span_export).
 """
 
+import importlib
 import os
-import json
+import sys
+import threading
 import logging
+from contextlib import nullcontext
 from functools import wraps
-from typing import Optional, Dict, Any, Callable, TypeVar
+from typing import Optional, Dict, Any, Callable, TypeVar, Iterable
 
 from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
-from opentelemetry.instrumentation.urllib import URLLibInstrumentor
-from opentelemetry.propagate import set_global_textmap, get_global_textmap
-from opentelemetry.propagators.b3 import B3MultiFormat
-from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
-from opentelemetry.propagators.composite import CompositePropagator
+from opentelemetry.propagate import get_global_textmap
 from opentelemetry.context import attach, detach
 from opentelemetry import context as context_api
 
+from bots.services.span_batching import span_batch, add_span_attributes, add_span_event
+
 # Logger for this module
 logger = logging.getLogger(__name__)
 
@@ -50,12 +60,35 @@ tracer: Optional[trace.Tracer] = None
 # Flag to ensure setup is called only once
 _telemetry_initialized = False
 
+# Defer the SDK setup to the first span (see module docstring)
+LAZY_INIT = os.getenv("OTEL_LAZY_INIT", "true").lower() in ("1", "true", "yes")
+
+# Span processor installed by the setup, flushed after each invocation
+_span_processor = None
+
+# Lambda time kept free after the span flush (milliseconds)
+FLUSH_SAFETY_MARGIN_MS = 200
+
+# Configuration recorded by a lazy setup_lambda_telemetry() call
+_pending_setup: Optional[Dict[str, Any]] = None
+_setup_lock = threading.Lock()
+
+# Instrumentors by the module they instrument: (instrumentation module, class name)
+INSTRUMENTORS = {
+    'requests': ('opentelemetry.instrumentation.requests', 'RequestsInstrumentor'),
+    'urllib.request': ('opentelemetry.instrumentation.urllib', 'URLLibInstrumentor'),
+    # Scraper GraphQL calls go through the keep-alive pool (pooled_request)
+    'urllib3': ('opentelemetry.instrumentation.urllib3', 'URLLib3Instrumentor'),
+}
+
 
 def setup_lambda_telemetry(
     service_name: str = "instagram-lambda-scraper",
     service_version: str = "1.0.0",
     otlp_endpoint: Optional[str] = None,
     otlp_headers: Optional[Dict[str, str]] = None,
+    lazy: Optional[bool] = None,
+    instrument: Optional[Iterable[str]] = None,
 ) -> trace.Tracer:
     """
     Set up OpenTelemetry instrumentation for AWS Lambda.
@@ -63,29 +96,91 @@ def setup_lambda_telemetry(
     This function configures:
     - Trace provider with OTLP exporter (BetterStack)
     - Composite propagator for trace context propagation
-    - Auto-instrumentation for HTTP libraries (requests, urllib)
+    - Auto-instrumentation for HTTP libraries (requests, urllib, urllib3) that are imported
     
     Args:
         service_name: Name of the service for telemetry
         service_version: Version of the service
         otlp_endpoint: OTLP endpoint URL (defaults to env var or BetterStack)
         otlp_headers: Headers for OTLP exporter (defaults to env var)
+        lazy: Defer the setup until the first span (default: OTEL_LAZY_INIT)
+        instrument: Modules to instrument, keys of INSTRUMENTORS (default: all
+            of them that are imported when the setup runs)
     
     Returns:
-        Configured Tracer instance
+        Tracer instance (a proxy that starts recording once a lazy setup has run)
     
     Environment Variables:
         OTLP_ENDPOINT: OTLP endpoint URL (default: BetterStack)
         BETTERSTACK_SOURCE_TOKEN: BetterStack API token
         OTLP_HEADERS: Alternative headers format (key1=value1,key2=value2)
         ENVIRONMENT: Deployment environment (default: production)
+        OTEL_LAZY_INIT: Defer the setup until the first span (default: true)
+        OTEL_FLUSH_TIMEOUT_MS: Time budget of the span flush after each invocation (default: 1000)
+        OTEL_SPOOL_DIR: Where spans that missed the flush are kept (default: /tmp/otel_spool)
+        TRACE_SAMPLE_RATIO: Fraction of traces always exported (default: 1.0, see bots.services.trace_sampling)
     """
-    global tracer, _telemetry_initialized
+    global _pending_setup
     
     if _telemetry_initialized:
         logger.warning("Telemetry already initialized. Skipping setup.")
         return tracer
     
+    config = dict(
+        service_name=service_name,
+        service_version=service_version,
+        otlp_endpoint=otlp_endpoint,
+        otlp_headers=otlp_headers,
+        instrument=instrument,
+    )
+    if LAZY_INIT if lazy is None else lazy:
+        _pending_setup = config
+        logger.info("OpenTelemetry setup deferred until the first span")
+        return trace.get_tracer(__name__)
+    
+    with _setup_lock:
+        if _telemetry_initialized:
+            return tracer
+        _pending_setup = None
+        return _initialize_telemetry(**config)
+
+
+def _instrument_libraries(modules: Optional[Iterable[str]] = None) -> None:
+    """Enable HTTP instrumentation for the given (default: imported) modules."""
+    for module_name in modules if modules is not None else INSTRUMENTORS:
+        if module_name not in sys.modules:
+            logger.info(f"Skipping {module_name} instrumentation (not imported)")
+            continue
+        instrumentation_module, class_name = INSTRUMENTORS[module_name]
+        try:
+            instrumentor = getattr(importlib.import_module(instrumentation_module), class_name)
+        except ImportError:
+            # Telemetry must not fail the handler; lambda_requirements.txt installs the package
+            logger.warning(f"Skipping {module_name} instrumentation ({instrumentation_module} is not installed)")
+            continue
+        logger.info(f"Enabling {module_name} instrumentation")
+        instrumentor().instrument()
+
+
+def _initialize_telemetry(
+    service_name: str,
+    service_version: str,
+    otlp_endpoint: Optional[str],
+    otlp_headers: Optional[Dict[str, str]],
+    instrument: Optional[Iterable[str]],
+) -> trace.Tracer:
+    """Build the exporter, tracer provider and propagators (caller holds _setup_lock)."""
+    global tracer, _telemetry_initialized, _span_processor
+    
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.resources import Resource, SERVICE_NAME, SERVICE_VERSION
+    from opentelemetry.propagate import set_global_textmap
+    from opentelemetry.propagators.b3 import B3MultiFormat
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+    from opentelemetry.propagators.composite import CompositePropagator
+    from lambda_span_export import LambdaSpanProcessor
+    from bots.services.trace_sampling import sampled_span_processor
+    
     # Get OTLP configuration from environment if not provided
     if otlp_endpoint is None:
         otlp_endpoint = os.getenv("OTLP_ENDPOINT", "https://in-otel.logs.betterstack.com/v1/traces")
@@ -117,15 +212,14 @@ def setup_lambda_telemetry(
         "faas.version": os.getenv("AWS_LAMBDA_FUNCTION_VERSION", "unknown"),
     })
     
-    # Create OTLP exporter
-    otlp_exporter = OTLPSpanExporter(
+    # Set up tracer provider with a span processor that exports on flush_spans(),
+    # behind tail sampling when TRACE_SAMPLE_RATIO < 1
+    _span_processor = LambdaSpanProcessor(
         endpoint=otlp_endpoint,
         headers=otlp_headers or {},
     )
-    
-    # Set up tracer provider with batch span processor
-    tracer_provider = TracerProvider(resource=resource)
-    span_processor = BatchSpanProcessor(otlp_exporter)
+    span_processor, sampler = sampled_span_processor(_span_processor)
+    tracer_provider = TracerProvider(resource=resource, sampler=sampler)
     tracer_provider.add_span_processor(span_processor)
     
     # Set global tracer provider
@@ -143,11 +237,7 @@ def setup_lambda_telemetry(
     tracer = trace.get_tracer(__name__)
     
     # Auto-instrument HTTP libraries
-    logger.info("Enabling requests instrumentation")
-    RequestsInstrumentor().instrument()
-    
-    logger.info("Enabling urllib instrumentation")
-    URLLibInstrumentor().instrument()
+    _instrument_libraries(instrument)
     
     _telemetry_initialized = True
     logger.info("OpenTelemetry setup complete")
@@ -165,48 +255,48 @@ def get_tracer() -> trace.Tracer:
     Raises:
         RuntimeError: If telemetry has not been initialized
     """
-    global tracer
-    if tracer is None:
-        # Auto-initialize with defaults if not already done
-        logger.warning("Telemetry not initialized. Auto-initializing with defaults.")
-        return setup_lambda_telemetry()
-    return tracer
-
-
-def add_span_attributes(**attributes: Any) -> None:
-    """
-    Add attributes to the current active span.
+    global _pending_setup
+    if tracer is not None:
+        return tracer
     
-    Args:
-        **attributes: Key-value pairs to add as span attributes
+    with _setup_lock:
+        if tracer is not None:
+            return tracer
+        if _pending_setup is not None:
+            # First span after a lazy setup_lambda_telemetry()
+            config, _pending_setup = _pending_setup, None
+            return _initialize_telemetry(**config)
     
-    Example:
-        add_span_attributes(
-            post_url="https://instagram.com/...",
-            comment_count=150,
-            retry_count=0
-        )
-    """
-    span = trace.get_current_span()
-    if span and span.is_recording():
-        for key, value in attributes.items():
-            span.set_attribute(key, value)
+    # Auto-initialize with defaults if not already done
+    logger.warning("Telemetry not initialized. Auto-initializing with defaults.")
+    return setup_lambda_telemetry(lazy=False)
 
 
-def add_span_event(name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+def flush_spans(context: Any = None) -> bool:
     """
-    Add an event to the current active span.
+    Export finished spans within the flush time budget.
+    
+    Spans that cannot be sent in time are spooled to /tmp and sent by the
+    next flush.
     
     Args:
-        name: Name of the event
-        attributes: Optional attributes for the event
+        context: Lambda context; the budget is shortened to its remaining time
     
-    Example:
-        add_span_event("retry_triggered", {"retry_count": 1, "reason": "threshold_not_met"})
+    Returns:
+        True if every span was sent
     """
-    span = trace.get_current_span()
-    if span and span.is_recording():
-        span.add_event(name, attributes or {})
+    if _span_processor is None:
+        return True
+    
+    timeout_millis = None
+    if hasattr(context, 'get_remaining_time_in_millis'):
+        timeout_millis = max(context.get_remaining_time_in_millis() - FLUSH_SAFETY_MARGIN_MS, 0)
+    
+    try:
+        return _span_processor.flush(timeout_millis)
+    except Exception as e:
+        logger.warning(f"Failed to flush spans: {e}")
+        return False
 
 
 def set_span_error(error: Exception) -> None:
@@ -461,6 +551,7 @@ def traced(
 def traced_method(
     span_name: Optional[str] = None,
     attributes: Optional[Dict[str, Any]] = None,
+    batch: bool = False,
 ) -> Callable[[F], F]:
     """
     Decorator for class methods that automatically creates a span.
@@ -471,6 +562,8 @@ def traced_method(
     Args:
         span_name: Optional custom name for the span (defaults to ClassName.method_name)
         attributes: Optional dictionary of attributes to set on the span
+        batch: Run the method inside span_batch(), so its add_span_attributes /
+            add_span_event calls are applied to the span once, on return
     
     Returns:
         Decorated method
@@ -502,7 +595,8 @@ def traced_method(
                 
                 try:
                     logger.debug(f"[TRACE] Starting method span: {name}")
-                    result = func(self, *args, **kwargs)
+                    with span_batch() if batch else nullcontext():
+                        result = func(self, *args, **kwargs)
                     span.set_status(trace.Status(trace.StatusCode.OK))
                     logger.debug(f"[TRACE] Completed method span: {name}")
                     return result
@@ -533,6 +627,7 @@ def traced_lambda_handler(
     2. Links to parent trace (e.g., from Django worker)
     3. Creates a SERVER span for the Lambda invocation
     4. Handles cleanup automatically
+    5. Flushes spans after the handler returns (bounded time, see flush_spans)
     
     This is a clean, decorator-only approach for Lambda functions.
     
@@ -552,6 +647,9 @@ def traced_lambda_handler(
     def decorator(func: F) -> F:
         @wraps(func)
         def wrapper(event, context):
+            # Finish a deferred setup first so the configured propagators extract the context
+            get_tracer()
+            
             # Extract trace context from Lambda event
             # Lambda Function URL format: event['headers'] contains HTTP headers
             # Direct invocation format: headers might be at top level
@@ -613,44 +711,47 @@ def traced_lambda_handler(
                         logger.info(f"✓ This span should be child of: {parent_ctx.span_id:016x}")
                     else:
                         logger.warning("⚠ No valid parent span found in context")
-                # Add Lambda metadata
-                span.set_attribute("code.function", func.__name__)
-                span.set_attribute("code.namespace", func.__module__)
-                span.set_attribute("faas.execution", getattr(context, 'request_id', 'unknown'))
-                span.set_attribute("faas.trigger", "http")
+                    # Add Lambda metadata
+                    span.set_attribute("code.function", func.__name__)
+                    span.set_attribute("code.namespace", func.__module__)
+                    span.set_attribute("faas.execution", getattr(context, 'request_id', 'unknown'))
+                    span.set_attribute("faas.trigger", "http")
                 
-                # Add event metadata for debugging
-                if 'job_id' in event:
-                    span.set_attribute("job.id", event['job_id'])
-                if 'post_url' in event:
-                    span.set_attribute("post.url", event['post_url'])
-                if 'retry_count' in event:
-                    span.set_attribute("retry.count", event.get('retry_count', 0))
+                    # Add event metadata for debugging
+                    if 'job_id' in event:
+                        span.set_attribute("job.id", event['job_id'])
+                    if 'post_url' in event:
+                        span.set_attribute("post.url", event['post_url'])
+                    if 'retry_count' in event:
+                        span.set_attribute("retry.count", event.get('retry_count', 0))
                 
-                logger.info(f"[TRACE] Starting Lambda handler: {span_name}")
-                logger.info(f"[TRACE] Request ID: {getattr(context, 'request_id', 'unknown')}")
+                    logger.info(f"[TRACE] Starting Lambda handler: {span_name}")
+                    logger.info(f"[TRACE] Request ID: {getattr(context, 'request_id', 'unknown')}")
                 
-                try:
-                    result = func(event, context)
-                    span.set_status(trace.Status(trace.StatusCode.OK))
-                    logger.info(f"[TRACE] Lambda handler completed successfully")
-                    return result
-                except Exception as e:
-                    # Record exception with enhanced details
-                    span.record_exception(e)
-                    span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+                    try:
+                        result = func(event, context)
+                        span.set_status(trace.Status(trace.StatusCode.OK))
+                        logger.info(f"[TRACE] Lambda handler completed successfully")
+                        return result
+                    except Exception as e:
+                        # Record exception with enhanced details
+                        span.record_exception(e)
+                        span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
                     
-                    # Add error attributes
-                    span.set_attribute("error", True)
-                    span.set_attribute("error.type", type(e).__name__)
-                    span.set_attribute("error.message", str(e))
+                        # Add error attributes
+                        span.set_attribute("error", True)
+                        span.set_attribute("error.type", type(e).__name__)
+                        span.set_attribute("error.message", str(e))
                     
-                    logger.error(f"[TRACE] Lambda handler error: {type(e).__name__}: {e}")
-                    raise
+                        logger.error(f"[TRACE] Lambda handler error: {type(e).__name__}: {e}")
+                        raise
             finally:
                 # Detach the parent context to restore previous context
                 context_api.detach(token)
                 logger.debug("[TRACE] Detached parent trace context")
+                
+                # Export before Lambda freezes the sandbox; the response is already computed
+                flush_spans(context)
         
         return wrapper
     return decorator
@@ -660,11 +761,13 @@ def traced_lambda_handler(
 __all__ = [
     "setup_lambda_telemetry",
     "get_tracer",
+    "flush_spans",
     "traced",
     "traced_method",
     "traced_lambda_handler",
     "add_span_attributes",
     "add_span_event",
+    "span_batch",
     "set_span_error",
     "extract_trace_context",
     "inject_trace_context",
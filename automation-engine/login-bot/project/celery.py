@@ -4,7 +4,8 @@ Sets up Redis as the broker and defines platform-specific queues.
 """
 import os
 from celery import Celery
-from celery.signals import worker_process_init
+from celery.exceptions import ImproperlyConfigured
+from celery.signals import celeryd_init, worker_process_init
 from kombu import Queue
 
 # Set the default Django settings module for the 'celery' program.
@@ -23,8 +24,24 @@ app.conf.task_queues = (
     Queue('instagram_queue', routing_key='instagram'),
     Queue('linkedin_queue', routing_key='linkedin'),
     Queue('twitter_queue', routing_key='twitter'),
+    Queue('maintenance_queue', routing_key='maintenance'),
 )
 
+# Per-queue dispatch concurrency: how many jobs of one platform may allocate a
+# cookie and trigger Lambda at the same time. Every running job holds its own
+# cookie lease, so these can go up to the number of logged-in accounts.
+# 1 keeps the original one-job-at-a-time behaviour. Enforced per worker, so run
+# one worker per platform queue to use each queue's full limit.
+QUEUE_CONCURRENCY = {
+    'instagram_queue': int(os.getenv('INSTAGRAM_QUEUE_CONCURRENCY', '1')),
+    'linkedin_queue': int(os.getenv('LINKEDIN_QUEUE_CONCURRENCY', '1')),
+    'twitter_queue': int(os.getenv('TWITTER_QUEUE_CONCURRENCY', '1')),
+}
+
+# FIFO admission: each pool process reserves only the job it is about to run,
+# so jobs start in queue order no matter how many run in parallel.
+app.conf.worker_prefetch_multiplier = 1
+
 # Default queue configuration
 app.conf.task_default_queue = 'default'
 app.conf.task_default_exchange = 'default'
@@ -34,6 +51,49 @@ app.conf.task_default_routing_key = 'default'
 app.autodiscover_tasks()
 
 
+def queue_concurrency_limit(queues) -> int | None:
+    """
+    Largest pool size that keeps every consumed platform queue within its limit.
+    
+    Any pool process may run a job from any queue the worker consumes, so a
+    worker on several platform queues is held to the smallest of their limits.
+    
+    Returns:
+        Pool size, or None if the worker consumes no platform queue
+    """
+    if isinstance(queues, str):
+        queues = queues.split(',')
+    limits = [QUEUE_CONCURRENCY[queue.strip()] for queue in queues or [] if queue.strip() in QUEUE_CONCURRENCY]
+    if not limits:
+        return None
+    return max(1, min(limits))
+
+
+@celeryd_init.connect
+def configure_queue_concurrency(sender=None, conf=None, options=None, **kwargs):
+    """
+    Size the worker pool from QUEUE_CONCURRENCY.
+    
+    Without --concurrency the pool gets queue_concurrency_limit(); an explicit
+    --concurrency above it is refused, since it would run more jobs of a
+    platform at once than its limit allows.
+    """
+    options = options or {}
+    queues = options.get('queues') or []
+    limit = queue_concurrency_limit(queues)
+    if limit is None:
+        return
+    
+    requested = options.get('concurrency')
+    if requested and requested > limit:
+        raise ImproperlyConfigured(
+            f"--concurrency={requested} exceeds the per-queue limit ({limit}) for {queues}. "
+            f"Raise the *_QUEUE_CONCURRENCY setting or run one worker per platform queue."
+        )
+    if not requested:
+        conf.worker_concurrency = limit
+
+
 @worker_process_init.connect
 def init_telemetry_for_worker(**kwargs):
     """
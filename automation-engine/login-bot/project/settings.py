@@ -158,6 +158,40 @@ CELERY_RESULT_EXPIRES = 3600  # 1 hour
 # Track task start time
 CELERY_TASK_TRACK_STARTED = True
 
+# Redis for hot service state (cookie waitlist, cookie pool); defaults to the broker
+REDIS_URL = os.getenv('REDIS_URL', CELERY_BROKER_URL)
+
+# Redis hot cookie pool: LRU ordering in a sorted set, SocialAccount updated by write-behind
+COOKIE_POOL_ENABLED = os.getenv('COOKIE_POOL_ENABLED', 'false').lower() == 'true'
+COOKIE_POOL_FLUSH_INTERVAL = 5  # seconds between write-behind flushes to Postgres
+COOKIE_POOL_FLUSH_BATCH_SIZE = 500  # max pool state changes applied per flush
+COOKIE_POOL_RESYNC_INTERVAL = 300  # seconds before the pool is reloaded from Postgres
+
+# Instagram validation cache TTLs in seconds (0 disables the cache)
+VALIDATION_CACHE_COOKIE_TTL = int(os.getenv('VALIDATION_CACHE_COOKIE_TTL', '60'))  # cookie passed validation
+VALIDATION_CACHE_MEDIA_TTL = int(os.getenv('VALIDATION_CACHE_MEDIA_TTL', '300'))  # post comment_count
+
+# Background cookie prober: pre-validates idle cookies so allocation can skip inline validation
+COOKIE_VALIDATION_FRESHNESS = int(os.getenv('COOKIE_VALIDATION_FRESHNESS', '300'))  # seconds a validation stays trusted (0 = always validate inline)
+COOKIE_PROBE_INTERVAL = int(os.getenv('COOKIE_PROBE_INTERVAL', '120'))  # seconds between probe runs
+COOKIE_PROBE_CONCURRENCY = int(os.getenv('COOKIE_PROBE_CONCURRENCY', '8'))  # validations in flight per run
+COOKIE_PROBE_BATCH_SIZE = 200  # max accounts probed per run
+COOKIE_PROBE_POST_URL = os.getenv('COOKIE_PROBE_POST_URL', '')  # public Instagram post used to probe IG cookies
+
+# Periodic maintenance tasks (run with: celery -A project beat)
+CELERY_BEAT_SCHEDULE = {
+    'flush-cookie-pool-writes': {
+        'task': 'bots.tasks.flush_cookie_pool_writes',
+        'schedule': COOKIE_POOL_FLUSH_INTERVAL,
+        'options': {'queue': 'maintenance_queue'},
+    },
+    'probe-idle-cookies': {
+        'task': 'bots.tasks.probe_idle_cookies',
+        'schedule': COOKIE_PROBE_INTERVAL,
+        'options': {'queue': 'maintenance_queue'},
+    },
+}
+
 # Lambda Integration
 LAMBDA_FUNCTION_URL = os.getenv('LAMBDA_FUNCTION_URL', '')
 
@@ -61,13 +61,25 @@ eventsRouter.post("/", async (req, res) => {
           payload: e.payload as Prisma.InputJsonValue
         }
       });
-    });
 
-    // ✅ apply scoring AFTER transaction
-    await applyEventScore(e.accountId, e.eventType);
+      // Scored in the same transaction: a scoring failure rolls the insert back,
+      // so the sender's retry is stored and scored instead of answered with 409
+      await applyEventScore(e.accountId, e.eventType, tx);
+    });
 
     return res.status(201).json({ status: "event_ingested" });
   } catch (err) {
+    if (err instanceof Prisma.PrismaClientKnownRequestError && err.code === "P2002") {
+      // A resent event (the sender retries until it gets an answer) is already stored
+      try {
+        const existing = await prisma.accountEvent.findUnique({ where: { eventId: e.eventId } });
+        if (existing) {
+          return res.status(409).json({ error: "Duplicate event", event_id: e.eventId });
+        }
+      } catch (lookupErr) {
+        console.error(lookupErr);
+      }
+    }
     console.error(err);
     return res.status(500).json({ error: "Event ingestion failed" });
   }
@@ -1,15 +1,17 @@
 import { prisma } from "../db";
 import { SCORE_RULES } from "./rules";
-import { EventType, AccountState } from "@prisma/client";
+import { EventType, AccountState, Prisma } from "@prisma/client";
 
+// Pass a transaction client to score an event atomically with its insert
 export async function applyEventScore(
   accountId: string,
-  eventType: EventType
+  eventType: EventType,
+  db: Prisma.TransactionClient = prisma
 ) {
   const rule = SCORE_RULES[eventType];
   if (!rule) return;
 
-  const account = await prisma.account.findUnique({
+  const account = await db.account.findUnique({
     where: { id: accountId }
   });
 
@@ -30,7 +32,7 @@ export async function applyEventScore(
     nextState = AccountState.ACTIVE;
   }
 
-  await prisma.account.update({
+  await db.account.update({
     where: { id: accountId },
     data: {
       trustScore: nextScore,